@@ -0,0 +1,74 @@
+"""Fixtures for the DIGY benchmark suite.
+
+Benchmarks only run with DIGY_BENCH=true (see `make bench`). Each benchmark
+times a callable over DIGY_BENCH_ITERATIONS runs; the summaries are written
+as JSON to DIGY_BENCH_OUTPUT (default: bench-results.json).
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from digy.bench import build_fixture_repo
+from digy.stats import summarize
+
+ITERATIONS = int(os.getenv("DIGY_BENCH_ITERATIONS", "5"))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+RESULTS = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks unless they were asked for"""
+    if os.getenv("DIGY_BENCH", "false").lower() == "true":
+        return
+    skip = pytest.mark.skip(reason="set DIGY_BENCH=true to run benchmarks")
+    for item in items:
+        # The hook sees the whole session, including tests/
+        if str(item.fspath).startswith(HERE + os.sep):
+            item.add_marker(skip)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write the collected summaries"""
+    if RESULTS:
+        with open(os.getenv("DIGY_BENCH_OUTPUT", "bench-results.json"), "w") as f:
+            json.dump(RESULTS, f, indent=2)
+
+
+@pytest.fixture(scope="session")
+def fixture_repo(tmp_path_factory):
+    """Bare fixture repository sized by DIGY_BENCH_FILES/DEPTH/REQUIREMENTS"""
+    return build_fixture_repo(
+        str(tmp_path_factory.mktemp("fixture")),
+        files=int(os.getenv("DIGY_BENCH_FILES", "500")),
+        depth=int(os.getenv("DIGY_BENCH_DEPTH", "3")),
+        requirements=int(os.getenv("DIGY_BENCH_REQUIREMENTS", "2")),
+    )
+
+
+@pytest.fixture
+def benchmark(request):
+    """Time ``func(*args)`` over the configured iterations
+
+    ``setup`` runs before each call and its result is passed as the first
+    argument; ``teardown`` gets the call's result. Neither is timed.
+    """
+
+    def run(func, *args, setup=None, teardown=None):
+        samples = []
+        result = None
+        for _ in range(ITERATIONS):
+            call_args = ((setup(),) if setup else ()) + args
+            started = time.perf_counter()
+            result = func(*call_args)
+            samples.append(time.perf_counter() - started)
+            if teardown:
+                teardown(result)
+        RESULTS[request.node.name] = summarize(samples)
+        return result
+
+    return run
@@ -0,0 +1,74 @@
+"""Benchmarks for the DIGY load, index and setup phases."""
+
+import os
+import shutil
+
+from digy.bench import FIXTURE_SCRIPT, quiet_consoles, run_iteration
+from digy.deployer import Deployer
+from digy.loader import GitLoader
+from digy.tempdirs import make_temp_dir
+
+
+def load(fixture_repo):
+    """Clone the fixture into a fresh loader"""
+    loader = GitLoader(make_temp_dir())
+    with quiet_consoles():
+        repo_path = loader.download_repo(fixture_repo, "main")
+    assert repo_path
+    return loader, repo_path
+
+
+def unload(loaded):
+    """Remove a loaded fixture"""
+    loader, _ = loaded
+    with quiet_consoles():
+        loader.cleanup_all(force=True)
+
+
+def test_load(benchmark, fixture_repo):
+    """Clone the bare fixture over file://"""
+    benchmark(load, fixture_repo, teardown=unload)
+
+
+def test_discover_files(benchmark, fixture_repo):
+    """Index a freshly cloned checkout"""
+    loaded = load(fixture_repo)
+    try:
+        deployer = benchmark(Deployer, loaded[1])
+        assert FIXTURE_SCRIPT in deployer.python_files
+    finally:
+        unload(loaded)
+
+
+def test_setup_environment(benchmark, fixture_repo):
+    """Create the venv and install the fixture's local wheels"""
+    loaded = load(fixture_repo)
+    deployer = Deployer(loaded[1])
+
+    def setup():
+        with quiet_consoles():
+            assert deployer.setup_environment()
+
+    def teardown(_):
+        with quiet_consoles():
+            deployer.cleanup(force=True)
+
+    try:
+        benchmark(setup, teardown=teardown)
+    finally:
+        unload(loaded)
+
+
+def test_pipeline(benchmark, fixture_repo, tmp_path):
+    """Load, set up and run the fixture end to end"""
+    trace_path = str(tmp_path / "trace.jsonl")
+
+    def run():
+        if os.path.exists(trace_path):
+            os.remove(trace_path)
+        with quiet_consoles():
+            return run_iteration(fixture_repo, FIXTURE_SCRIPT, trace_path)
+
+    timings = benchmark(run)
+    assert timings["run"] > 0
+    shutil.rmtree(tmp_path, ignore_errors=True)
@@ -9,9 +9,29 @@ __version__ = "0.1.0"
 __author__ = "Tom Sapletta"
 __email__ = "info@softreck.dev"
 
-from .cli import main
-from .deployer import Deployer
-from .interactive import InteractiveMenu
-from .loader import digy, digy_command
-
 __all__ = ["digy", "digy_command", "main", "InteractiveMenu", "Deployer"]
+
+# Public names are imported on first access (PEP 562), so importing the
+# package does not pull in git, requests, docker and rich
+_EXPORTS = {
+    "main": "cli",
+    "Deployer": "deployer",
+    "InteractiveMenu": "interactive",
+    "digy": "loader",
+    "digy_command": "loader",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -0,0 +1,364 @@
+"""
+Python file analyzer for DIGY
+Extracts file metadata with ast, in parallel, backed by a persistent cache
+"""
+
+import ast
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import get_cache_dir
+from .history import record_cache
+from .indexer import file_digest
+
+# Bump when the shape of analysis results changes
+ANALYZER_VERSION = 2
+
+# Below this many cache misses a process pool costs more than it saves
+PARALLEL_MIN_FILES = 32
+
+# Stored results unused for this long are pruned
+MAX_RESULT_AGE = 30 * 24 * 3600.0
+
+CLI_MODULES = {"argparse": "uses_argparse", "click": "uses_click"}
+
+
+def _is_main_guard(node: ast.AST) -> bool:
+    """Check for ``if __name__ == "__main__":``"""
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    test = node.test
+    if len(test.ops) != 1 or not isinstance(test.ops[0], ast.Eq):
+        return False
+    sides = [test.left, test.comparators[0]]
+    has_name = any(isinstance(s, ast.Name) and s.id == "__name__" for s in sides)
+    has_main = any(isinstance(s, ast.Constant) and s.value == "__main__" for s in sides)
+    return has_name and has_main
+
+
+def _format_import(node: ast.AST) -> str:
+    """Render an import statement as source text"""
+    names = ", ".join(
+        f"{a.name} as {a.asname}" if a.asname else a.name for a in node.names
+    )
+    if isinstance(node, ast.Import):
+        return f"import {names}"
+    module = "." * node.level + (node.module or "")
+    return f"from {module} import {names}"
+
+
+def analyze_source(source: str) -> Dict[str, Any]:
+    """Analyze Python source code
+
+    Returns:
+        Dict with line count, main guard, imports, imported modules,
+        top-level functions/classes and CLI framework usage
+    """
+    info: Dict[str, Any] = {
+        "lines": len(source.splitlines()),
+        "has_main": False,
+        "imports": [],
+        "modules": [],
+        "functions": [],
+        "classes": [],
+        "uses_argparse": False,
+        "uses_click": False,
+        "syntax_error": None,
+    }
+
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        info["syntax_error"] = str(e)
+        info["has_main"] = 'if __name__ == "__main__"' in source
+        return info
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            info["functions"].append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            info["classes"].append(node.name)
+        elif _is_main_guard(node):
+            info["has_main"] = True
+
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            info["imports"].append(_format_import(node))
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            info["imports"].append(_format_import(node))
+            base = "." * node.level + (node.module or "")
+            modules.append(base)
+            # Imported names may be submodules, resolved by the longest match
+            separator = "." if node.module else ""
+            modules.extend(
+                base + separator + alias.name
+                for alias in node.names
+                if alias.name != "*"
+            )
+
+    for module in modules:
+        flag = CLI_MODULES.get(module.split(".")[0])
+        if flag:
+            info[flag] = True
+    info["modules"] = list(dict.fromkeys(modules))
+    return info
+
+
+def analyze_path(full_path: str) -> Dict[str, Any]:
+    """Read and analyze a Python file"""
+    try:
+        with open(full_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return {"error": str(e)}
+    return analyze_source(data.decode("utf-8", errors="replace"))
+
+
+class MetadataCache:
+    """Persistent SQLite cache of analysis results
+
+    Results are keyed by repository-relative path and a digest of the file's
+    contents, so every clone of a repository shares them. A second table
+    records each checkout's file sizes, mtimes and digests, so files that
+    did not change since the checkout was last analyzed are not read again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "metadata.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " path TEXT NOT NULL, digest TEXT NOT NULL, version INTEGER,"
+            " data TEXT, used REAL, PRIMARY KEY (path, digest));"
+            "CREATE TABLE IF NOT EXISTS file_stats ("
+            " root TEXT NOT NULL, path TEXT NOT NULL, size INTEGER, mtime REAL,"
+            " digest TEXT, PRIMARY KEY (root, path));"
+            "CREATE INDEX IF NOT EXISTS file_stats_digest"
+            " ON file_stats (path, digest);"
+        )
+        self._conn.commit()
+
+    def load(self, root: str) -> Dict[str, Tuple[int, float, Dict[str, Any]]]:
+        """Load the valid-version results of a checkout's files
+
+        Returns:
+            Mapping of relative path to (size, mtime, result)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.path, s.size, s.mtime, a.data FROM file_stats s"
+                " JOIN analysis a ON a.path = s.path AND a.digest = s.digest"
+                " WHERE s.root = ? AND a.version = ?",
+                (root, ANALYZER_VERSION),
+            ).fetchall()
+        return {
+            path: (size, mtime, json.loads(data)) for path, size, mtime, data in rows
+        }
+
+    def lookup(self, keys: Iterable[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Find results by (relative path, content digest)
+
+        Returns:
+            Mapping of relative path to result for the keys that were found
+        """
+        found = {}
+        with self._lock:
+            for path, digest in keys:
+                row = self._conn.execute(
+                    "SELECT data FROM analysis"
+                    " WHERE path = ? AND digest = ? AND version = ?",
+                    (path, digest, ANALYZER_VERSION),
+                ).fetchone()
+                if row is not None:
+                    found[path] = json.loads(row[0])
+        return found
+
+    def store(
+        self,
+        root: str,
+        rows: Iterable[Tuple[str, int, float, str, Optional[Dict[str, Any]]]],
+    ):
+        """Record a checkout's files and their analysis results
+
+        Args:
+            root: Repository root
+            rows: (path, size, mtime, digest, result) tuples; result is None
+                for files whose result is already stored under the digest
+        """
+        now = time.time()
+        rows = list(rows)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_stats VALUES (?, ?, ?, ?, ?)",
+                [(root, *row[:4]) for row in rows],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?)",
+                [
+                    (path, digest, ANALYZER_VERSION, json.dumps(data), now)
+                    for path, _, _, digest, data in rows
+                    if data is not None
+                ],
+            )
+            self._conn.executemany(
+                "UPDATE analysis SET used = ? WHERE path = ? AND digest = ?",
+                [
+                    (now, path, digest)
+                    for path, _, _, digest, data in rows
+                    if data is None
+                ],
+            )
+            self._conn.commit()
+
+    def prune(self, max_age: float = MAX_RESULT_AGE):
+        """Drop removed checkouts and results no checkout used for a while
+
+        Args:
+            max_age: Seconds since a result was last stored or found by
+                digest before it is dropped, unless a checkout still has it
+        """
+        with self._lock:
+            roots = [
+                root
+                for (root,) in self._conn.execute(
+                    "SELECT DISTINCT root FROM file_stats"
+                ).fetchall()
+                if not os.path.isdir(root)
+            ]
+            self._conn.executemany(
+                "DELETE FROM file_stats WHERE root = ?", [(root,) for root in roots]
+            )
+            self._conn.execute(
+                "DELETE FROM analysis WHERE version != ? OR (used < ? AND NOT EXISTS"
+                " (SELECT 1 FROM file_stats s"
+                "  WHERE s.path = analysis.path AND s.digest = analysis.digest))",
+                (ANALYZER_VERSION, time.time() - max_age),
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class FileAnalyzer:
+    """Analyze the Python files of a repository with caching
+
+    Results are cached in memory and in a ``MetadataCache``. Cache misses
+    are analyzed on a process pool when there are enough of them.
+    """
+
+    def __init__(self, repo_path: str, cache: Optional[MetadataCache] = None):
+        self.repo_path = os.path.abspath(repo_path)
+        self._cache = cache
+        self._memory: Optional[Dict[str, Tuple[int, float, Dict[str, Any]]]] = None
+        self._pruned = False
+
+    @property
+    def cache(self) -> Optional[MetadataCache]:
+        if self._cache is None:
+            try:
+                self._cache = MetadataCache()
+            except sqlite3.Error:
+                return None
+        return self._cache
+
+    def _load_memory(self) -> Dict[str, Tuple[int, float, Dict[str, Any]]]:
+        if self._memory is None:
+            cache = self.cache
+            self._memory = cache.load(self.repo_path) if cache else {}
+        return self._memory
+
+    def forget(self, paths: Optional[Iterable[str]] = None):
+        """Drop in-memory results so the files are checked again
+
+        Args:
+            paths: Relative paths to drop, or None for all
+        """
+        if self._memory is None:
+            return
+        if paths is None:
+            self._memory = None
+            return
+        for path in paths:
+            self._memory.pop(path, None)
+
+    def analyze(
+        self, files: Dict[str, Tuple[int, float]], max_workers: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Analyze files, reusing cached results
+
+        Args:
+            files: Mapping of relative path to (size, mtime)
+            max_workers: Process pool size, defaults to the CPU count
+
+        Returns:
+            Mapping of relative path to analysis result
+        """
+        memory = self._load_memory()
+        results: Dict[str, Dict[str, Any]] = {}
+        misses: List[str] = []
+
+        for path, (size, mtime) in files.items():
+            cached = memory.get(path)
+            if cached is not None and cached[0] == size and cached[1] == mtime:
+                results[path] = cached[2]
+            else:
+                misses.append(path)
+        if not misses:
+            record_cache("analysis", hits=len(results))
+            return results
+
+        # Other checkouts may have analyzed the same contents
+        digests = {}
+        for path in misses:
+            digest = file_digest(os.path.join(self.repo_path, path))
+            if digest is not None:
+                digests[path] = digest
+        cache = self.cache
+        try:
+            found = cache.lookup(digests.items()) if cache else {}
+        except sqlite3.Error:
+            found = {}
+        rows = []
+        for path, data in found.items():
+            size, mtime = files[path]
+            results[path] = data
+            memory[path] = (size, mtime, data)
+            rows.append((path, size, mtime, digests[path], None))
+        misses = [path for path in misses if path not in found]
+        record_cache("analysis", hits=len(results), misses=len(misses))
+
+        full_paths = [os.path.join(self.repo_path, p) for p in misses]
+        if len(misses) >= PARALLEL_MIN_FILES:
+            workers = max_workers or os.cpu_count() or 1
+            chunksize = max(1, len(misses) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                analyzed = list(pool.map(analyze_path, full_paths, chunksize=chunksize))
+        else:
+            analyzed = [analyze_path(p) for p in full_paths]
+
+        for path, data in zip(misses, analyzed):
+            results[path] = data
+            if "error" in data or path not in digests:
+                continue
+            size, mtime = files[path]
+            memory[path] = (size, mtime, data)
+            rows.append((path, size, mtime, digests[path], data))
+
+        if cache and rows:
+            try:
+                cache.store(self.repo_path, rows)
+                if misses and not self._pruned:
+                    self._pruned = True
+                    cache.prune()
+            except sqlite3.Error:
+                pass
+        return results
@@ -0,0 +1,178 @@
+"""
+Benchmarks for DIGY
+Times the load, setup and run phases against synthetic local repositories
+
+A fixture repository is a bare Git repository from :mod:`digy.synthetic`,
+served over ``file://`` with requirements installed from wheels committed to
+the repository, so a benchmark needs no network.
+Phase timings come from the spans of :mod:`digy.tracing`.
+"""
+
+import contextlib
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from . import tracing
+from .stats import summarize
+from .synthetic import ENTRY_POINT, RepoSpec, generate_repo
+from .version import __version__
+
+FIXTURE_SCRIPT = ENTRY_POINT
+
+# Spans of one pipeline run that are reported, in pipeline order
+PHASES = (
+    "load",
+    "parse_repo_url",
+    "clone",
+    "discover_files",
+    "setup",
+    "venv",
+    "pip",
+    "run",
+)
+
+
+def build_fixture_repo(
+    root: str,
+    files: int = 100,
+    depth: int = 3,
+    requirements: int = 2,
+    name: str = "fixture",
+) -> str:
+    """Create a bare fixture repository
+
+    Args:
+        root: Directory for the bare repository
+        files: Python modules besides the entry point
+        depth: Directory levels the modules are spread over
+        requirements: Local wheels listed in ``requirements.txt``
+
+    Returns:
+        ``file://`` URL of the bare repository
+    """
+    bare = os.path.join(root, f"{name}.git")
+    generate_repo(bare, RepoSpec(files=files, depth=depth, requirements=requirements))
+    return f"file://{bare}"
+
+
+@contextlib.contextmanager
+def quiet_consoles():
+    """Silence the progress output of the loader and deployer"""
+    from . import cache, deployer, loader
+
+    consoles = [loader.console, deployer.console, cache.console.get()]
+    saved = [console.quiet for console in consoles]
+    for console in consoles:
+        console.quiet = True
+    try:
+        yield
+    finally:
+        for console, quiet in zip(consoles, saved):
+            console.quiet = quiet
+
+
+def run_iteration(
+    repo_url: str, script: str, trace_path: str, branch: str = "main"
+) -> Dict[str, float]:
+    """Load, set up and run a repository once in a fresh session
+
+    Returns:
+        Seconds spent per span name, summed over repeated spans (e.g. one
+        per pip call), and ``total``
+    """
+    from .deployer import Deployer
+    from .loader import GitLoader
+    from .tempdirs import make_temp_dir
+
+    loader = GitLoader(make_temp_dir())
+    deployer = None
+    with tracing.trace_to(trace_path):
+        started = time.perf_counter()
+        try:
+            repo_path = loader.download_repo(repo_url, branch)
+            if not repo_path:
+                raise RuntimeError(f"Failed to load {repo_url}")
+            deployer = Deployer(repo_path)
+            if not deployer.setup_environment():
+                raise RuntimeError("Failed to set up environment")
+            deployer.stream_output = False
+            result = deployer.run_file(script)
+            if not result.success:
+                raise RuntimeError(f"{script} exited with {result.returncode}")
+            total = time.perf_counter() - started
+        finally:
+            if deployer is not None:
+                deployer.cleanup(force=True)
+            loader.cleanup_all(force=True)
+
+    return dict(tracing.span_durations(trace_path), total=total)
+
+
+def run_benchmark(
+    repo_url: Optional[str] = None,
+    script: str = FIXTURE_SCRIPT,
+    iterations: int = 5,
+    warmup: int = 1,
+    files: int = 100,
+    depth: int = 3,
+    requirements: int = 2,
+    work_dir: Optional[str] = None,
+    progress=None,
+) -> Dict[str, Any]:
+    """Benchmark the pipeline over a fixture (or the given) repository
+
+    Args:
+        repo_url: Repository to benchmark instead of a generated fixture
+        iterations: Measured runs
+        warmup: Unmeasured runs first, e.g. to fill the pip bootstrap cache
+        work_dir: Directory for the fixture and traces, defaults to a new
+            temporary directory that is removed afterwards
+        progress: Called with (iteration, iterations) after each run
+
+    Returns:
+        Environment, parameters, per-iteration samples and per-phase
+        summaries (median and percentiles, in seconds)
+    """
+    from .tempdirs import make_temp_dir
+    from .trash import discard
+
+    own_dir = work_dir is None
+    work_dir = work_dir or make_temp_dir("digy_bench_")
+    try:
+        fixture = None
+        if repo_url is None:
+            fixture = {"files": files, "depth": depth, "requirements": requirements}
+            repo_url = build_fixture_repo(work_dir, files, depth, requirements)
+
+        samples: List[Dict[str, float]] = []
+        with quiet_consoles():
+            for i in range(warmup + iterations):
+                trace_path = os.path.join(work_dir, f"trace-{i}.jsonl")
+                timings = run_iteration(repo_url, script, trace_path)
+                if i >= warmup:
+                    samples.append(timings)
+                    if progress:
+                        progress(len(samples), iterations)
+    finally:
+        if own_dir:
+            discard(work_dir)
+
+    names = [p for p in PHASES if any(p in s for s in samples)] + ["total"]
+    return {
+        "digy_version": __version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "repo": repo_url if fixture is None else None,
+        "script": script,
+        "fixture": fixture,
+        "iterations": iterations,
+        "warmup": warmup,
+        "samples": samples,
+        "phases": {
+            name: summarize(s.get(name, 0.0) for s in samples) for name in names
+        },
+    }
@@ -0,0 +1,113 @@
+"""
+Cache management for DIGY
+Handles on-disk caches that are shared between sessions
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from typing import Optional
+
+from .lazy import LazyConsole
+
+console = LazyConsole()
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Get (and create) a directory inside the DIGY cache
+
+    Args:
+        *parts: Path components below the cache root
+
+    Returns:
+        str: Absolute path to the cache directory
+    """
+    base = os.getenv("DIGY_CACHE_DIR")
+    if not base:
+        xdg_cache = os.getenv("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        base = os.path.join(xdg_cache, "digy")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_state_dir(*parts: str) -> str:
+    """Get (and create) a directory inside the DIGY state directory
+
+    State (run history) is kept apart from the cache, which may be wiped.
+
+    Args:
+        *parts: Path components below the state root
+
+    Returns:
+        str: Absolute path to the state directory
+    """
+    base = os.getenv("DIGY_STATE_DIR")
+    if not base:
+        xdg_state = os.getenv("XDG_STATE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".local", "state"
+        )
+        base = os.path.join(xdg_state, "digy")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _bundled_wheels() -> list:
+    """List wheels bundled with ensurepip for the running interpreter"""
+    try:
+        import ensurepip
+    except ImportError:
+        return []
+    bundled_dir = os.path.join(os.path.dirname(ensurepip.__file__), "_bundled")
+    return sorted(glob.glob(os.path.join(bundled_dir, "*.whl")))
+
+
+def ensure_pip_bootstrap() -> Optional[str]:
+    """Get a shared directory with pip/setuptools unpacked from ensurepip
+
+    The directory is populated once per interpreter version by unpacking
+    the wheels bundled with ensurepip, so no network access is needed.
+    Virtual environments created with ``--without-pip`` can then import pip
+    from it through a ``.pth`` file instead of running ensurepip each time.
+
+    Returns:
+        str: Path to the bootstrap directory or None if unavailable
+    """
+    wheels = _bundled_wheels()
+    if not wheels:
+        return None
+
+    version = f"py{sys.version_info.major}{sys.version_info.minor}"
+    tag = "-".join(os.path.basename(w)[:-4] for w in wheels)
+    target = os.path.join(get_cache_dir("pip-bootstrap"), f"{version}-{tag}")
+    from .history import record_cache
+
+    if os.path.isdir(target):
+        record_cache("pip-bootstrap", hits=1)
+        return target
+    record_cache("pip-bootstrap", misses=1)
+
+    staging = tempfile.mkdtemp(prefix=".staging_", dir=os.path.dirname(target))
+    try:
+        for wheel in wheels:
+            with zipfile.ZipFile(wheel) as zf:
+                zf.extractall(staging)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another session finished unpacking first
+            if not os.path.isdir(target):
+                raise
+        return target
+    except Exception as e:
+        console.print(f"⚠️ Could not prepare pip bootstrap cache: {e}")
+        return None
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
@@ -7,41 +7,24 @@ import os
 import shutil
 import subprocess
 import sys
-from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import click
-from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.table import Table
-
-from .auth import get_auth_provider, interactive_auth_selector
-from .environment import EnvironmentManager, select_virtualenv
-from .loader import digy, memory_manager, GitLoader
-from .version import __version__
-
-# Import Deployer if it exists in the project
-try:
-    from .deployer import Deployer
-except ImportError:
 
-    class Deployer:
-        """Dummy Deployer class if not available"""
+from .lazy import LazyConsole
+from .version import __version__
 
-        def __init__(self, path: str):
-            self.path = path
+# Commands import the rest of DIGY (git, requests, docker, rich, psutil) when
+# they run, so that `digy --version` and `digy --help` start quickly.
+# tests/test_startup.py keeps this in check.
 
-        @classmethod
-        def execute_python_file(
-            cls, python_file: str, args: List[str] = None
-        ) -> subprocess.CompletedProcess:
-            """Execute a Python file with arguments"""
-            cmd = [sys.executable, python_file] + (args or [])
-            return subprocess.run(cmd, cwd=os.getcwd())
+# Hours before an unmarked temporary directory counts as orphaned (gc)
+GC_MIN_AGE_HOURS = 24.0
 
+# Sort keys of `digy profile`, as in digy.profiler.SORT_KEYS
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
 
-console = Console()
+console = LazyConsole()
 
 # Common options for environment selection
 env_options = [
@@ -88,8 +71,36 @@ def add_options(options):
     type=click.Path(exists=True, dir_okay=False, resolve_path=True),
     help="Path to authentication config file",
 )
+@click.option(
+    "--timeout",
+    type=float,
+    help="Seconds a script may run before it is stopped (0 for no limit)",
+)
+@click.option(
+    "--grace-period",
+    type=float,
+    help="Seconds between SIGTERM and SIGKILL when stopping a script",
+)
+@click.option(
+    "--trace-memory",
+    is_flag=True,
+    help="Trace script allocations with tracemalloc and dump the top sites",
+)
+@click.option(
+    "--trace",
+    is_flag=True,
+    help="Record phase timings as OpenTelemetry spans (see 'digy trace show')",
+)
 @click.pass_context
-def main(ctx, auth: Optional[str], auth_config: Optional[str]):
+def main(
+    ctx,
+    auth: Optional[str],
+    auth_config: Optional[str],
+    timeout: Optional[float],
+    grace_period: Optional[float],
+    trace_memory: bool,
+    trace: bool,
+):
     """
     DIGY - Dynamic Interactive Git deploY
 
@@ -103,9 +114,58 @@ def main(ctx, auth: Optional[str], auth_config: Optional[str]):
     ctx.obj["auth_type"] = auth
     ctx.obj["auth_config"] = auth_config
 
+    from .environment import EnvironmentManager
+    from .trash import sweep
+
     # Initialize environment manager with default values
     ctx.obj["env_manager"] = EnvironmentManager(env_type="local")
 
+    # Hand trash left by crashed sessions to a background deleter
+    sweep()
+
+    # Optional hint about directories left by crashed sessions
+    if (
+        os.getenv("DIGY_GC_ON_START", "false").lower() == "true"
+        and ctx.invoked_subcommand != "gc"
+    ):
+        from .tempdirs import find_orphans
+
+        orphans = find_orphans()
+        if orphans:
+            console.print(
+                f"🧹 {len(orphans)} orphaned temporary director"
+                f"{'y' if len(orphans) == 1 else 'ies'} found, "
+                "run 'digy gc' to reclaim",
+                style="yellow",
+            )
+
+    # Run limits reach every Deployer, including the interactive session's
+    if timeout is not None:
+        os.environ["DIGY_TIMEOUT"] = str(timeout)
+    if grace_period is not None:
+        os.environ["DIGY_GRACE_PERIOD"] = str(grace_period)
+    if trace_memory:
+        os.environ["DIGY_TRACE_MEMORY"] = "true"
+    if trace:
+        os.environ["DIGY_TRACE"] = "true"
+        ctx.call_on_close(report_trace)
+
+    # Record the command with its phase timings and cache lookups
+    if os.getenv("DIGY_HISTORY", "true").lower() == "true":
+        from .history import finish_command, start_command
+
+        start_command(ctx.invoked_subcommand or "")
+        ctx.call_on_close(finish_command)
+
+
+def report_trace():
+    """Print where this session's spans were written"""
+    from .tracing import get_tracer
+
+    tracer = get_tracer()
+    if tracer and tracer.path and os.path.exists(tracer.path):
+        console.print(f"🧭 Trace written to {tracer.path} (digy trace show)")
+
 
 @main.group()
 def env():
@@ -116,6 +176,8 @@ def env():
 @env.command("list")
 def list_envs():
     """List available virtual environments"""
+    from .environment import select_virtualenv
+
     select_virtualenv()
 
 
@@ -124,6 +186,8 @@ def list_envs():
 @click.option("--python", help="Python interpreter to use")
 def create_env(path: str, python: Optional[str]):
     """Create a new virtual environment"""
+    from .environment import EnvironmentManager
+
     env_manager = EnvironmentManager()
     if env_manager.create_virtualenv(path, python):
         console.print(f"✅ Created virtual environment at {path}")
@@ -158,6 +222,8 @@ def local(
     - /path/to/local/repo
     - file:///path/to/local/repo
     """
+    from .environment import EnvironmentManager
+
     # Set environment type to local
     ctx.obj["env_manager"] = EnvironmentManager(env_type="local")
 
@@ -200,6 +266,11 @@ def start(
     - /path/to/local/repo
     - file:///path/to/local/repo
     """
+    from .environment import EnvironmentManager, select_virtualenv
+    from .loader import digy
+    from .tempdirs import make_temp_dir
+    from .trash import discard
+
     # Initialize environment manager from context or create new
     env_manager = ctx.obj.get("env_manager", EnvironmentManager(env_type="local"))
 
@@ -215,14 +286,9 @@ def start(
 
         # Load the repository
         try:
-            # Import here to avoid circular imports
-            import shutil
-            # Create a temporary directory for the repository
-            import tempfile
-
             from .loader import GitLoader
 
-            temp_dir = tempfile.mkdtemp(prefix="digy_")
+            temp_dir = make_temp_dir()
             console.print(f"📁 Using temporary directory: {temp_dir}")
 
             # Initialize GitLoader and clone the repository
@@ -314,7 +380,7 @@ def start(
         finally:
             # Clean up temporary directory
             if "temp_dir" in locals() and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                discard(temp_dir)
                 console.print(f"🧹 Cleaned up temporary directory: {temp_dir}")
 
     # Store files in context for the interactive menu
@@ -338,22 +404,35 @@ def start(
 @click.pass_context
 def default(ctx, repo_url: str, branch: str):
     """Default command when just 'digy <repo>' is used"""
+    from .loader import digy
+
     digy(repo_url, branch)
 
 
 @main.command()
 @click.pass_context
 def status(ctx):
-    """Show current DIGY status and memory usage"""
+    """Show current DIGY status, memory usage and recent commands"""
+    import time
+
+    import psutil
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from .environment import EnvironmentManager
+    from .history import current_command, get_history
+    from .tempdirs import format_size
+
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="dim", width=20)
     table.add_column("Value")
 
     # Memory usage
-    mem_stats = memory_manager.get_stats()
+    memory = psutil.virtual_memory()
     table.add_row(
         "Memory Usage",
-        f"{mem_stats['usage_mb']:.2f} MB / {mem_stats['total_mb']:.2f} MB",
+        f"{format_size(memory.total - memory.available)} / "
+        f"{format_size(memory.total)} ({memory.percent:.0f}%)",
     )
 
     # Environment info
@@ -363,17 +442,915 @@ def status(ctx):
     table.add_row("Environment", f"{env_type} ({python_path})")
 
     # Authentication status
-    auth_type = ctx.obj.get("auth_type", "None")
+    auth_type = ctx.obj.get("auth_type") or "None"
     table.add_row("Authentication", auth_type)
 
-    # Recent commands
-    recent = memory_manager.get_recent_commands(limit=5)
-    recent_str = "\n".join([f"{cmd['command']} ({cmd['timestamp']})" for cmd in recent])
-    table.add_row("Recent Commands", recent_str or "None")
+    # Recent commands and regressed runs from the run history
+    history = get_history()
+    commands = []
+    for cmd in history.recent_commands(limit=5, exclude=current_command()):
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(cmd["started"]))
+        line = f"{cmd['command'] or '-'} ({started})"
+        if cmd["exit_code"]:
+            line += f" exit {cmd['exit_code']}"
+        commands.append(line)
+    table.add_row("Recent Commands", "\n".join(commands) or "None")
+
+    regressed = [
+        f"{script_label(run['origin'], run['file'])}: {format_regressions(found)}"
+        for run, found in history.recent_regressions(limit=20)[:5]
+    ]
+    table.add_row("Regressions", "\n".join(regressed) or "None")
+    table.add_row("History", history.path)
 
     console.print(Panel.fit(table, title="DIGY Status"))
 
 
+def script_label(origin: str, file_path: str) -> str:
+    """Short name of a script in a repository, e.g. ``digy/main.py``"""
+    name = os.path.basename(origin.rstrip("/"))
+    if name.endswith(".git"):
+        name = name[: -len(".git")]
+    return f"{name}/{file_path}"
+
+
+def format_regressions(regressions) -> str:
+    """One-line summary of the regressed metrics of a run"""
+    return ", ".join(
+        f"{metric} +{found['change']:.0%}" for metric, found in regressions.items()
+    )
+
+
+@main.command()
+@click.option("--repo", help="Only repositories whose origin contains this text")
+@click.option("--script", help="Only this script, relative to the repository")
+@click.option(
+    "--window",
+    default=100,
+    show_default=True,
+    help="Newest runs per script (and samples per phase) summarized",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    help="Regression threshold as a fraction of the median "
+    "(default DIGY_REGRESSION_THRESHOLD or 0.2)",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print statistics as JSON")
+def stats(
+    repo: Optional[str],
+    script: Optional[str],
+    window: int,
+    threshold: Optional[float],
+    as_json: bool,
+):
+    """Show run percentiles, phase timings and cache hit rates from the history
+
+    A script is flagged when its last run took longer, or peaked at more
+    memory, than the median of its earlier successful runs by more than the
+    regression threshold.
+    """
+    import json
+    import time
+
+    from rich.table import Table
+
+    from .history import get_history
+    from .tempdirs import format_size
+
+    history = get_history()
+    results = {
+        "scripts": history.script_stats(repo, script, window, threshold),
+        "phases": history.phase_stats(window),
+        "caches": history.cache_stats(),
+    }
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+        return
+
+    if not results["scripts"]:
+        console.print("No runs recorded yet", style="yellow")
+    else:
+        table = Table(title="Script runs (durations in seconds)")
+        table.add_column("Script", style="cyan")
+        table.add_column("Runs", justify="right")
+        table.add_column("OK", justify="right")
+        for column in ("p50", "p90", "p95"):
+            table.add_column(column, justify="right")
+        table.add_column("RSS p50", justify="right")
+        table.add_column("Last run")
+        table.add_column("Regressed", style="red")
+        for row in results["scripts"]:
+            duration, peak = row["duration"], row["peak_rss"]
+            table.add_row(
+                script_label(row["origin"], row["file"]),
+                str(row["runs"]),
+                f"{row['success_rate']:.0%}",
+                *(
+                    f"{duration[key]:.2f}" if duration["count"] else "-"
+                    for key in ("median", "p90", "p95")
+                ),
+                format_size(int(peak["median"])) if peak["count"] else "-",
+                time.strftime("%m-%d %H:%M", time.localtime(row["last_run"])),
+                format_regressions(row["regressions"]),
+            )
+        console.print(table)
+
+    if results["phases"]:
+        table = Table(title="Phases")
+        table.add_column("Phase", style="cyan")
+        table.add_column("Count", justify="right")
+        for column in ("Median", "p90", "p95", "Max"):
+            table.add_column(f"{column} (ms)", justify="right")
+        for name, summary in results["phases"].items():
+            table.add_row(
+                name,
+                str(summary["count"]),
+                *(
+                    f"{summary[key] * 1000:.1f}"
+                    for key in ("median", "p90", "p95", "max")
+                ),
+            )
+        console.print(table)
+
+    if results["caches"]:
+        table = Table(title="Caches")
+        table.add_column("Cache", style="cyan")
+        for column in ("Hits", "Misses", "Hit rate"):
+            table.add_column(column, justify="right")
+        for name, counts in results["caches"].items():
+            table.add_row(
+                name,
+                str(counts["hits"]),
+                str(counts["misses"]),
+                f"{counts['hit_rate']:.0%}",
+            )
+        console.print(table)
+
+
+def load_repository(repo_url: str, branch: str) -> Tuple[str, Optional[str]]:
+    """Load a repository into a fresh temporary directory
+
+    Returns:
+        Tuple of (temporary directory, repository path or None on failure)
+    """
+    from .loader import GitLoader
+    from .tempdirs import make_temp_dir
+
+    temp_dir = make_temp_dir()
+    repo_path = GitLoader(temp_dir).download_repo(repo_url, branch)
+    if not repo_path or not os.path.exists(repo_path):
+        return temp_dir, None
+    return temp_dir, repo_path
+
+
+@main.command("run-many")
+@click.argument("repo_url")
+@click.argument("scripts", nargs=-1)
+@click.option("--branch", "-b", default="main", help="Git branch to checkout")
+@click.option(
+    "--args",
+    "-a",
+    "arg_sets",
+    multiple=True,
+    help="Argument set to run each script with (can be specified multiple times)",
+)
+@click.option(
+    "--jobs-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help='JSON list of jobs: [{"file": "script.py", "args": ["..."]}, ...]',
+)
+@click.option(
+    "--max-workers", "-j", type=int, help="Concurrent processes (default: CPU count)"
+)
+@click.option(
+    "--summary",
+    "summary_path",
+    type=click.Path(dir_okay=False),
+    help="Write the summary to a .json or .csv file",
+)
+@click.option("--timeout", type=float, help="Seconds each job may run (0 for no limit)")
+@click.option(
+    "--grace-period",
+    type=float,
+    help="Seconds between SIGTERM and SIGKILL when stopping a job",
+)
+def run_many(
+    repo_url: str,
+    scripts: tuple,
+    branch: str,
+    arg_sets: tuple,
+    jobs_file: Optional[str],
+    max_workers: Optional[int],
+    summary_path: Optional[str],
+    timeout: Optional[float],
+    grace_period: Optional[float],
+):
+    """
+    Run scripts from a repository in parallel
+
+    Every SCRIPT is run once per --args set in a shared virtual environment.
+    """
+    import json
+    import shlex
+
+    from rich.table import Table
+
+    from .deployer import Deployer
+    from .runner import write_summary
+    from .trash import discard
+
+    jobs = [
+        (script, shlex.split(args))
+        for script in scripts
+        for args in (arg_sets or ("",))
+    ]
+    if jobs_file:
+        with open(jobs_file) as f:
+            jobs.extend(json.load(f))
+    if not jobs:
+        console.print("❌ No jobs: pass SCRIPTS or --jobs-file", style="red")
+        sys.exit(1)
+
+    temp_dir, repo_path = load_repository(repo_url, branch)
+    try:
+        if not repo_path:
+            console.print("❌ Failed to load repository", style="red")
+            sys.exit(1)
+
+        deployer = Deployer(repo_path)
+        deployer.timeout = timeout
+        deployer.grace_period = grace_period
+        try:
+            console.print(f"🚀 Running {len(jobs)} job(s)...")
+            rows = deployer.run_many(jobs, max_workers=max_workers)
+        finally:
+            deployer.cleanup(force=True)
+    finally:
+        discard(temp_dir)
+
+    table = Table(title="Run Summary")
+    table.add_column("#", style="dim")
+    table.add_column("File", style="cyan")
+    table.add_column("Args")
+    table.add_column("Exit", justify="right")
+    table.add_column("Time (s)", justify="right")
+    table.add_column("Log", style="dim")
+    for row in rows:
+        status = "⏱️" if row["timed_out"] else str(row["returncode"])
+        table.add_row(
+            str(row["index"] + 1),
+            row["file"],
+            shlex.join(row["args"]),
+            status if row["error"] is None else "❌",
+            f"{row['duration']:.2f}",
+            row["log_path"] or row["error"] or "",
+        )
+    console.print(table)
+
+    if summary_path:
+        write_summary(rows, summary_path)
+        console.print(f"📝 Summary written to {summary_path}")
+
+    failed = sum(not row["success"] for row in rows)
+    if failed:
+        console.print(f"❌ {failed} of {len(rows)} job(s) failed", style="red")
+        sys.exit(1)
+    console.print(f"✅ All {len(rows)} job(s) succeeded")
+
+
+@main.command()
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed")
+@click.option(
+    "--min-age",
+    type=float,
+    default=GC_MIN_AGE_HOURS,
+    show_default=True,
+    help="Hours before a directory without a lockfile counts as orphaned",
+)
+@click.option(
+    "--max-workers", "-j", type=int, help="Concurrent removals (default: CPU count)"
+)
+def gc(dry_run: bool, min_age: float, max_workers: Optional[int]):
+    """
+    Remove temporary directories left by crashed sessions
+
+    Finds digy_* directories (repositories, venvs, zip extracts and the RAM
+    disk) whose owning process has exited, reports the reclaimable space and
+    removes them.
+    """
+    from rich.table import Table
+
+    from .tempdirs import find_orphans, format_size, remove_orphans
+
+    orphans = find_orphans(
+        min_age=min_age * 3600, with_sizes=True, max_workers=max_workers
+    )
+    if not orphans:
+        console.print("✅ No orphaned temporary directories")
+        return
+
+    table = Table(title="Orphaned Directories")
+    table.add_column("Path", style="cyan")
+    table.add_column("Size", justify="right")
+    table.add_column("Age (h)", justify="right")
+    table.add_column("Reason", style="dim")
+    for orphan in orphans:
+        table.add_row(
+            orphan.path + (" (mounted)" if orphan.mounted else ""),
+            format_size(orphan.size),
+            f"{orphan.age / 3600:.1f}",
+            orphan.reason,
+        )
+    console.print(table)
+
+    total = sum(orphan.size for orphan in orphans)
+    if dry_run:
+        console.print(
+            f"🧹 {format_size(total)} reclaimable in {len(orphans)} director(ies)"
+        )
+        return
+
+    errors = remove_orphans(orphans, max_workers=max_workers)
+    freed = sum(o.size for o, error in zip(orphans, errors) if error is None)
+    for error in filter(None, errors):
+        console.print(f"⚠️  {error}", style="yellow")
+    console.print(f"🧹 Reclaimed {format_size(freed)}")
+    if any(errors):
+        sys.exit(1)
+
+
+@main.command("mem-diff")
+@click.argument("old", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new", type=click.Path(exists=True, dir_okay=False))
+@click.option("--top", "-n", default=20, show_default=True, help="Sites to show")
+def mem_diff(old: str, new: str, top: int):
+    """
+    Compare two memory traces from --trace-memory runs
+
+    OLD and NEW are .memory.json files, e.g. from two runs or from runs on
+    two commits.
+    """
+    from rich.table import Table
+
+    from .memtrace import diff_traces, load_trace
+    from .tempdirs import format_size
+
+    old_trace = load_trace(old)
+    new_trace = load_trace(new)
+
+    for label, trace in (("Old", old_trace), ("New", new_trace)):
+        commit = (trace.get("commit") or "")[:10]
+        console.print(
+            f"{label}: {trace.get('file', '?')}"
+            + (f" @ {commit}" if commit else "")
+            + f", peak {format_size(trace['peak'])}"
+        )
+    delta = new_trace["peak"] - old_trace["peak"]
+    sign = "+" if delta >= 0 else "-"
+    console.print(f"📈 Peak change: {sign}{format_size(abs(delta))}")
+
+    table = Table(title="Largest changes by allocation site")
+    table.add_column("Site", style="cyan")
+    table.add_column("Old", justify="right")
+    table.add_column("New", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("Blocks", justify="right")
+    for change in diff_traces(old_trace, new_trace, limit=top):
+        sign = "+" if change["delta"] >= 0 else "-"
+        table.add_row(
+            change["site"],
+            format_size(change["before"]),
+            format_size(change["after"]),
+            f"{sign}{format_size(abs(change['delta']))}",
+            f"{change['count_delta']:+d}",
+        )
+    console.print(table)
+
+
+@main.group()
+def trace():
+    """Inspect phase traces recorded with --trace or DIGY_TRACE"""
+    pass
+
+
+@trace.command("show")
+@click.argument(
+    "trace_file", required=False, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option("--width", default=40, show_default=True, help="Width of the timeline")
+def show_trace(trace_file: Optional[str], width: int):
+    """
+    Show a trace as a waterfall
+
+    TRACE_FILE is an OpenTelemetry JSON Lines file, by default the most
+    recent trace in the cache.
+    """
+    from rich.markup import escape
+    from rich.table import Table
+
+    from .tracing import build_waterfall, latest_trace_file, read_spans
+
+    trace_file = trace_file or latest_trace_file()
+    if not trace_file:
+        console.print("ℹ️ No traces recorded yet, run a command with 'digy --trace'")
+        return
+
+    rows = build_waterfall(list(read_spans(trace_file)))
+    if not rows:
+        console.print(f"ℹ️ No spans in {trace_file}")
+        return
+
+    total = max(row["start"] + row["duration"] for row in rows) or 1e-9
+    table = Table(title=f"Trace {os.path.basename(trace_file)}")
+    table.add_column("Span", style="cyan", no_wrap=True)
+    table.add_column("Start", justify="right", no_wrap=True)
+    table.add_column("Duration", justify="right", no_wrap=True)
+    table.add_column("Timeline", no_wrap=True)
+    for row in rows:
+        offset = min(int(row["start"] / total * width), width - 1)
+        length = min(max(1, round(row["duration"] / total * width)), width - offset)
+        label = "  " * row["depth"] + row["name"]
+        detail = row["attributes"].get("file") or row["attributes"].get("command")
+        if detail:
+            label += f" [dim]{escape(str(detail))}[/dim]"
+        style = "red" if row["error"] else "green"
+        table.add_row(
+            label,
+            f"{row['start'] * 1000:.0f} ms",
+            f"{row['duration'] * 1000:.1f} ms",
+            " " * offset + f"[{style}]{'█' * length}[/{style}]",
+        )
+    console.print(table)
+    console.print(f"⏱️ Total: {total:.3f}s")
+
+
+@main.command()
+@click.option(
+    "--repo",
+    "repo_url",
+    help="Benchmark this repository instead of a generated fixture",
+)
+@click.option(
+    "--script",
+    default="main.py",
+    show_default=True,
+    help="Script run in each iteration",
+)
+@click.option("--iterations", "-n", default=5, show_default=True, help="Measured runs")
+@click.option("--warmup", default=1, show_default=True, help="Unmeasured runs first")
+@click.option("--files", default=100, show_default=True, help="Modules in the fixture")
+@click.option(
+    "--depth", default=3, show_default=True, help="Directory levels of the fixture"
+)
+@click.option(
+    "--requirements",
+    default=2,
+    show_default=True,
+    help="Local wheels the fixture requires",
+)
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False), help="Write the results as JSON"
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON only")
+def bench(
+    repo_url: Optional[str],
+    script: str,
+    iterations: int,
+    warmup: int,
+    files: int,
+    depth: int,
+    requirements: int,
+    output: Optional[str],
+    as_json: bool,
+):
+    """
+    Benchmark loading, setting up and running a repository
+
+    Builds a fixture repository (a bare Git repository served over file://
+    with local wheels as requirements, so no network is used), runs the whole
+    pipeline in a fresh session per iteration and reports the median and
+    percentiles of each phase.
+    """
+    import json
+
+    from rich.table import Table
+
+    from .bench import run_benchmark
+
+    def progress(done, total):
+        if not as_json:
+            console.print(f"⏱️ Iteration {done}/{total}")
+
+    try:
+        results = run_benchmark(
+            repo_url=repo_url,
+            script=script,
+            iterations=iterations,
+            warmup=warmup,
+            files=files,
+            depth=depth,
+            requirements=requirements,
+            progress=progress,
+        )
+    except RuntimeError as e:
+        console.print(f"❌ Benchmark failed: {e}", style="red")
+        sys.exit(1)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+        return
+
+    table = Table(title=f"Pipeline benchmark ({iterations} iterations)")
+    table.add_column("Phase", style="cyan")
+    for column in ("Median", "p90", "p95", "Min", "Max"):
+        table.add_column(f"{column} (ms)", justify="right")
+    for name, summary in results["phases"].items():
+        table.add_row(
+            name,
+            *(
+                f"{summary[key] * 1000:.1f}"
+                for key in ("median", "p90", "p95", "min", "max")
+            ),
+        )
+    console.print(table)
+    if output:
+        console.print(f"📝 Results written to {output}")
+
+
+@main.command("load-test")
+@click.option("--sessions", "-n", default=10, show_default=True, help="Sessions to run")
+@click.option(
+    "--concurrency", "-c", default=4, show_default=True, help="Sessions running at once"
+)
+@click.option("--repos", default=1, show_default=True, help="Distinct repositories")
+@click.option("--files", default=200, show_default=True, help="Modules per repository")
+@click.option(
+    "--requirements",
+    default=2,
+    show_default=True,
+    help="Wheels each repository requires",
+)
+@click.option(
+    "--session-timeout",
+    type=float,
+    default=600.0,
+    show_default=True,
+    help="Seconds before a session is stopped and counted as failed",
+)
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False), help="Write the report as JSON"
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON only")
+def load_test(
+    sessions: int,
+    concurrency: int,
+    repos: int,
+    files: int,
+    requirements: int,
+    session_timeout: float,
+    output: Optional[str],
+    as_json: bool,
+):
+    """
+    Run many non-interactive sessions at once
+
+    Generates local bare repositories and a wheelhouse, runs SESSIONS
+    'digy run-many' processes with CONCURRENCY at a time and reports
+    throughput, latency percentiles, peak memory and failures.
+    """
+    import json
+
+    from rich.table import Table
+
+    from .loadtest import run_load_test
+    from .synthetic import RepoSpec
+    from .tempdirs import format_size
+
+    def progress(result, total):
+        if not as_json:
+            status = "✅" if result.success else "❌"
+            console.print(
+                f"{status} Session {result.index + 1}/{total}: {result.latency:.2f}s"
+            )
+
+    report = run_load_test(
+        sessions=sessions,
+        concurrency=concurrency,
+        repos=repos,
+        spec=RepoSpec(files=files, requirements=requirements),
+        timeout=session_timeout,
+        progress=progress,
+    )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        console.print(
+            f"🚀 {report['sessions']} sessions, {report['concurrency']} at a time: "
+            f"{report['throughput']:.2f} sessions/s over {report['elapsed']:.1f}s"
+        )
+        console.print(
+            f"🧠 Peak memory of all sessions: {format_size(report['peak_rss'])}"
+        )
+
+        table = Table(title="Latency (s)")
+        table.add_column("Measure", style="cyan")
+        for column in ("Median", "p90", "p95", "p99", "Max"):
+            table.add_column(column, justify="right")
+        rows = [("session", report["latency"])] + list(report["phases"].items())
+        for name, summary in rows:
+            if summary.get("count"):
+                table.add_row(
+                    name,
+                    *(
+                        f"{summary[key]:.3f}"
+                        for key in ("median", "p90", "p95", "p99", "max")
+                    ),
+                )
+        console.print(table)
+        for failed in report["failed_sessions"]:
+            reason = (
+                "timed out" if failed["timed_out"] else f"exit {failed['returncode']}"
+            )
+            console.print(f"❌ Session {failed['index'] + 1} ({reason}):", style="red")
+            console.print(failed["error"] or "", style="dim", markup=False)
+        if output:
+            console.print(f"📝 Report written to {output}")
+    if report["failures"]:
+        sys.exit(1)
+
+
+@main.command("synth-repo")
+@click.argument("path", type=click.Path(exists=False))
+@click.option("--files", default=1000, show_default=True, help="Python modules")
+@click.option("--depth", default=3, show_default=True, help="Directory levels")
+@click.option(
+    "--fanout", default=4, show_default=True, help="Subdirectories per directory"
+)
+@click.option("--binaries", default=0, show_default=True, help="Binary files")
+@click.option(
+    "--binary-size", default=1024, show_default=True, help="KiB per binary file"
+)
+@click.option(
+    "--requirements", default=0, show_default=True, help="Local wheels to require"
+)
+@click.option("--commits", default=1, show_default=True, help="Commits in the history")
+@click.option(
+    "--changes", default=10, show_default=True, help="Modules changed per later commit"
+)
+@click.option("--seed", default=0, show_default=True, help="Seed for the content")
+@click.option(
+    "--checkout",
+    type=click.Path(exists=False),
+    help="Also clone the repository into this working tree",
+)
+def synth_repo(
+    path: str,
+    files: int,
+    depth: int,
+    fanout: int,
+    binaries: int,
+    binary_size: int,
+    requirements: int,
+    commits: int,
+    changes: int,
+    seed: int,
+    checkout: Optional[str],
+):
+    """
+    Generate a synthetic repository for scale testing
+
+    Creates a bare Git repository at PATH. The same options always give the
+    same commits, and requirements are wheels committed to the repository,
+    so loading and setting it up needs no network.
+    """
+    from .synthetic import RepoSpec, checkout_repo, generate_repo
+
+    if os.path.exists(path):
+        console.print(f"❌ {path} already exists", style="red")
+        sys.exit(1)
+
+    spec = RepoSpec(
+        files=files,
+        depth=depth,
+        fanout=fanout,
+        binaries=binaries,
+        binary_size=binary_size * 1024,
+        requirements=requirements,
+        commits=commits,
+        changes=changes,
+        seed=seed,
+    )
+    try:
+        counts = generate_repo(path, spec)
+        if checkout:
+            checkout_repo(os.path.abspath(path), checkout)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        console.print(f"❌ Failed to generate repository: {e}", style="red")
+        sys.exit(1)
+    console.print(
+        f"✅ Generated {counts['files']} files in {counts['commits']} commit(s) "
+        f"in {counts['seconds']:.1f}s: file://{os.path.abspath(path)}"
+    )
+    if checkout:
+        console.print(f"📂 Working tree: {checkout}")
+
+
+@main.command()
+@click.argument("repo_url")
+@click.argument("script")
+@click.argument("script_args", nargs=-1, type=click.UNPROCESSED)
+@click.option("--base", required=True, help="Ref to compare against")
+@click.option("--head", required=True, help="Ref being measured")
+@click.option(
+    "-n",
+    "--iterations",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Measured runs per ref",
+)
+@click.option(
+    "--warmup", default=1, show_default=True, help="Unmeasured runs per ref first"
+)
+@click.option(
+    "--confidence",
+    type=click.FloatRange(0, 1, min_open=True, max_open=True),
+    default=0.95,
+    show_default=True,
+    help="Confidence level of the intervals",
+)
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False), help="Write the report as JSON"
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+def compare(
+    repo_url: str,
+    script: str,
+    script_args: tuple,
+    base: str,
+    head: str,
+    iterations: int,
+    warmup: int,
+    confidence: float,
+    output: Optional[str],
+    as_json: bool,
+):
+    """
+    Compare the performance of a script at two commits
+
+    Checks out both refs as cached worktrees with cached virtual
+    environments (shared when their requirements match), runs the script
+    alternately at each ref and reports the change in median wall time, CPU
+    time and peak RSS with bootstrap confidence intervals.
+    """
+    import json
+
+    from rich.table import Table
+
+    from .compare import run_comparison
+    from .tempdirs import format_size
+
+    def progress(done, total):
+        if not as_json:
+            console.print(f"⏱️ Pair {done}/{total}")
+
+    try:
+        report = run_comparison(
+            repo_url,
+            script,
+            base=base,
+            head=head,
+            iterations=iterations,
+            warmup=warmup,
+            args=list(script_args),
+            confidence=confidence,
+            progress=progress,
+        )
+    except RuntimeError as e:
+        console.print(f"❌ Comparison failed: {e}", style="red")
+        sys.exit(1)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    console.print(
+        f"🔀 {script}: {base} ({report['base']['commit'][:10]}) vs "
+        f"{head} ({report['head']['commit'][:10]}), {iterations} runs each"
+        + (", shared environment" if report["shared_environment"] else "")
+    )
+    labels = {"wall": "Wall time", "cpu": "CPU time", "rss": "Peak RSS"}
+    table = Table(title=f"Median change ({confidence:.0%} confidence interval)")
+    table.add_column("Metric", style="cyan")
+    for column in ("Base", "Head", "Change", "Interval", "Verdict"):
+        table.add_column(column, justify="left" if column == "Verdict" else "right")
+    for metric, result in report["metrics"].items():
+        if metric == "rss":
+            def value(v):
+                return format_size(int(abs(v)))
+        else:
+            def value(v):
+                return f"{abs(v):.3f}s"
+        if result["change"] is None:
+            change, interval = "-", "-"
+        else:
+            low, high = result["change_ci"]
+            change = f"{result['change']:+.1%}"
+            interval = f"{low:+.1%}..{high:+.1%}"
+        if not result["significant"]:
+            verdict = "no change"
+        elif result["delta"] > 0:
+            verdict = "[red]worse[/red]"
+        else:
+            verdict = "[green]better[/green]"
+        table.add_row(
+            labels[metric],
+            value(result["base"]["median"]),
+            value(result["head"]["median"]),
+            change,
+            interval,
+            verdict,
+        )
+    console.print(table)
+    if output:
+        console.print(f"📝 Report written to {output}")
+
+
+@main.command()
+@click.argument("repo_url")
+@click.argument("script")
+@click.argument("script_args", nargs=-1, type=click.UNPROCESSED)
+@click.option("--branch", "-b", default="main", help="Git branch to checkout")
+@click.option(
+    "--top", "-n", default=20, show_default=True, help="Hot functions to show"
+)
+@click.option(
+    "--sort",
+    type=click.Choice(PROFILE_SORT_KEYS),
+    default="cumulative",
+    show_default=True,
+    help="Order of the hot functions",
+)
+@click.option("--interval", type=float, help="Seconds between stack samples")
+def profile(
+    repo_url: str,
+    script: str,
+    script_args: tuple,
+    branch: str,
+    top: int,
+    sort: str,
+    interval: Optional[float],
+):
+    """
+    Run a script from a repository under the profiler
+
+    Saves a .pstats file and collapsed stacks (for flamegraph.pl or
+    speedscope) in the session output directory and prints the hottest
+    functions.
+    """
+    from .deployer import Deployer
+    from .interactive import show_profile
+    from .trash import discard
+
+    temp_dir, repo_path = load_repository(repo_url, branch)
+    try:
+        if not repo_path:
+            console.print("❌ Failed to load repository", style="red")
+            sys.exit(1)
+
+        deployer = Deployer(repo_path)
+        try:
+            result, paths = deployer.profile_python_file(
+                script, list(script_args), interval=interval
+            )
+        except (RuntimeError, FileNotFoundError) as e:
+            console.print(f"❌ {e}", style="red")
+            sys.exit(1)
+        finally:
+            deployer.cleanup(force=True)
+    finally:
+        discard(temp_dir)
+
+    if os.path.exists(paths["pstats"]):
+        show_profile(paths["pstats"], limit=top, sort=sort)
+    console.print(f"📝 Profile: {paths['pstats']}")
+    console.print(f"🔥 Collapsed stacks: {paths['collapsed']}")
+    if not result.success:
+        console.print("❌ Execution failed", style="red")
+        sys.exit(1)
+
+
 @main.command()
 @click.argument("path", nargs=-1, type=click.UNPROCESSED)
 @click.option("--branch", "-b", default="main", help="Git branch to checkout")
@@ -406,6 +1383,9 @@ def docker(
 
     PATH: Path to repository and Python file (e.g., examples/basic/hello_world.py)
     """
+    from .environment import EnvironmentManager
+    from .loader import digy
+
     if len(path) < 1:
         console.print("❌ Error: Path to Python file is required")
         sys.exit(1)
@@ -434,98 +1414,12 @@ def docker(
     # Call the digy function with the correct arguments
     return digy(repo_url, branch)
 
-    # Set up environment manager
-    env_manager = EnvironmentManager(
-        env_type=env_type,
-        venv_path=venv_path,
-        docker_image=docker_image,
-        remote_host=remote_host,
-    )
-
-    # Handle authentication if needed
-    if ctx.obj.get("auth_type"):
-        auth_provider = get_auth_provider(
-            ctx.obj["auth_type"], config_file=ctx.obj.get("auth_config")
-        )
-        if auth_provider and not auth_provider.authenticate():
-            console.print("[red]Authentication failed[/red]")
-            sys.exit(1)
-
-    # Create a temporary directory for the repository
-    temp_dir = tempfile.mkdtemp(prefix="digy_")
-    try:
-        console.print(f"📦 Cloning repository: {repo_url}")
-
-        # Clone the repository
-        repo_name = os.path.splitext(os.path.basename(repo_url))[0]
-        repo_path = os.path.join(temp_dir, repo_name)
-
-        # Handle different repository URL formats
-        if not any(
-            repo_url.startswith(proto) for proto in ["http://", "https://", "git@"]
-        ):
-            repo_url = f"https://{repo_url}"
-        if not repo_url.endswith(".git"):
-            repo_url += ".git"
-
-        # Clone the repository
-        try:
-            repo = git.Repo.clone_from(repo_url, repo_path, branch=branch)
-            console.print(f"✅ Cloned {branch} branch to {repo_path}")
-        except git.GitCommandError as e:
-            console.print(f"[red]Failed to clone repository: {e}[/red]")
-            sys.exit(1)
-
-        # Check if the Python file exists
-        python_file_path = os.path.join(repo_path, python_file)
-        if not os.path.exists(python_file_path):
-            console.print(f"[red]Python file not found: {python_file}[/red]")
-            sys.exit(1)
-
-        # Handle file attachments
-        files_to_attach = list(attachments)
-        if interactive_attach:
-            console.print("\n[bold]Select files to attach:[/]")
-            interactive_files = select_files_interactive()
-            files_to_attach.extend(interactive_files)
-
-        if files_to_attach:
-            attach_dir = os.path.join(repo_path, ".digy_attachments")
-            os.makedirs(attach_dir, exist_ok=True)
-            attached = attach_files(files_to_attach, attach_dir)
-            console.print(f"\n📎 Attached {len(attached)} file(s) to {attach_dir}")
-
-        # Create a deployer instance
-        deployer = Deployer(repo_path)
-
-        # Execute the Python file with the environment manager
-        if env_manager.env_type == "local":
-            # For local execution, use the deployer directly
-            result = deployer.execute_python_file(python_file, list(args))
-        else:
-            # For other environments, use the environment manager
-            cmd = [sys.executable, python_file] + list(args)
-            result = env_manager.execute_command(cmd, cwd=repo_path)
-
-        if result.returncode == 0:
-            console.print("✅ Execution completed successfully")
-        else:
-            console.print(f"❌ Execution failed with code {result.returncode}")
-
-    except Exception as e:
-        console.print(f"[red]Error: {str(e)}[/red]")
-        import traceback
-
-        traceback.print_exc()
-        sys.exit(1)
-    finally:
-        # Clean up the temporary directory
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
 
 @main.command()
 def examples():
     """Show usage examples"""
+    from rich.panel import Panel
+
     examples = """
     [bold]Basic usage:[/bold]
     $ digy start github.com/pyfunc/digy
@@ -544,6 +1438,8 @@ def examples():
 @main.command()
 def info():
     """Show information about DIGY"""
+    from rich.panel import Panel
+
     info_text = f"""
     [bold]DIGY - Dynamic Interactive Git deploY[/bold]
     Version: {__version__}
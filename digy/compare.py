@@ -0,0 +1,352 @@
+"""
+A/B comparison for DIGY
+Runs a script at two commits of a repository and reports the differences in
+wall time, CPU time and peak RSS with confidence intervals
+
+Both commits are checked out as worktrees of a bare mirror kept in the
+cache, so comparing again only fetches new commits and checks out commits
+not seen before. Virtual environments are cached next to them, keyed by the
+requirements files, so commits with the same requirements share one and
+later comparisons reuse it. Runs alternate between the commits (ABBA order)
+so that drift in the machine's load affects both alike.
+"""
+
+import contextlib
+import hashlib
+import os
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .cache import get_cache_dir
+from .stats import bootstrap_ci, summarize
+from .version import __version__
+
+# Measurements taken from each run
+METRICS = ("wall", "cpu", "rss")
+
+SIDES = ("base", "head")
+
+# Written into a cached venv once it is completely set up
+VENV_READY = ".digy-compare-ready"
+
+# Cached venvs kept per repository, the least recently used are removed
+MAX_CACHED_VENVS = 4
+
+
+def _git(*args: str, cwd: Optional[str] = None) -> str:
+    """Run a git command and return its output"""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def clone_url(repo_url: str) -> str:
+    """URL git clones a repository from; local paths are made absolute"""
+    if os.path.isdir(repo_url):
+        return os.path.abspath(repo_url)
+    if "://" in repo_url or repo_url.startswith("git@"):
+        return repo_url
+    return f"https://{repo_url}"
+
+
+def repo_cache_dir(repo_url: str) -> str:
+    """Cache directory holding a repository's mirror and worktrees"""
+    key = hashlib.sha256(clone_url(repo_url).encode()).hexdigest()[:16]
+    return get_cache_dir("compare", key)
+
+
+def update_mirror(repo_url: str) -> str:
+    """Clone a bare mirror of a repository into the cache, or fetch into it
+
+    Returns:
+        Path of the mirror
+    """
+    mirror = os.path.join(repo_cache_dir(repo_url), "mirror.git")
+    if os.path.isdir(mirror):
+        _git("fetch", "--quiet", "--prune", "origin", cwd=mirror)
+        return mirror
+    staging = f"{mirror}.{os.getpid()}.tmp"
+    _git("clone", "--quiet", "--mirror", clone_url(repo_url), staging)
+    try:
+        os.rename(staging, mirror)
+    except OSError:
+        # Another session finished cloning first
+        from .trash import discard
+
+        discard(staging)
+    return mirror
+
+
+def resolve_ref(mirror: str, ref: str) -> str:
+    """Get the commit a branch, tag or commit-ish names"""
+    try:
+        return _git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", cwd=mirror)
+    except RuntimeError:
+        raise RuntimeError(f"Unknown ref: {ref}") from None
+
+
+def ensure_worktree(mirror: str, commit: str) -> str:
+    """Get a detached worktree of a commit, checking it out on first use
+
+    Returns:
+        Path of the worktree
+    """
+    path = os.path.join(os.path.dirname(mirror), "trees", commit)
+    if os.path.isdir(path):
+        try:
+            if _git("rev-parse", "HEAD", cwd=path) == commit:
+                return path
+        except RuntimeError:
+            pass
+        from .trash import discard
+
+        discard(path)
+    # Forget worktrees whose directories were removed
+    _git("worktree", "prune", cwd=mirror)
+    _git("worktree", "add", "--quiet", "--force", "--detach", path, commit, cwd=mirror)
+    return path
+
+
+def requirements_fingerprint(deployer) -> Optional[str]:
+    """Hash of a checkout's requirements files
+
+    Returns:
+        Hex digest, or None if the checkout is installed into its venv as a
+        package, which ties the venv to that checkout
+    """
+    if deployer.setup_files:
+        return None
+    digest = hashlib.sha256()
+    for path in sorted(deployer.requirements_files):
+        digest.update(path.encode() + b"\0")
+        with open(os.path.join(deployer.repo_path, path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def _exclusive(lock_path: str):
+    """Hold an exclusive lock on ``lock_path`` across sessions (POSIX only)"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def prepare_cached_venv(deployer, mirror: str, fingerprint: str) -> bool:
+    """Point a checkout at the cached venv for its requirements
+
+    The venv is set up on first use and reused by later comparisons; only
+    the ``MAX_CACHED_VENVS`` most recently used ones are kept. Setting up
+    and pruning hold a lock on the repository's venvs, so concurrent
+    comparisons wait for each other, and the venv is claimed until
+    ``tempdirs.release`` so that others do not prune it while it is used.
+
+    Returns:
+        False if the venv could not be set up
+    """
+    from .tempdirs import claim, lock_owners
+    from .trash import discard
+
+    venvs = os.path.join(os.path.dirname(mirror), "venvs")
+    path = os.path.join(venvs, fingerprint[:16])
+    ready = os.path.join(path, VENV_READY)
+    with _exclusive(f"{venvs}.lock"):
+        if os.path.exists(ready):
+            os.utime(ready)
+            deployer.venv_path = path
+        else:
+            if os.path.exists(path):
+                # Left behind by a comparison that did not finish setting it up
+                discard(path)
+            if not deployer.setup_environment(path):
+                return False
+            if deployer.precompile_process is not None:
+                deployer.precompile_process.wait()
+            with open(ready, "w"):
+                pass
+        claim(path)
+
+        used = []
+        for name in os.listdir(venvs):
+            try:
+                stamp = os.stat(os.path.join(venvs, name, VENV_READY)).st_mtime
+            except OSError:
+                continue
+            used.append((stamp, name))
+        for _, name in sorted(used, reverse=True)[MAX_CACHED_VENVS:]:
+            try:
+                if lock_owners(os.path.join(venvs, name)):
+                    continue
+            except OSError:
+                continue
+            discard(os.path.join(venvs, name))
+    return True
+
+
+def run_metrics(result) -> Dict[str, float]:
+    """Wall time, CPU time (user + system) and peak RSS of a run"""
+    usage = result.resources
+    if usage is None:
+        return {"wall": result.duration, "cpu": 0.0, "rss": 0}
+    return {
+        "wall": result.duration,
+        "cpu": usage.user_time + usage.system_time,
+        "rss": max(usage.max_rss, usage.tree_peak_rss),
+    }
+
+
+def compare_samples(
+    base: List[Dict[str, float]],
+    head: List[Dict[str, float]],
+    confidence: float = 0.95,
+) -> Dict[str, Dict[str, Any]]:
+    """Compare per-run metrics of the two commits
+
+    Returns:
+        Per metric: summaries of both sides, the difference in medians, the
+        relative change, the confidence interval of the difference (absolute
+        and relative to the base median) and whether it excludes zero
+    """
+    comparison = {}
+    for metric in METRICS:
+        base_values = [sample[metric] for sample in base]
+        head_values = [sample[metric] for sample in head]
+        base_summary = summarize(base_values)
+        head_summary = summarize(head_values)
+        delta = head_summary["median"] - base_summary["median"]
+        low, high = bootstrap_ci(base_values, head_values, confidence)
+        reference = base_summary["median"]
+        comparison[metric] = {
+            "base": base_summary,
+            "head": head_summary,
+            "delta": delta,
+            "change": delta / reference if reference else None,
+            "ci": [low, high],
+            "change_ci": [low / reference, high / reference] if reference else None,
+            "significant": low > 0 or high < 0,
+        }
+    return comparison
+
+
+def run_comparison(
+    repo_url: str,
+    script: str,
+    base: str,
+    head: str,
+    iterations: int = 10,
+    warmup: int = 1,
+    args: Optional[List[str]] = None,
+    confidence: float = 0.95,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """Run a script alternately at two commits and compare the runs
+
+    Args:
+        repo_url: Repository URL or local path
+        script: Script to run, relative to the repository
+        base: Ref to compare against
+        head: Ref being measured
+        iterations: Measured runs per commit
+        warmup: Unmeasured runs per commit first, e.g. to fill bytecode caches
+        args: Arguments passed to the script
+        confidence: Confidence level of the intervals
+        progress: Called with (iteration, iterations) after each measured pair
+
+    Returns:
+        Parameters, both commits, whether the venv was shared, per-run
+        samples and the per-metric comparison
+
+    Raises:
+        RuntimeError: If a ref is unknown, both refs name the same commit,
+            or setting up or running the script fails
+    """
+    from .bench import quiet_consoles
+    from .deployer import Deployer
+    from .tempdirs import release
+
+    if iterations < 1:
+        raise ValueError("iterations must be at least 1")
+    mirror = update_mirror(repo_url)
+    refs = {"base": base, "head": head}
+    commits = {side: resolve_ref(mirror, refs[side]) for side in SIDES}
+    if commits["base"] == commits["head"]:
+        raise RuntimeError(
+            f"{base} and {head} are the same commit ({commits['base'][:10]})"
+        )
+    deployers: Dict[str, Any] = {}
+    shared = False
+    cached = set()
+    samples: Dict[str, List[Dict[str, float]]] = {side: [] for side in SIDES}
+    with quiet_consoles():
+        try:
+            for side in SIDES:
+                deployers[side] = Deployer(ensure_worktree(mirror, commits[side]))
+            fingerprints = {
+                side: requirements_fingerprint(deployers[side]) for side in SIDES
+            }
+            shared = fingerprints["base"] is not None and (
+                fingerprints["base"] == fingerprints["head"]
+            )
+            for side in SIDES:
+                deployer = deployers[side]
+                if fingerprints[side] is None:
+                    ready = deployer.setup_environment()
+                else:
+                    ready = prepare_cached_venv(deployer, mirror, fingerprints[side])
+                    if ready:
+                        cached.add(side)
+                if not ready:
+                    raise RuntimeError(f"Failed to set up environment for {side}")
+                # Background compilation would compete with measured runs
+                if deployer.precompile_process is not None:
+                    deployer.precompile_process.wait()
+                if not os.path.exists(os.path.join(deployer.repo_path, script)):
+                    raise RuntimeError(f"{script} not found at {side} ({refs[side]})")
+                deployer.stream_output = False
+
+            for i in range(warmup + iterations):
+                # ABBA order: each side goes first in every other pair
+                for side in SIDES if i % 2 == 0 else SIDES[::-1]:
+                    result = deployers[side].run_file(script, args)
+                    if not result.success:
+                        raise RuntimeError(
+                            f"{script} at {side} exited with {result.returncode}, "
+                            f"see {result.log_path}"
+                        )
+                    if i >= warmup:
+                        samples[side].append(run_metrics(result))
+                if progress and i >= warmup:
+                    progress(i - warmup + 1, iterations)
+        finally:
+            for side, deployer in deployers.items():
+                if side in cached:
+                    # Kept for later comparisons
+                    release(deployer.venv_path)
+                    deployer.venv_path = None
+                deployer.cleanup(force=True)
+
+    return {
+        "digy_version": __version__,
+        "timestamp": time.time(),
+        "repo": repo_url,
+        "script": script,
+        "args": list(args or []),
+        "iterations": iterations,
+        "warmup": warmup,
+        "confidence": confidence,
+        "base": {"ref": base, "commit": commits["base"]},
+        "head": {"ref": head, "commit": commits["head"]},
+        "shared_environment": shared,
+        "samples": samples,
+        "metrics": compare_samples(samples["base"], samples["head"], confidence),
+    }
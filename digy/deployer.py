@@ -3,22 +3,75 @@ Application deployer for DIGY
 Handles Python application deployment in isolated environments
 """
 
+import bisect
+import contextvars
 import json
 import os
 import shutil
+import sqlite3
 import subprocess
 import sys
-import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import psutil
+import yaml
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.syntax import Syntax
 
+from . import memtrace, profiler
+from .analyzer import FileAnalyzer
+from .cache import ensure_pip_bootstrap, get_cache_dir
+from .graph import ImportGraph
+from .history import RunHistory, current_command, history_enabled
+from .importtime import ImportNode, load_profiles, parse_importtime, save_profile
+from .indexer import (
+    KIND_PYTHON,
+    KIND_REQUIREMENTS,
+    KIND_SETUP,
+    PERSIST_MIN_FILES,
+    RepoIndex,
+    classify,
+    is_python_setup,
+)
+from .project import (
+    get_console_scripts,
+    get_declared_dependencies,
+    get_repo_identity,
+    get_source_roots,
+    has_compiled_extensions,
+)
+from .runner import (
+    DEFAULT_BUFFER_BYTES,
+    DEFAULT_GRACE_PERIOD,
+    RunResult,
+    popen_launcher,
+    stream_process,
+    terminate_tree,
+)
+from .tempdirs import make_temp_dir, release
+from .tracing import span
+from .trash import discard
+from .watcher import IndexWatcher
+from .zygote import Zygote, ZygoteError
+
 console = Console()
 
+# Seconds a script may run before its process tree is stopped
+DEFAULT_TIMEOUT = 300.0
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "manifest.yml")
+
+PIP_LAUNCHER = """#!{python}
+import sys
+from pip._internal.cli.main import main
+sys.exit(main())
+"""
+
 
 class Deployer:
     """Deploys Python applications in isolated virtual environments"""
@@ -26,59 +79,160 @@ class Deployer:
     def __init__(self, repo_path: str):
         self.repo_path = repo_path
         self.venv_path: Optional[str] = None
+        self.index: Optional[RepoIndex] = None
+        self.analyzer: Optional[FileAnalyzer] = None
+        self._graph: Optional[ImportGraph] = None
+        self._graph_lock = threading.Lock()
+        self.watcher: Optional[IndexWatcher] = None
+        self.precompile_process: Optional[subprocess.Popen] = None
+        self.output_dir: Optional[str] = None
+        self.stream_output = True
+        self.last_run: Optional[RunResult] = None
+        self.zygote: Optional[Zygote] = None
+        self.history: Optional[RunHistory] = None
+        self._identity: Optional[Dict[str, Optional[str]]] = None
+        self.timeout: Optional[float] = None
+        self.grace_period: Optional[float] = None
+        self.trace_memory: Optional[bool] = None
+        self._hook_lock = threading.Lock()
+        self._run_config: Optional[Dict[str, Any]] = None
+        # Every process this Deployer started, by PID: (kind, handle)
+        self.children: Dict[int, Tuple[str, Any]] = {}
+        self._children_lock = threading.Lock()
+        # Serializes updates of the file lists, which the watcher also applies
+        self._files_lock = threading.Lock()
         self.python_files = []
         self.requirements_files = []
         self.setup_files = []
         self.discover_files()
 
     def discover_files(self):
-        """Discover Python files and configuration files in repository"""
-        for root, dirs, files in os.walk(self.repo_path):
-            # Skip hidden directories and common build directories
-            dirs[:] = [
-                d
-                for d in dirs
-                if not d.startswith(".")
-                and d not in ["__pycache__", "build", "dist", "node_modules"]
-            ]
+        """Discover Python files and configuration files in repository
+
+        Uses the persisted repository index when available, so re-opening a
+        large repository only rescans directories that changed.
+        """
+        with span("discover_files", repo=self.repo_path) as s:
+            self.index = RepoIndex.load_or_build(self.repo_path)
+            self._sync_file_lists()
+            s.set_attribute("python_files", len(self.python_files))
+
+    def _sync_file_lists(self):
+        """Rebuild the file lists from the index"""
+        with self._files_lock:
+            self._graph = None
+            if self.analyzer is not None:
+                self.analyzer.forget()
+            self.python_files = self.index.files_of_kind(KIND_PYTHON)
+            self.requirements_files = self.index.files_of_kind(KIND_REQUIREMENTS)
+            self.setup_files = self.index.files_of_kind(KIND_SETUP)
+
+    def _file_lists_for(self, path: str) -> List[str]:
+        """Get the names of the file list attributes that track a path"""
+        lists = {
+            KIND_PYTHON: "python_files",
+            KIND_REQUIREMENTS: "requirements_files",
+            KIND_SETUP: "setup_files",
+        }
+        kind = classify(os.path.basename(path))
+        tracking = [lists[kind]] if kind in lists else []
+        if is_python_setup(path, kind):
+            tracking.append("python_files")
+        return tracking
+
+    def apply_index_changes(
+        self,
+        added: Optional[List[str]],
+        removed: Optional[List[str]],
+        changed: Optional[List[str]] = None,
+    ):
+        """Apply incremental index changes to the sorted file lists
+
+        Called from the watcher thread. Readers iterate the lists without a
+        lock, so changed lists are replaced with updated copies rather than
+        modified in place.
 
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, self.repo_path)
-
-                if file.endswith(".py"):
-                    self.python_files.append(rel_path)
-                elif file in [
-                    "requirements.txt",
-                    "requirements-dev.txt",
-                    "requirements-test.txt",
-                ]:
-                    self.requirements_files.append(rel_path)
-                elif file in ["setup.py", "setup.cfg", "pyproject.toml"]:
-                    self.setup_files.append(rel_path)
-
-    def create_virtual_environment(self) -> bool:
-        """Create a new virtual environment"""
+        Args:
+            added: Newly indexed file paths, or None to resync everything
+            removed: File paths dropped from the index
+            changed: Indexed file paths whose contents changed
+        """
+        if added is None or removed is None:
+            self._sync_file_lists()
+            return
+
+        with self._files_lock:
+            self._graph = None
+            if self.analyzer is not None:
+                self.analyzer.forget(removed + (changed or []))
+            updated: Dict[str, List[str]] = {}
+            for path in removed:
+                for name in self._file_lists_for(path):
+                    files = updated.setdefault(name, list(getattr(self, name)))
+                    i = bisect.bisect_left(files, path)
+                    if i < len(files) and files[i] == path:
+                        del files[i]
+            for path in added:
+                for name in self._file_lists_for(path):
+                    files = updated.setdefault(name, list(getattr(self, name)))
+                    i = bisect.bisect_left(files, path)
+                    if i == len(files) or files[i] != path:
+                        files.insert(i, path)
+            for name, files in updated.items():
+                setattr(self, name, files)
+
+    def start_watching(self):
+        """Keep the file lists current while the session is open"""
+        if self.watcher is not None or self.index is None:
+            return
+        if os.getenv("DIGY_WATCH", "true").lower() != "true":
+            return
+        self.watcher = IndexWatcher(self.index, on_change=self.apply_index_changes)
+        self.watcher.start()
+
+    def stop_watching(self):
+        """Stop the file watcher and persist the updated index"""
+        if self.watcher is None:
+            return
+        self.watcher.stop()
+        self.watcher = None
+        if len(self.index) >= PERSIST_MIN_FILES:
+            try:
+                self.index.save()
+            except OSError:
+                pass
+
+    def create_virtual_environment(self, venv_path: Optional[str] = None) -> bool:
+        """Create a new virtual environment
+
+        Args:
+            venv_path: Where to create it, defaults to a new temporary directory
+        """
         try:
-            self.venv_path = tempfile.mkdtemp(prefix="digy_venv_")
+            self.venv_path = venv_path or make_temp_dir("digy_venv_")
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 console=console,
             ) as progress:
                 task = progress.add_task("Creating virtual environment...", total=None)
+                # Skip ensurepip when a cached pip bootstrap can be linked in
+                bootstrap = self._get_pip_bootstrap()
+                cmd = [sys.executable, "-m", "venv", self.venv_path]
+                if bootstrap:
+                    cmd.insert(3, "--without-pip")
                 # Use subprocess to create virtualenv
-                result = subprocess.run(
-                    [sys.executable, "-m", "venv", self.venv_path],
-                    capture_output=True,
-                    text=True,
-                )
+                with span("venv", pip_bootstrap=bool(bootstrap)) as s:
+                    result = subprocess.run(cmd, capture_output=True, text=True)
+                    s.set_attribute("returncode", result.returncode)
                 if result.returncode != 0:
                     console.print(
                         f"❌ Failed to create virtual environment: {result.stderr}"
                     )
                     self.cleanup(force=True)
                     return False
+                if bootstrap:
+                    self._link_pip_bootstrap(bootstrap)
                 progress.update(task, description="✅ Virtual environment created")
             console.print(f"🐍 Virtual environment: {self.venv_path}")
             return True
@@ -91,6 +245,41 @@ class Deployer:
             self.cleanup(force=True)
             return False
 
+    def _get_pip_bootstrap(self) -> Optional[str]:
+        """Get the cached pip bootstrap directory if the fast path is enabled"""
+        if os.name == "nt":
+            return None
+        if os.getenv("DIGY_FAST_VENV", "true").lower() != "true":
+            return None
+        return ensure_pip_bootstrap()
+
+    def _get_site_packages(self) -> str:
+        """Get site-packages path in virtual environment"""
+        if os.name == "nt":  # Windows
+            return os.path.join(self.venv_path, "Lib", "site-packages")
+        version = f"python{sys.version_info.major}.{sys.version_info.minor}"
+        return os.path.join(self.venv_path, "lib", version, "site-packages")
+
+    def _link_pip_bootstrap(self, bootstrap: str):
+        """Make the shared pip bootstrap importable from the virtual environment
+
+        Packages installed later still go to the venv's own site-packages,
+        which precedes ``.pth`` entries on ``sys.path``.
+        """
+        site_packages = self._get_site_packages()
+        os.makedirs(site_packages, exist_ok=True)
+        with open(os.path.join(site_packages, "_digy_pip_bootstrap.pth"), "w") as f:
+            f.write(bootstrap + "\n")
+
+        bin_dir = os.path.dirname(self.get_python_executable())
+        os.makedirs(bin_dir, exist_ok=True)
+        launcher = PIP_LAUNCHER.format(python=self.get_python_executable())
+        for name in ("pip", "pip3"):
+            script = os.path.join(bin_dir, name)
+            with open(script, "w") as f:
+                f.write(launcher)
+            os.chmod(script, 0o755)
+
     def get_python_executable(self) -> str:
         """Get Python executable path in virtual environment"""
         if os.name == "nt":  # Windows
@@ -105,6 +294,18 @@ class Deployer:
         else:  # Unix/Linux/macOS
             return os.path.join(self.venv_path, "bin", "pip")
 
+    def _run_pip(self, pip_args: List[str]) -> subprocess.CompletedProcess:
+        """Run one pip command in the venv inside a trace span"""
+        with span("pip", command=" ".join(pip_args)) as s:
+            result = subprocess.run(
+                [self.get_pip_executable()] + pip_args,
+                capture_output=True,
+                text=True,
+                cwd=self.repo_path,
+            )
+            s.set_attribute("returncode", result.returncode)
+            return result
+
     def install_requirements(self) -> bool:
         """Install requirements in virtual environment"""
         if not self.requirements_files:
@@ -112,18 +313,11 @@ class Deployer:
             return True
 
         try:
-            pip_executable = self.get_pip_executable()
-
             for req_file in self.requirements_files:
                 req_path = os.path.join(self.repo_path, req_file)
                 console.print(f"📦 Installing requirements from: {req_file}")
 
-                result = subprocess.run(
-                    [pip_executable, "install", "-r", req_path],
-                    capture_output=True,
-                    text=True,
-                    cwd=self.repo_path,
-                )
+                result = self._run_pip(["install", "-r", req_path])
 
                 if result.returncode != 0:
                     console.print(f"❌ Failed to install {req_file}:")
@@ -143,16 +337,15 @@ class Deployer:
         if not self.setup_files:
             return True
 
-        try:
-            pip_executable = self.get_pip_executable()
+        if (
+            os.getenv("DIGY_FAST_EDITABLE", "false").lower() == "true"
+            and self.install_package_fast()
+        ):
+            return True
 
+        try:
             console.print("📦 Installing package in development mode...")
-            result = subprocess.run(
-                [pip_executable, "install", "-e", "."],
-                capture_output=True,
-                text=True,
-                cwd=self.repo_path,
-            )
+            result = self._run_pip(["install", "-e", "."])
 
             if result.returncode != 0:
                 console.print("❌ Failed to install package:")
@@ -167,12 +360,68 @@ class Deployer:
             console.print(f"❌ Error installing package: {e}")
             return False
 
+    def install_package_fast(self) -> bool:
+        """Install package in development mode without a pip build
+
+        Adds the repository's source roots to the venv through a ``.pth``
+        file and installs only the declared dependencies. Console scripts
+        and package metadata are not generated.
+
+        Returns:
+            bool: True if installed, False if pip install -e is needed
+        """
+        if has_compiled_extensions(self.repo_path):
+            console.print("ℹ️ Compiled extensions detected, using pip build")
+            return False
+
+        dependencies = get_declared_dependencies(self.repo_path)
+        if dependencies is None:
+            console.print(
+                "ℹ️ Dependencies are not declared statically, using pip build"
+            )
+            return False
+
+        try:
+            if dependencies:
+                console.print(
+                    f"📦 Installing {len(dependencies)} declared dependencies..."
+                )
+                result = self._run_pip(["install"] + dependencies)
+                if result.returncode != 0:
+                    console.print("❌ Failed to install dependencies:")
+                    console.print(result.stderr)
+                    return False
+
+            site_packages = self._get_site_packages()
+            os.makedirs(site_packages, exist_ok=True)
+            pth_path = os.path.join(site_packages, "_digy_editable.pth")
+            with open(pth_path, "w") as f:
+                f.write("\n".join(get_source_roots(self.repo_path)) + "\n")
+
+            console.print("✅ Package linked in development mode")
+            return True
+
+        except Exception as e:
+            console.print(f"⚠️ Fast editable install failed, using pip build: {e}")
+            return False
+
     def run_python_file(
-        self, file_path: str, args: List[str] = None
+        self,
+        file_path: str,
+        args: List[str] = None,
+        trace_memory: Optional[bool] = None,
     ) -> Tuple[bool, str, str]:
-        """Run a Python file in the virtual environment"""
+        """Run a Python file in the virtual environment
+
+        Output is streamed to the console while it runs (unless
+        ``stream_output`` is off) and written in full to a log in the
+        session output directory. The returned stdout/stderr hold at most
+        ``DIGY_OUTPUT_BUFFER`` bytes each; ``last_run`` has the details.
+        With ``trace_memory`` (default: ``get_trace_memory()``) tracemalloc
+        statistics are dumped next to the log.
+        """
         try:
-            if not self.setup_environment():
+            if not self.ensure_environment():
                 return False, "", "Failed to set up environment"
 
             # Check if file exists
@@ -180,27 +429,591 @@ class Deployer:
             if not os.path.exists(full_path):
                 return False, "", f"File not found: {file_path}"
 
-            cmd = [str(self.get_python_executable()), full_path] + (args or [])
-            result = subprocess.run(
-                cmd, cwd=self.repo_path, capture_output=True, text=True, timeout=300
+            result = self._run_file(
+                file_path,
+                args,
+                self.stream_output,
+                self._get_zygote_launcher(),
+                trace_memory=trace_memory,
+                interactive=True,
             )
+            self.last_run = result
 
-            if result.returncode != 0:
-                return False, result.stdout, result.stderr
-
-            return True, result.stdout, result.stderr
+            if result.timed_out:
+                return (
+                    False,
+                    result.stdout,
+                    f"Process timed out after {self.get_timeout():g} seconds",
+                )
 
-        except subprocess.TimeoutExpired as e:
-            return False, "", f"Process timed out after {e.timeout} seconds"
+            return result.success, result.stdout, result.stderr
 
         except Exception as e:
             return False, "", str(e)
 
-    def setup_environment(self) -> bool:
-        """Set up the complete deployment environment"""
+    def run_file(self, file_path: str, args: Optional[List[str]] = None) -> RunResult:
+        """Run a repository file in a fresh interpreter and get the result
+
+        The environment must be set up already. Output is echoed while
+        ``stream_output`` is on, the script gets no input, and the run is
+        recorded in the run history. Unlike :meth:`run_python_file`, the
+        full :class:`RunResult` is returned and errors are raised.
+        """
+        return self._run_file(file_path, args, self.stream_output)
+
+    def _run_file(
+        self,
+        file_path: str,
+        args: Optional[List[str]],
+        tee: bool,
+        launcher=None,
+        interpreter_args: Optional[List[str]] = None,
+        log_path: Optional[str] = None,
+        trace_memory: Optional[bool] = None,
+        interactive: bool = False,
+    ) -> RunResult:
+        """Run a repository file in the venv through the streaming runner
+
+        ``interpreter_args`` go between the interpreter and the file, e.g. a
+        wrapper program; they need the default Popen launcher. Interactive
+        runs read this process's stdin, others get no input.
+        """
+        full_path = os.path.join(self.repo_path, file_path)
+        cmd = (
+            [str(self.get_python_executable())]
+            + list(interpreter_args or [])
+            + [full_path]
+            + list(args or [])
+        )
+        log_path = log_path or self.get_log_path(file_path)
+        env = None
+        memory_trace = None
+        if trace_memory is None:
+            trace_memory = self.get_trace_memory()
+        if trace_memory:
+            # The hook runs at interpreter start-up, which the zygote skips
+            launcher = None
+            memory_trace = os.path.splitext(log_path)[0] + ".memory.json"
+            env = self._get_memory_trace_env(memory_trace)
+        started = []
+
+        def launch(*launch_args):
+            proc = (launcher or popen_launcher)(*launch_args)
+            self.register_child(proc, "script")
+            started.append(proc)
+            return proc
+
+        try:
+            with span("run", file=file_path, args=" ".join(args or [])) as s:
+                result = stream_process(
+                    cmd,
+                    cwd=self.repo_path,
+                    env=env,
+                    log_path=log_path,
+                    tee=tee,
+                    max_buffer_bytes=int(
+                        os.getenv("DIGY_OUTPUT_BUFFER", str(DEFAULT_BUFFER_BYTES))
+                    ),
+                    timeout=self.get_timeout(),
+                    launcher=launch,
+                    grace_period=self.get_grace_period(),
+                    stdin=None if interactive else subprocess.DEVNULL,
+                )
+                s.set_attribute("returncode", result.returncode)
+                s.set_attribute("timed_out", result.timed_out)
+        finally:
+            for proc in started:
+                self.unregister_child(proc.pid)
+        # Descendants that outlived the script still use the venv
+        for pid in result.survivors:
+            try:
+                self.register_child(psutil.Process(pid), "orphan")
+            except psutil.Error:
+                pass
+        if memory_trace and os.path.exists(memory_trace):
+            result.memory_trace = memory_trace
+            self._tag_memory_trace(memory_trace, file_path)
+        self.record_run(file_path, args or [], result)
+        return result
+
+    def get_trace_memory(self) -> bool:
+        """Whether script runs are traced with tracemalloc"""
+        if self.trace_memory is not None:
+            return self.trace_memory
+        return os.getenv("DIGY_TRACE_MEMORY", "false").lower() == "true"
+
+    def install_memory_hook(self) -> str:
+        """Install the tracemalloc hook as sitecustomize in the venv
+
+        The hook lives in its own directory that only traced runs put on
+        PYTHONPATH, and it does nothing unless DIGY asks for a dump.
+
+        Returns:
+            str: Directory containing the hook
+        """
+        hook_dir = os.path.join(self.venv_path, memtrace.HOOK_DIR)
+        target = os.path.join(hook_dir, "sitecustomize.py")
+        with self._hook_lock:
+            if not os.path.exists(target):
+                os.makedirs(hook_dir, exist_ok=True)
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                shutil.copyfile(memtrace.__file__, tmp_path)
+                os.replace(tmp_path, target)
+        return hook_dir
+
+    def _get_memory_trace_env(self, output_path: str) -> Dict[str, str]:
+        """Environment for a run that dumps tracemalloc statistics"""
+        env = dict(os.environ)
+        hook_dir = self.install_memory_hook()
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [hook_dir, env.get("PYTHONPATH")])
+        )
+        env[memtrace.OUTPUT_ENV] = output_path
+        env[memtrace.FRAMES_ENV] = os.getenv("DIGY_TRACE_FRAMES", "1")
+        return env
+
+    def _tag_memory_trace(self, path: str, file_path: str):
+        """Add the script and commit to a dump so runs can be compared"""
+        try:
+            data = memtrace.load_trace(path)
+            data.update(file=file_path, **get_repo_identity(self.repo_path))
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        except (OSError, ValueError):
+            pass
+
+    def profile_python_file(
+        self,
+        file_path: str,
+        args: List[str] = None,
+        interval: Optional[float] = None,
+    ) -> Tuple[RunResult, Dict[str, str]]:
+        """Run a Python file under the profiler
+
+        Saves a cProfile ``.pstats`` file and a collapsed-stack file from a
+        sampling thread (for flamegraph.pl or speedscope) next to the run log.
+
+        Returns:
+            Tuple of (run result, {"pstats": path, "collapsed": path})
+        """
+        if not self.ensure_environment():
+            raise RuntimeError("Failed to set up environment")
+        if not os.path.exists(os.path.join(self.repo_path, file_path)):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        log_path = self.get_log_path(file_path)
+        base = os.path.splitext(log_path)[0]
+        paths = {"pstats": base + ".pstats", "collapsed": base + ".collapsed"}
+        if interval is None:
+            interval = float(
+                os.getenv("DIGY_PROFILE_INTERVAL", str(profiler.DEFAULT_INTERVAL))
+            )
+
+        result = self._run_file(
+            file_path,
+            args,
+            self.stream_output,
+            interpreter_args=[
+                profiler.__file__,
+                "--pstats",
+                paths["pstats"],
+                "--collapsed",
+                paths["collapsed"],
+                "--interval",
+                str(interval),
+            ],
+            log_path=log_path,
+            trace_memory=False,
+            interactive=True,
+        )
+        self.last_run = result
+        return result, paths
+
+    def profile_imports(
+        self, file_path: str, args: List[str] = None
+    ) -> Tuple[RunResult, List[ImportNode], Optional[Dict[str, Any]]]:
+        """Run a Python file with ``-X importtime`` and keep the import tree
+
+        The script's output is only written to the log. The profile is
+        stored for the repository's HEAD commit, so import-time regressions
+        show up across updates.
+
+        Returns:
+            Tuple of (run result, import tree, latest stored profile of a
+            different commit or None)
+        """
+        if not self.ensure_environment():
+            raise RuntimeError("Failed to set up environment")
+        if not os.path.exists(os.path.join(self.repo_path, file_path)):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        result = self._run_file(
+            file_path,
+            args,
+            False,
+            interpreter_args=["-X", "importtime"],
+            trace_memory=False,
+        )
+        self.last_run = result
+        try:
+            with open(result.log_path, errors="replace") as f:
+                output = f.read()
+        except (OSError, TypeError):
+            output = result.stderr
+        nodes = parse_importtime(output)
+
+        previous = None
+        if nodes:
+            identity = get_repo_identity(self.repo_path)
+            try:
+                history = load_profiles(identity["origin"], file_path)
+                previous = next(
+                    (p for p in reversed(history) if p["commit"] != identity["commit"]),
+                    None,
+                )
+                save_profile(identity["origin"], file_path, identity["commit"], nodes)
+            except OSError as e:
+                console.print(f"⚠️ Could not store import profile: {e}")
+        return result, nodes, previous
+
+    def register_child(self, proc, kind: str):
+        """Track a process started by this Deployer
+
+        Args:
+            proc: Popen-like handle or ``psutil.Process``
+            kind: ``script``, ``orphan``, ``zygote`` or ``precompile``
+        """
+        with self._children_lock:
+            self.children[proc.pid] = (kind, proc)
+
+    def unregister_child(self, pid: int):
+        """Stop tracking a process"""
+        with self._children_lock:
+            self.children.pop(pid, None)
+
+    def get_active_children(self, kinds: Optional[List[str]] = None) -> List[Any]:
+        """Get tracked processes that are still running, with their descendants
+
+        Only this Deployer's own children are inspected, so the cost does not
+        depend on how many processes run on the host. Exited processes are
+        dropped from the registry.
+        """
+        with self._children_lock:
+            entries = list(self.children.items())
+
+        active = []
+        for pid, (kind, handle) in entries:
+            if kinds is not None and kind not in kinds:
+                continue
+            try:
+                if isinstance(handle, psutil.Process):
+                    proc = handle
+                elif handle.poll() is None:
+                    proc = psutil.Process(pid)
+                else:
+                    self.unregister_child(pid)
+                    continue
+                if not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE:
+                    self.unregister_child(pid)
+                    continue
+                active.append(proc)
+                active.extend(proc.children(recursive=True))
+            except psutil.Error:
+                self.unregister_child(pid)
+        return active
+
+    def get_run_config(self) -> Dict[str, Any]:
+        """Get the ``config`` section of the manifest
+
+        DIGY's packaged manifest provides defaults; a ``manifest.yml`` in the
+        repository overrides them.
+        """
+        if self._run_config is None:
+            config: Dict[str, Any] = {}
+            for path in (
+                DEFAULT_MANIFEST,
+                os.path.join(self.repo_path, "manifest.yml"),
+            ):
+                try:
+                    with open(path, "r") as f:
+                        manifest = yaml.safe_load(f) or {}
+                    config.update(manifest.get("config") or {})
+                except (OSError, yaml.YAMLError, AttributeError):
+                    continue
+            self._run_config = config
+        return self._run_config
+
+    def get_timeout(self) -> Optional[float]:
+        """Get the run timeout in seconds; None (or 0) means no limit
+
+        Taken from ``timeout`` on the Deployer (CLI, menu), ``DIGY_TIMEOUT``
+        or the manifest, in that order.
+        """
+        timeout = self.timeout
+        if timeout is None:
+            timeout = float(
+                os.getenv(
+                    "DIGY_TIMEOUT",
+                    self.get_run_config().get("timeout", DEFAULT_TIMEOUT),
+                )
+            )
+        return timeout or None
+
+    def get_grace_period(self) -> float:
+        """Get the seconds between SIGTERM and SIGKILL when stopping a run"""
+        if self.grace_period is not None:
+            return self.grace_period
+        return float(
+            os.getenv(
+                "DIGY_GRACE_PERIOD",
+                self.get_run_config().get("grace_period", DEFAULT_GRACE_PERIOD),
+            )
+        )
+
+    def terminate_active(self):
+        """Stop every running script started by this Deployer, with its tree"""
+        with self._children_lock:
+            active = [proc for kind, proc in self.children.values() if kind == "script"]
+        stoppers = [
+            threading.Thread(
+                target=terminate_tree, args=(proc, self.get_grace_period())
+            )
+            for proc in active
+        ]
+        for stopper in stoppers:
+            stopper.start()
+        for stopper in stoppers:
+            stopper.join()
+
+    def record_run(self, file_path: str, args: List[str], result: RunResult):
+        """Add a finished run to the run history and warn if it regressed"""
+        if not history_enabled():
+            return
+        try:
+            if self.history is None:
+                self.history = RunHistory()
+            if self._identity is None:
+                self._identity = get_repo_identity(self.repo_path)
+            record = self.history.record_run(
+                self.repo_path,
+                file_path,
+                args,
+                result,
+                origin=self._identity["origin"],
+                revision=self._identity["commit"],
+                command_id=current_command(),
+            )
+            regressions = self.history.check_regression(record)
+        except (OSError, sqlite3.Error) as e:
+            console.print(f"⚠️ Could not record run history: {e}")
+            return
+        for metric, found in regressions.items():
+            value, median = found["value"], found["median"]
+            if metric == "duration":
+                value, median = f"{value:.2f}s", f"{median:.2f}s"
+            else:
+                value = f"{value / (1024 * 1024):.1f} MB"
+                median = f"{median / (1024 * 1024):.1f} MB"
+            console.print(
+                f"🐢 {file_path}: {metric} {value} is {found['change']:.0%} above "
+                f"the median of earlier runs ({median})",
+                style="yellow",
+            )
+
+    def run_many(
+        self, jobs: List[Any], max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Run many scripts or argument sets in parallel in the shared venv
+
+        Args:
+            jobs: ``(file_path, args)`` tuples or dicts with ``file`` and
+                optional ``args``
+            max_workers: Concurrent processes, defaults to the CPU count
+
+        Returns:
+            One summary row per job, in job order, with the exit code,
+            duration and log path
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        specs = []
+        for job in jobs:
+            if isinstance(job, dict):
+                specs.append((job["file"], list(job.get("args") or [])))
+            else:
+                file_path, args = job
+                specs.append((file_path, list(args or [])))
+
+        def row(index, file_path, args, result=None, error=None):
+            summary = {
+                "index": index,
+                "file": file_path,
+                "args": args,
+                "returncode": result.returncode if result else None,
+                "success": bool(result and result.success),
+                "timed_out": bool(result and result.timed_out),
+                "duration": round(result.duration, 6) if result else 0.0,
+                "log_path": result.log_path if result else None,
+                "memory_trace": result.memory_trace if result else None,
+                "error": error,
+            }
+            if result and result.resources:
+                resources = result.resources.to_dict()
+                del resources["wall_time"]
+                summary.update(resources)
+            return summary
+
+        if not self.ensure_environment():
+            return [
+                row(i, f, a, error="Failed to set up environment")
+                for i, (f, a) in enumerate(specs)
+            ]
+
+        self.get_output_dir()
+        launcher = self._get_zygote_launcher()
+
+        def run_job(index, file_path, args):
+            if not os.path.exists(os.path.join(self.repo_path, file_path)):
+                return row(index, file_path, args, error=f"File not found: {file_path}")
+            try:
+                result = self._run_file(file_path, args, False, launcher)
+            except Exception as e:
+                return row(index, file_path, args, error=str(e))
+            return row(index, file_path, args, result)
+
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(specs) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each job gets a copy of the context, so its run span nests
+            futures = [
+                pool.submit(contextvars.copy_context().run, run_job, i, file_path, args)
+                for i, (file_path, args) in enumerate(specs)
+            ]
+            try:
+                return [future.result() for future in futures]
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                self.terminate_active()
+                raise
+
+    def ensure_environment(self) -> bool:
+        """Reuse the current virtual environment, or set one up"""
+        if self.venv_path and os.path.exists(self.get_python_executable()):
+            return True
+        return self.setup_environment()
+
+    def get_preload_modules(self) -> List[str]:
+        """Get the modules a zygote should import before forking
+
+        ``DIGY_ZYGOTE_PRELOAD`` (comma separated) takes precedence; otherwise
+        the top-level modules imported by repository files that are not part
+        of the repository itself.
+        """
+        configured = os.getenv("DIGY_ZYGOTE_PRELOAD")
+        if configured is not None:
+            return [m.strip() for m in configured.split(",") if m.strip()]
+
+        files_info = self.get_files_info(self.python_files)
+        local = {name.split(".")[0] for name in self.get_import_graph().modules}
+        modules = set()
+        for info in files_info.values():
+            for module in info.get("modules", []):
+                top = module.split(".")[0]
+                if top and top not in local and top != "__future__":
+                    modules.add(top)
+        return sorted(modules)
+
+    def start_zygote(self) -> Optional[Zygote]:
+        """Start a zygote server for the current virtual environment
+
+        Opt-in with ``DIGY_ZYGOTE=true`` (POSIX only). The server imports the
+        preload modules once and forks a child for every run, so repeat runs
+        skip interpreter start-up and import time.
+        """
+        if os.getenv("DIGY_ZYGOTE", "false").lower() != "true" or os.name != "posix":
+            return None
+        if not self.venv_path:
+            return None
+        if self.zygote is not None and self.zygote.is_alive():
+            return self.zygote
+
+        self.stop_zygote()
+        zygote = Zygote(
+            self.get_python_executable(),
+            os.path.join(self.venv_path, "digy_zygote.sock"),
+            self.get_preload_modules(),
+            cwd=self.repo_path,
+            log_path=os.path.join(self.venv_path, "digy_zygote.log"),
+        )
+        try:
+            zygote.start()
+        except ZygoteError as e:
+            console.print(f"⚠️ Zygote unavailable, using fresh interpreters: {e}")
+            return None
+        self.zygote = zygote
+        self.register_child(zygote.process, "zygote")
+        return zygote
+
+    def stop_zygote(self):
+        """Stop the zygote server, if any"""
+        if self.zygote is not None:
+            if self.zygote.process is not None:
+                self.unregister_child(self.zygote.process.pid)
+            self.zygote.stop()
+            self.zygote = None
+
+    def _get_zygote_launcher(self):
+        """Get the zygote launcher for stream_process, or None for Popen"""
+        zygote = self.start_zygote()
+        return zygote.spawn if zygote else None
+
+    def get_output_dir(self) -> str:
+        """Get (and create) the output directory for this session
+
+        Run logs outlive the temporary checkout, so they are kept in the
+        DIGY cache unless ``DIGY_OUTPUT_DIR`` points elsewhere.
+        """
+        if self.output_dir is None:
+            session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+            base = os.getenv("DIGY_OUTPUT_DIR")
+            if base:
+                self.output_dir = os.path.join(base, session)
+                os.makedirs(self.output_dir, exist_ok=True)
+            else:
+                self.output_dir = get_cache_dir("runs", session)
+        return self.output_dir
+
+    def get_log_path(self, file_path: str) -> str:
+        """Get a unique log file path for a run of ``file_path``"""
+        name = file_path.replace(os.sep, "_").replace("/", "_")
+        stamp = time.strftime("%H%M%S")
+        output_dir = self.get_output_dir()
+        path = os.path.join(output_dir, f"{stamp}_{name}.log")
+        counter = 1
+        # Reserve the name atomically; parallel runs may share a stamp
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                path = os.path.join(output_dir, f"{stamp}_{name}.{counter}.log")
+                counter += 1
+
+    def setup_environment(self, venv_path: Optional[str] = None) -> bool:
+        """Set up the complete deployment environment
+
+        Args:
+            venv_path: Where to create the virtual environment, defaults to a
+                new temporary directory
+        """
+        with span("setup", repo=self.repo_path):
+            return self._run_setup(venv_path)
+
+    def _run_setup(self, venv_path: Optional[str] = None) -> bool:
         console.print("🔧 Setting up deployment environment...")
+        self.stop_zygote()
 
-        if not self.create_virtual_environment():
+        if not self.create_virtual_environment(venv_path):
             return False
 
         if not self.install_requirements():
@@ -209,39 +1022,144 @@ class Deployer:
         if not self.install_package():
             return False
 
+        self.start_precompile()
+
         console.print("✅ Environment setup complete!")
         return True
 
+    def start_precompile(self):
+        """Byte-compile repository and venv sources in the background
+
+        Runs a parallel ``compileall`` pass with the venv interpreter, so the
+        first real run of a script does not pay the compile cost. The pass
+        runs at low priority while the user is still in the menu.
+        """
+        if os.getenv("DIGY_PRECOMPILE", "true").lower() != "true":
+            return
+
+        try:
+            workers = len(os.sched_getaffinity(0))
+        except AttributeError:  # Not available on macOS/Windows
+            workers = os.cpu_count() or 1
+
+        try:
+            list_path = os.path.join(self.venv_path, "digy_precompile.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for py_file in self.python_files:
+                    f.write(os.path.join(self.repo_path, py_file) + "\n")
+
+            cmd = [
+                self.get_python_executable(),
+                "-m",
+                "compileall",
+                "-q",
+                "-j",
+                str(workers),
+                "-i",
+                list_path,
+                self._get_site_packages(),
+            ]
+            self.precompile_process = subprocess.Popen(
+                cmd,
+                cwd=self.repo_path,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=(lambda: os.nice(10)) if os.name != "nt" else None,
+            )
+            self.register_child(self.precompile_process, "precompile")
+        except Exception as e:
+            console.print(f"⚠️ Could not start bytecode precompilation: {e}")
+            self.precompile_process = None
+
+    def stop_precompile(self):
+        """Stop a running background precompilation pass"""
+        if self.precompile_process:
+            self.unregister_child(self.precompile_process.pid)
+        if self.precompile_process and self.precompile_process.poll() is None:
+            self.precompile_process.terminate()
+            try:
+                self.precompile_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.precompile_process.kill()
+        self.precompile_process = None
+
     def get_file_info(self, file_path: str) -> Dict:
         """Get information about a Python file"""
-        full_path = os.path.join(self.repo_path, file_path)
-        info = {
-            "path": file_path,
-            "full_path": full_path,
-            "exists": os.path.exists(full_path),
-            "size": 0,
-            "lines": 0,
-            "has_main": False,
-            "imports": [],
-        }
+        return self.get_files_info([file_path])[file_path]
 
-        if info["exists"]:
-            try:
-                with open(full_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    info["size"] = len(content)
-                    info["lines"] = len(content.splitlines())
-                    info["has_main"] = 'if __name__ == "__main__"' in content
-
-                    # Simple import detection
-                    for line in content.splitlines():
-                        line = line.strip()
-                        if line.startswith(("import ", "from ")):
-                            info["imports"].append(line)
-            except Exception:
-                pass
+    def get_files_info(self, file_paths: List[str]) -> Dict[str, Dict]:
+        """Get information about several Python files
 
-        return info
+        Files are analyzed with ``ast`` on a process pool and the results
+        are cached by path and contents, so repeated listings are instant.
+        Indexed files are stat'ed again first, as the index does not see
+        files edited in place until its next refresh.
+        """
+        if self.analyzer is None:
+            self.analyzer = FileAnalyzer(self.repo_path)
+        if self.index is not None:
+            self.index.restat(file_paths)
+
+        stats = {}
+        infos = {}
+        for file_path in file_paths:
+            full_path = os.path.join(self.repo_path, file_path)
+            infos[file_path] = {
+                "path": file_path,
+                "full_path": full_path,
+                "exists": False,
+                "size": 0,
+                "lines": 0,
+                "has_main": False,
+                "imports": [],
+            }
+            entry = self.index.entries.get(file_path) if self.index else None
+            if entry is None:
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+                stats[file_path] = (st.st_size, st.st_mtime)
+            else:
+                stats[file_path] = (entry.size, entry.mtime)
+
+        for file_path, data in self.analyzer.analyze(stats).items():
+            if "error" in data:
+                continue
+            infos[file_path].update(data)
+            infos[file_path]["exists"] = True
+            infos[file_path]["size"] = stats[file_path][0]
+
+        return infos
+
+    def get_import_graph(self) -> ImportGraph:
+        """Get the import graph of the repository's Python files
+
+        Built from the cached file analysis and reused until the file
+        lists change.
+        """
+        with self._graph_lock:
+            if self._graph is None:
+                files_info = {
+                    path: info
+                    for path, info in self.get_files_info(self.python_files).items()
+                    if info["exists"]
+                }
+                self._graph = ImportGraph(
+                    files_info, get_console_scripts(self.repo_path)
+                )
+            return self._graph
+
+    def get_entry_points(self, limit: Optional[int] = None) -> List[Dict]:
+        """Get likely entry points, most likely first"""
+        return self.get_import_graph().entry_points(limit)
+
+    def prepare_entry_points(self):
+        """Build the import graph in the background so menus can use it"""
+        threading.Thread(
+            target=self.get_import_graph, name="digy-graph", daemon=True
+        ).start()
 
     def cleanup(self, force: bool = False):
         """Clean up virtual environment
@@ -249,24 +1167,25 @@ class Deployer:
         Args:
             force: If True, clean up even if the environment is still active
         """
+        # Helpers this Deployer runs itself are simply stopped
+        self.stop_zygote()
+        self.stop_precompile()
+
         if not force and self.venv_path and os.path.exists(self.venv_path):
-            # Don't clean up if there are active processes
-            python_executable = self.get_python_executable()
-            if os.path.exists(python_executable):
-                try:
-                    # Check if any processes are using the Python executable
-                    for proc in psutil.process_iter(["pid", "name", "exe"]):
-                        if proc.info["exe"] and proc.info["exe"].startswith(
-                            self.venv_path
-                        ):
-                            console.print("⚠️ Virtual environment is still in use")
-                            return
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            # Don't clean up while scripts (or what they left behind) still run
+            active = self.get_active_children(["script", "orphan"])
+            if active:
+                console.print(
+                    "⚠️ Virtual environment is still in use by "
+                    f"{len(active)} process(es)"
+                )
+                return
 
         if self.venv_path and os.path.exists(self.venv_path):
             try:
-                shutil.rmtree(self.venv_path)
+                release(self.venv_path)
+                if not discard(self.venv_path):
+                    raise OSError(f"could not remove {self.venv_path}")
                 console.print(f"🗑️ Cleaned up virtual environment: {self.venv_path}")
             except Exception as e:
                 console.print(f"⚠️ Error cleaning up virtual environment: {e}")
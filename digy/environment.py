@@ -7,9 +7,9 @@ import subprocess
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from rich.console import Console
+from .lazy import LazyConsole
 
-console = Console()
+console = LazyConsole()
 
 
 class EnvironmentManager:
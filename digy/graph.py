@@ -0,0 +1,136 @@
+"""
+Import graph for DIGY
+Links repository files by their imports and ranks likely entry points
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Set
+
+# Score weights for entry point ranking
+SCORE_CONSOLE_SCRIPT = 10.0
+SCORE_MAIN_GUARD = 5.0
+SCORE_DUNDER_MAIN = 3.0
+SCORE_CLI_FRAMEWORK = 2.0
+SCORE_PER_IMPORTER = 1.0
+
+
+def module_name(rel_path: str) -> str:
+    """Get the dotted module name of a repository file"""
+    parts = rel_path.replace(os.sep, "/")[: -len(".py")].split("/")
+    if parts and parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+class ImportGraph:
+    """Directed graph of imports between repository files
+
+    Args:
+        files_info: Mapping of relative path to analyzer results
+        console_scripts: Mapping of script name to ``module:function``
+    """
+
+    def __init__(
+        self,
+        files_info: Dict[str, Dict[str, Any]],
+        console_scripts: Optional[Dict[str, str]] = None,
+    ):
+        self.files_info = files_info
+        self.console_scripts = console_scripts or {}
+        self.modules: Dict[str, str] = {}
+        self.edges: Dict[str, Set[str]] = {path: set() for path in files_info}
+        self.reverse: Dict[str, Set[str]] = {path: set() for path in files_info}
+
+        for path in files_info:
+            self.modules.setdefault(module_name(path), path)
+        for path, info in files_info.items():
+            for module in info.get("modules", []):
+                target = self.resolve(module, path)
+                if target and target != path:
+                    self.edges[path].add(target)
+                    self.reverse[target].add(path)
+
+        self.script_files: Dict[str, List[str]] = {}
+        for name, ref in self.console_scripts.items():
+            target = self.resolve(ref.split(":")[0].strip())
+            if target:
+                self.script_files.setdefault(target, []).append(name)
+
+    def resolve(self, module: str, importer: Optional[str] = None) -> Optional[str]:
+        """Resolve an imported module name to a repository file
+
+        Relative imports are resolved against ``importer``. Names that refer
+        to attributes (``import pkg.mod.func``) resolve to the longest
+        matching module.
+        """
+        if module.startswith("."):
+            if importer is None:
+                return None
+            level = len(module) - len(module.lstrip("."))
+            package = module_name(importer).split(".")
+            if not importer.endswith("__init__.py"):
+                package = package[:-1]
+            if level > 1:
+                package = package[: -(level - 1)] if level - 1 <= len(package) else []
+            rest = module.lstrip(".")
+            module = ".".join(package + ([rest] if rest else []))
+
+        parts = module.split(".")
+        while parts:
+            path = self.modules.get(".".join(parts))
+            if path:
+                return path
+            parts.pop()
+        return None
+
+    def imports_of(self, path: str) -> List[str]:
+        """Get repository files imported by a file"""
+        return sorted(self.edges.get(path, ()))
+
+    def importers(self, path: str) -> List[str]:
+        """Get repository files that import a file"""
+        return sorted(self.reverse.get(path, ()))
+
+    def in_degree(self, path: str) -> int:
+        """Get the number of repository files importing a file"""
+        return len(self.reverse.get(path, ()))
+
+    def score(self, path: str) -> float:
+        """Score how likely a file is to be an entry point"""
+        info = self.files_info.get(path, {})
+        score = 0.0
+        if path in self.script_files:
+            score += SCORE_CONSOLE_SCRIPT
+        if info.get("has_main"):
+            score += SCORE_MAIN_GUARD
+        if os.path.basename(path) == "__main__.py":
+            score += SCORE_DUNDER_MAIN
+        if score and (info.get("uses_argparse") or info.get("uses_click")):
+            score += SCORE_CLI_FRAMEWORK
+        if score:
+            # Modules imported by many others are libraries, not scripts
+            score -= SCORE_PER_IMPORTER * self.in_degree(path)
+        return score
+
+    def entry_points(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get candidate entry points, most likely first
+
+        Returns:
+            List of dicts with path, score, console scripts and in-degree
+        """
+        candidates = []
+        for path in self.files_info:
+            score = self.score(path)
+            if score > 0:
+                candidates.append(
+                    {
+                        "path": path,
+                        "score": score,
+                        "scripts": sorted(self.script_files.get(path, [])),
+                        "in_degree": self.in_degree(path),
+                    }
+                )
+        candidates.sort(key=lambda c: (-c["score"], c["path"]))
+        return candidates[:limit] if limit else candidates
@@ -0,0 +1,567 @@
+"""
+Run history for DIGY
+Records commands, script runs, phase timings and cache lookups in a SQLite
+store in the state directory, and flags runs that regress
+
+Every CLI command is a row in ``commands``; the runs, phases (the spans of
+:mod:`digy.tracing`) and cache lookups made while it runs point back to it.
+A run is compared with the earlier successful runs of the same script in
+the same repository, identified by its origin URL so temporary clones match.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import get_state_dir
+from .stats import percentile, summarize
+
+if TYPE_CHECKING:
+    from .runner import RunResult
+
+HISTORY_FILE = "history.sqlite"
+
+# Fields of runner.ResourceUsage, stored as columns of a run
+RESOURCE_FIELDS = (
+    "wall_time",
+    "user_time",
+    "system_time",
+    "max_rss",
+    "tree_peak_rss",
+    "block_in",
+    "block_out",
+    "voluntary_switches",
+    "involuntary_switches",
+)
+
+# Fraction by which a run may exceed the median of its history before it is
+# flagged, overridden by DIGY_REGRESSION_THRESHOLD
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+# Earlier successful runs needed before a run can be flagged
+MIN_BASELINE_RUNS = 5
+
+# Earlier successful runs the median is taken over
+BASELINE_RUNS = 20
+
+# Run metrics checked for regressions
+REGRESSION_METRICS = ("duration", "peak_rss")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    command TEXT NOT NULL,
+    argv TEXT NOT NULL,
+    cwd TEXT,
+    pid INTEGER,
+    duration REAL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command_id INTEGER REFERENCES commands (id),
+    timestamp REAL NOT NULL,
+    repo TEXT,
+    origin TEXT NOT NULL,
+    revision TEXT,
+    file TEXT NOT NULL,
+    args TEXT NOT NULL,
+    returncode INTEGER,
+    success INTEGER NOT NULL,
+    timed_out INTEGER NOT NULL,
+    duration REAL,
+    log_path TEXT,
+    {resources}
+);
+CREATE INDEX IF NOT EXISTS runs_by_script ON runs (origin, file, id);
+CREATE TABLE IF NOT EXISTS phases (
+    id INTEGER PRIMARY KEY,
+    command_id INTEGER REFERENCES commands (id),
+    timestamp REAL NOT NULL,
+    name TEXT NOT NULL,
+    duration REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS phases_by_name ON phases (name, id);
+CREATE TABLE IF NOT EXISTS cache_events (
+    id INTEGER PRIMARY KEY,
+    command_id INTEGER REFERENCES commands (id),
+    timestamp REAL NOT NULL,
+    cache TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL
+);
+""".format(
+    resources=",\n    ".join(
+        f"{name} {'REAL' if name.endswith('_time') else 'INTEGER'}"
+        for name in RESOURCE_FIELDS
+    )
+)
+
+RUN_COLUMNS = (
+    "command_id",
+    "timestamp",
+    "repo",
+    "origin",
+    "revision",
+    "file",
+    "args",
+    "returncode",
+    "success",
+    "timed_out",
+    "duration",
+    "log_path",
+) + RESOURCE_FIELDS
+
+
+def get_regression_threshold() -> float:
+    """Get the regression threshold from DIGY_REGRESSION_THRESHOLD"""
+    try:
+        return float(
+            os.getenv("DIGY_REGRESSION_THRESHOLD", str(DEFAULT_REGRESSION_THRESHOLD))
+        )
+    except ValueError:
+        return DEFAULT_REGRESSION_THRESHOLD
+
+
+class RunHistory:
+    """SQLite store of commands, script runs, phase timings and cache lookups
+
+    Args:
+        path: Database file, defaults to ``history.sqlite`` in the state
+            directory
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_state_dir(), HISTORY_FILE)
+        self._lock = threading.Lock()
+        # Several sessions may write at once; WAL lets readers carry on
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        """Run one write statement and commit it
+
+        Returns:
+            Row id of the inserted row
+        """
+        with self._lock:
+            cursor = self._conn.execute(sql, tuple(params))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # Recording
+
+    def start_command(self, command: str, argv: List[str]) -> int:
+        """Record the start of a CLI command
+
+        Returns:
+            Command id to pass to the other record methods
+        """
+        return self._execute(
+            "INSERT INTO commands (started, command, argv, cwd, pid) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (time.time(), command, json.dumps(argv), os.getcwd(), os.getpid()),
+        )
+
+    def finish_command(self, command_id: int, exit_code: int, duration: float):
+        """Record how a command ended"""
+        self._execute(
+            "UPDATE commands SET exit_code = ?, duration = ? WHERE id = ?",
+            (exit_code, duration, command_id),
+        )
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Insert one run record
+
+        Returns:
+            Run id
+        """
+        values = dict(record, args=json.dumps(record.get("args", [])))
+        return self._execute(
+            f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+            (values.get(column) for column in RUN_COLUMNS),
+        )
+
+    def record_run(
+        self,
+        repo_path: str,
+        file_path: str,
+        args: List[str],
+        result: "RunResult",
+        origin: Optional[str] = None,
+        revision: Optional[str] = None,
+        command_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Build and insert the record for a finished run
+
+        Args:
+            origin: Repository identity the run is compared by, defaults to
+                ``repo_path``
+            revision: Commit the run used
+            command_id: Command the run belongs to
+        """
+        record = {
+            "command_id": command_id,
+            "timestamp": time.time(),
+            "repo": repo_path,
+            "origin": origin or repo_path,
+            "revision": revision,
+            "file": file_path,
+            "args": list(args),
+            "returncode": result.returncode,
+            "success": result.success,
+            "timed_out": result.timed_out,
+            "duration": result.duration,
+            "log_path": result.log_path,
+        }
+        if result.resources:
+            record.update(result.resources.to_dict())
+        record["id"] = self.append(record)
+        record["peak_rss"] = max(
+            record.get("max_rss") or 0, record.get("tree_peak_rss") or 0
+        )
+        return record
+
+    def record_phase(
+        self,
+        command_id: Optional[int],
+        name: str,
+        duration: float,
+        error: Optional[str] = None,
+    ):
+        """Record the duration of one phase (span)"""
+        self._execute(
+            "INSERT INTO phases (command_id, timestamp, name, duration, error) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (command_id, time.time(), name, duration, error),
+        )
+
+    def record_cache(
+        self, command_id: Optional[int], cache: str, hits: int, misses: int
+    ):
+        """Record lookups in one of DIGY's caches"""
+        self._execute(
+            "INSERT INTO cache_events (command_id, timestamp, cache, hits, misses) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (command_id, time.time(), cache, hits, misses),
+        )
+
+    # Reading
+
+    @staticmethod
+    def _run_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["args"] = json.loads(record["args"])
+        record["success"] = bool(record["success"])
+        record["timed_out"] = bool(record["timed_out"])
+        record["peak_rss"] = max(record["max_rss"] or 0, record["tree_peak_rss"] or 0)
+        return record
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read runs, oldest first; ``limit`` keeps only the newest ones"""
+        rows = self._query(
+            "SELECT * FROM runs ORDER BY id DESC LIMIT ?",
+            (limit if limit else -1,),
+        )
+        return [self._run_record(row) for row in reversed(rows)]
+
+    def script_runs(
+        self,
+        origin: str,
+        file_path: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        successful: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Read the runs of one script, oldest first
+
+        Args:
+            limit: Keep only the newest runs
+            before: Only runs older than this run id
+            successful: Only runs that succeeded
+        """
+        sql = "SELECT * FROM runs WHERE origin = ? AND file = ?"
+        params: List[Any] = [origin, file_path]
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+        if successful:
+            sql += " AND success = 1"
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit if limit else -1)
+        return [self._run_record(row) for row in reversed(self._query(sql, params))]
+
+    def scripts(
+        self, repo: Optional[str] = None, script: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """List (origin, file) pairs with runs, most recently run first
+
+        Args:
+            repo: Only origins containing this text
+            script: Only this file
+        """
+        sql = "SELECT origin, file, MAX(id) AS last FROM runs WHERE 1 = 1"
+        params: List[Any] = []
+        if repo:
+            sql += " AND instr(origin, ?) > 0"
+            params.append(repo)
+        if script:
+            sql += " AND file = ?"
+            params.append(script)
+        sql += " GROUP BY origin, file ORDER BY last DESC"
+        return [(row["origin"], row["file"]) for row in self._query(sql, params)]
+
+    def recent_commands(
+        self, limit: int = 5, exclude: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Read the newest commands, newest first"""
+        rows = self._query(
+            "SELECT * FROM commands WHERE id != ? ORDER BY id DESC LIMIT ?",
+            (exclude if exclude is not None else -1, limit),
+        )
+        return [dict(row, argv=json.loads(row["argv"])) for row in rows]
+
+    # Statistics
+
+    def check_regression(
+        self, run: Dict[str, Any], threshold: Optional[float] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Compare a run with the median of earlier successful runs of its script
+
+        Returns:
+            Per regressed metric, the run's value, the baseline median and the
+            relative change; empty if the run did not regress or there is too
+            little history
+        """
+        if not run.get("success"):
+            return {}
+        threshold = get_regression_threshold() if threshold is None else threshold
+        baseline = self.script_runs(
+            run["origin"],
+            run["file"],
+            limit=BASELINE_RUNS,
+            before=run["id"],
+            successful=True,
+        )
+        if len(baseline) < MIN_BASELINE_RUNS:
+            return {}
+        regressions = {}
+        for metric in REGRESSION_METRICS:
+            median = percentile([b[metric] or 0 for b in baseline], 50)
+            value = run.get(metric) or 0
+            if median > 0 and value > median * (1 + threshold):
+                regressions[metric] = {
+                    "value": value,
+                    "median": median,
+                    "change": value / median - 1,
+                }
+        return regressions
+
+    def recent_regressions(
+        self, limit: int = 20, threshold: Optional[float] = None
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]]:
+        """Check the newest runs for regressions
+
+        Returns:
+            (run, regressions) for each regressed run, newest first
+        """
+        checked = [
+            (run, self.check_regression(run, threshold)) for run in self.read(limit)
+        ]
+        return [(run, found) for run, found in reversed(checked) if found]
+
+    def script_stats(
+        self,
+        repo: Optional[str] = None,
+        script: Optional[str] = None,
+        window: int = 100,
+        threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Summarize the newest runs of each script
+
+        Args:
+            repo: Only origins containing this text
+            script: Only this file
+            window: Newest runs per script that are summarized
+
+        Returns:
+            Per script: run count, success rate, duration and peak RSS
+            summaries of the successful runs, the last run and its regressions
+        """
+        results = []
+        for origin, file_path in self.scripts(repo, script):
+            runs = self.script_runs(origin, file_path, limit=window)
+            succeeded = [r for r in runs if r["success"]]
+            last = runs[-1]
+            results.append(
+                {
+                    "origin": origin,
+                    "file": file_path,
+                    "runs": len(runs),
+                    "success_rate": len(succeeded) / len(runs),
+                    "duration": summarize(r["duration"] for r in succeeded),
+                    "peak_rss": summarize(r["peak_rss"] for r in succeeded),
+                    "last_run": last["timestamp"],
+                    "regressions": self.check_regression(last, threshold),
+                }
+            )
+        return results
+
+    def phase_stats(self, window: int = 1000) -> Dict[str, Dict[str, float]]:
+        """Summarize the newest durations of each phase, in pipeline order"""
+        from .bench import PHASES
+
+        durations: Dict[str, List[float]] = {}
+        rows = self._query(
+            "SELECT name, duration FROM phases ORDER BY id DESC LIMIT ?",
+            (window * len(PHASES),),
+        )
+        for row in rows:
+            samples = durations.setdefault(row["name"], [])
+            if len(samples) < window:
+                samples.append(row["duration"])
+        order = {name: i for i, name in enumerate(PHASES)}
+        names = sorted(durations, key=lambda name: order.get(name, len(order)))
+        return {name: summarize(durations[name]) for name in names}
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Total hits, misses and hit rate per cache"""
+        rows = self._query(
+            "SELECT cache, SUM(hits) AS hits, SUM(misses) AS misses "
+            "FROM cache_events GROUP BY cache ORDER BY cache"
+        )
+        return {
+            row["cache"]: {
+                "hits": row["hits"],
+                "misses": row["misses"],
+                "hit_rate": row["hits"] / ((row["hits"] + row["misses"]) or 1),
+            }
+            for row in rows
+        }
+
+
+# History of the running process, shared by the CLI, deployers and caches
+
+_history: Optional[RunHistory] = None
+_history_lock = threading.Lock()
+_command_id: Optional[int] = None
+_command_started = 0.0
+
+
+def history_enabled() -> bool:
+    """Whether history is recorded, from DIGY_HISTORY"""
+    return os.getenv("DIGY_HISTORY", "true").lower() == "true"
+
+
+def get_history() -> RunHistory:
+    """Get the history store of this process, opening it on first use"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = RunHistory()
+        return _history
+
+
+def current_command() -> Optional[int]:
+    """Get the id of the command being recorded, if any"""
+    return _command_id
+
+
+def start_command(command: str, argv: Optional[List[str]] = None) -> Optional[int]:
+    """Start recording a CLI command, its phases and its cache lookups
+
+    Returns:
+        Command id, or None if the history could not be opened
+    """
+    global _command_id, _command_started
+    from . import tracing
+
+    try:
+        _command_id = get_history().start_command(
+            command, sys.argv[1:] if argv is None else argv
+        )
+    except (OSError, sqlite3.Error):
+        return None
+    _command_started = time.perf_counter()
+    tracing.add_listener(_record_span)
+    return _command_id
+
+
+def _exit_code(exc: Optional[BaseException]) -> int:
+    """Exit code for an exception ending a command"""
+    if exc is None:
+        return 0
+    # click.exceptions.Exit and ClickException carry exit_code
+    code = getattr(exc, "exit_code", getattr(exc, "code", 1))
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+def finish_command(exit_code: Optional[int] = None):
+    """Stop recording the current command
+
+    Args:
+        exit_code: Defaults to the code of the exception being handled, so
+            this can be a ``click.Context.call_on_close`` callback
+    """
+    global _command_id
+    from . import tracing
+
+    if _command_id is None:
+        return
+    tracing.remove_listener(_record_span)
+    if exit_code is None:
+        exit_code = _exit_code(sys.exc_info()[1])
+    try:
+        get_history().finish_command(
+            _command_id, exit_code, time.perf_counter() - _command_started
+        )
+    except sqlite3.Error:
+        pass
+    _command_id = None
+
+
+def _record_span(finished):
+    """Tracing listener recording spans as phases of the current command"""
+    if _command_id is None:
+        return
+    try:
+        get_history().record_phase(
+            _command_id,
+            finished.name,
+            (finished.end_ns - finished.start_ns) / 1e9,
+            finished.error,
+        )
+    except sqlite3.Error:
+        pass
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0):
+    """Record cache lookups for the current command; no-op outside commands"""
+    if _command_id is None or not (hits or misses):
+        return
+    try:
+        get_history().record_cache(_command_id, cache, hits, misses)
+    except sqlite3.Error:
+        pass
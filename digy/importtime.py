@@ -0,0 +1,154 @@
+"""
+Import-time analysis for DIGY
+Parses ``python -X importtime`` output into a tree and keeps it per commit
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .cache import get_state_dir
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+
+# Imports kept per stored profile
+STORED_IMPORTS = 100
+
+# Profiles kept per repository and script
+MAX_PROFILES = 50
+
+_lock = threading.Lock()
+
+
+@dataclass
+class ImportNode:
+    """One module import; times are in microseconds"""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: List["ImportNode"] = field(default_factory=list)
+
+
+def parse_importtime(text: str) -> List[ImportNode]:
+    """Build the import tree from ``-X importtime`` output
+
+    The interpreter prints a module after everything it imported, indented
+    by two spaces per level, so children are collected until their parent
+    line appears. Other lines (the script's own stderr) are ignored.
+
+    Returns:
+        Top-level imports in import order
+    """
+    pending: Dict[int, List[ImportNode]] = {0: []}
+    for line in text.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        level = max(len(indent) - 1, 0) // 2
+        node = ImportNode(name, int(self_us), int(cumulative_us))
+        node.children = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append(node)
+    return pending.get(0, [])
+
+
+def flatten(nodes: List[ImportNode]) -> List[ImportNode]:
+    """All nodes of a tree, parents before children"""
+    result = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        result.append(node)
+        stack.extend(reversed(node.children))
+    return result
+
+
+def total_us(nodes: List[ImportNode]) -> int:
+    """Total import time of the top-level imports"""
+    return sum(node.cumulative_us for node in nodes)
+
+
+def slowest(nodes: List[ImportNode], limit: int = 20) -> List[ImportNode]:
+    """Imports with the highest cumulative time"""
+    return sorted(flatten(nodes), key=lambda n: n.cumulative_us, reverse=True)[:limit]
+
+
+# Persistence
+
+
+def profile_path(origin: str, file_path: str) -> str:
+    """Get the file holding import profiles of one script of a repository"""
+    key = f"{origin}\0{file_path}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    name = os.path.basename(origin.rstrip("/")).replace(".git", "") or "repo"
+    script = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(get_state_dir("importtime"), f"{name}-{script}-{digest}.json")
+
+
+def load_profiles(origin: str, file_path: str) -> List[Dict[str, Any]]:
+    """Load stored import profiles, oldest first"""
+    try:
+        with open(profile_path(origin, file_path)) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return []
+
+
+def make_profile(
+    nodes: List[ImportNode], commit: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the stored form of an import tree: totals of the slowest imports"""
+    return {
+        "commit": commit,
+        "timestamp": time.time(),
+        "total_us": total_us(nodes),
+        "imports": {
+            node.name: [node.self_us, node.cumulative_us]
+            for node in slowest(nodes, STORED_IMPORTS)
+        },
+    }
+
+
+def save_profile(
+    origin: str, file_path: str, commit: Optional[str], nodes: List[ImportNode]
+) -> Dict[str, Any]:
+    """Store the import profile of one commit, replacing an older one
+
+    Returns:
+        The stored record
+    """
+    record = make_profile(nodes, commit)
+    path = profile_path(origin, file_path)
+    with _lock:
+        profiles = [
+            p for p in load_profiles(origin, file_path) if p["commit"] != commit
+        ]
+        profiles = (profiles + [record])[-MAX_PROFILES:]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(profiles, f)
+        os.replace(tmp_path, path)
+    return record
+
+
+def compare_profiles(
+    previous: Dict[str, Any], current: Dict[str, Any], limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Imports whose cumulative time changed most between two profiles
+
+    Imports missing from one profile count as zero there.
+    """
+    names = set(previous["imports"]) | set(current["imports"])
+    changes = []
+    for name in names:
+        before = previous["imports"].get(name, [0, 0])[1]
+        after = current["imports"].get(name, [0, 0])[1]
+        changes.append({"name": name, "before_us": before, "after_us": after})
+    changes.sort(key=lambda c: abs(c["after_us"] - c["before_us"]), reverse=True)
+    return changes[:limit]
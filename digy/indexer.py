@@ -0,0 +1,610 @@
+"""
+Repository indexer for DIGY
+Builds a persistent file index with os.scandir, honouring ignore files
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .cache import get_cache_dir
+
+INDEX_VERSION = 2
+
+# File kinds stored in the index
+KIND_OTHER = 0
+KIND_PYTHON = 1
+KIND_REQUIREMENTS = 2
+KIND_SETUP = 3
+
+REQUIREMENTS_FILES = [
+    "requirements.txt",
+    "requirements-dev.txt",
+    "requirements-test.txt",
+]
+SETUP_FILES = ["setup.py", "setup.cfg", "pyproject.toml"]
+IGNORE_FILES = [".gitignore", ".digyignore"]
+
+# Applied before any ignore file, can be re-included with "!pattern"
+DEFAULT_IGNORE = [".*/", "__pycache__/", "build/", "dist/", "node_modules/"]
+
+# Indexes below this size are cheaper to rebuild than to load
+PERSIST_MIN_FILES = 1000
+
+# Persisted indexes kept, the least recently saved are pruned
+MAX_PERSISTED_INDEXES = 32
+
+
+class FileEntry(NamedTuple):
+    """Indexed file information"""
+
+    kind: int
+    size: int
+    mtime: float
+
+
+def classify(name: str) -> int:
+    """Get the index kind for a file name"""
+    if name in SETUP_FILES:
+        return KIND_SETUP
+    if name.endswith(".py"):
+        return KIND_PYTHON
+    if name in REQUIREMENTS_FILES:
+        return KIND_REQUIREMENTS
+    return KIND_OTHER
+
+
+def is_python_setup(path: str, kind: int) -> bool:
+    """Check if a file of a kind is a setup script, which is Python too"""
+    return kind == KIND_SETUP and path.endswith(".py")
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Get the SHA-1 of a file's contents, or None if it cannot be read"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression"""
+    result = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            result.append("[^/]*")
+        elif c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return "".join(result)
+
+
+class IgnoreRule(NamedTuple):
+    """Single compiled ignore pattern"""
+
+    base: str
+    regex: "re.Pattern"
+    negate: bool
+    dir_only: bool
+
+
+def parse_ignore_lines(lines: List[str], base: str = "") -> List[IgnoreRule]:
+    """Parse gitignore-style lines into rules relative to ``base``"""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _translate_glob(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append(IgnoreRule(base, re.compile(regex + r"\Z"), negate, dir_only))
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """Check a '/'-separated repository path against ignore rules
+
+    The last matching rule wins, as in git.
+    """
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        path = rel_path
+        if rule.base:
+            if not rel_path.startswith(rule.base + "/"):
+                continue
+            path = rel_path[len(rule.base) + 1 :]
+        if rule.regex.match(path):
+            ignored = not rule.negate
+    return ignored
+
+
+def _to_posix(rel_path: str) -> str:
+    """Convert an OS relative path to the '/'-separated form used by rules"""
+    return rel_path.replace(os.sep, "/") if os.sep != "/" else rel_path
+
+
+class RepoIndex:
+    """File index of a repository
+
+    Entries map relative paths to ``FileEntry`` tuples. Directory mtimes are
+    kept so that a persisted index can be revalidated by rescanning only the
+    directories whose contents changed since it was saved.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.entries: Dict[str, FileEntry] = {}
+        self.dirs: Dict[str, float] = {}
+        self.ignore_files: Dict[str, float] = {}
+        self._rules_cache: Dict[str, List[IgnoreRule]] = {}
+        self.lock = threading.RLock()
+
+    # Building
+
+    def _abs(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path) if rel_path else self.root
+
+    def _rules_for(self, rel_dir: str) -> List[IgnoreRule]:
+        """Get the ignore rules in effect inside a directory"""
+        if rel_dir in self._rules_cache:
+            return self._rules_cache[rel_dir]
+
+        if rel_dir:
+            parent = os.path.dirname(rel_dir)
+            rules = list(self._rules_for(parent))
+        else:
+            rules = parse_ignore_lines(DEFAULT_IGNORE)
+
+        for name in IGNORE_FILES:
+            rel_file = os.path.join(rel_dir, name) if rel_dir else name
+            path = self._abs(rel_file)
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    rules.extend(parse_ignore_lines(f.readlines(), _to_posix(rel_dir)))
+                self.ignore_files[rel_file] = os.stat(path).st_mtime
+            except OSError:
+                continue
+
+        self._rules_cache[rel_dir] = rules
+        return rules
+
+    def _scan_dir(self, rel_dir: str) -> List[str]:
+        """Scan one directory, updating entries for its files
+
+        Returns:
+            List of relative paths of the non-ignored subdirectories
+        """
+        rules = self._rules_for(rel_dir)
+        subdirs = []
+        try:
+            self.dirs[rel_dir] = os.stat(self._abs(rel_dir)).st_mtime
+            with os.scandir(self._abs(rel_dir)) as it:
+                for entry in it:
+                    rel_path = (
+                        os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    )
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_ignored(rules, _to_posix(rel_path), is_dir):
+                            continue
+                        if is_dir:
+                            subdirs.append(rel_path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            self.entries[rel_path] = FileEntry(
+                                classify(entry.name), st.st_size, st.st_mtime
+                            )
+                    except OSError:
+                        continue
+        except OSError:
+            self.dirs.pop(rel_dir, None)
+        return subdirs
+
+    def _scan_tree(self, rel_dir: str):
+        """Scan a directory tree without recursion"""
+        stack = [rel_dir]
+        while stack:
+            stack.extend(self._scan_dir(stack.pop()))
+
+    def build(self):
+        """Build the index from scratch"""
+        with self.lock:
+            self.entries.clear()
+            self.dirs.clear()
+            self.ignore_files.clear()
+            self._rules_cache.clear()
+            self._scan_tree("")
+
+    def _drop_dir(self, rel_dir: str) -> List[str]:
+        """Remove a directory and everything below it from the index
+
+        Returns:
+            List of removed file paths
+        """
+        prefix = rel_dir + os.sep
+        removed = [p for p in self.entries if p.startswith(prefix)]
+        for path in removed:
+            del self.entries[path]
+        for path in [d for d in self.dirs if d == rel_dir or d.startswith(prefix)]:
+            del self.dirs[path]
+        return removed
+
+    def refresh(self) -> int:
+        """Bring the index up to date by rescanning changed directories
+
+        A directory's mtime changes when entries are added, removed or
+        renamed in it, so only those directories are listed again. Files are
+        not stat'ed: editing a file in place leaves its directory's mtime
+        alone, so callers restat() the files whose size or mtime they use.
+        Changes to ignore files trigger a full rebuild.
+
+        Returns:
+            int: Number of directories rescanned
+        """
+        with self.lock:
+            return self._refresh()
+
+    def restat(self, paths: Optional[List[str]] = None) -> List[str]:
+        """Update the size and mtime of indexed files from disk
+
+        Args:
+            paths: Files to check, or None for every indexed file
+
+        Returns:
+            List of indexed paths whose size or mtime changed; files that
+            vanished are dropped from the index
+        """
+        changed = []
+        with self.lock:
+            for path in list(self.entries) if paths is None else paths:
+                entry = self.entries.get(path)
+                if entry is None:
+                    continue
+                try:
+                    st = os.stat(self._abs(path))
+                except OSError:
+                    del self.entries[path]
+                    continue
+                if (st.st_size, st.st_mtime) != (entry.size, entry.mtime):
+                    self.entries[path] = entry._replace(
+                        size=st.st_size, mtime=st.st_mtime
+                    )
+                    changed.append(path)
+        return changed
+
+    def _refresh(self) -> int:
+        for rel_file, mtime in self.ignore_files.items():
+            try:
+                changed = os.stat(self._abs(rel_file)).st_mtime != mtime
+            except OSError:
+                changed = True
+            if changed:
+                self.build()
+                return len(self.dirs)
+
+        changed_dirs = []
+        for rel_dir, mtime in list(self.dirs.items()):
+            if rel_dir not in self.dirs:
+                continue  # Dropped with a parent
+            try:
+                if os.stat(self._abs(rel_dir)).st_mtime != mtime:
+                    changed_dirs.append(rel_dir)
+            except OSError:
+                self._drop_dir(rel_dir)
+
+        if not changed_dirs:
+            return 0
+
+        files_by_dir: Dict[str, List[str]] = {}
+        for path in self.entries:
+            files_by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+        for rel_dir in changed_dirs:
+            for name in IGNORE_FILES:
+                rel_file = os.path.join(rel_dir, name) if rel_dir else name
+                if rel_file not in self.ignore_files and os.path.exists(
+                    self._abs(rel_file)
+                ):
+                    # A new ignore file changes the rules below this directory
+                    self.build()
+                    return len(self.dirs)
+
+            for path in files_by_dir.get(rel_dir, []):
+                del self.entries[path]
+            known_subdirs = {
+                d for d in self.dirs if d and os.path.dirname(d) == rel_dir
+            }
+            subdirs = self._scan_dir(rel_dir)
+            for subdir in subdirs:
+                if subdir not in known_subdirs:
+                    self._scan_tree(subdir)
+            for subdir in known_subdirs - set(subdirs):
+                self._drop_dir(subdir)
+        return len(changed_dirs)
+
+    # Incremental updates
+
+    def _touch_dir(self, rel_dir: str):
+        """Record the current mtime of a directory whose changes were applied"""
+        if rel_dir in self.dirs:
+            try:
+                self.dirs[rel_dir] = os.stat(self._abs(rel_dir)).st_mtime
+            except OSError:
+                pass
+
+    def is_ignored_path(self, rel_path: str, is_dir: bool) -> bool:
+        """Check a path against the ignore rules of its directory"""
+        rules = self._rules_for(os.path.dirname(rel_path))
+        return is_ignored(rules, _to_posix(rel_path), is_dir)
+
+    def update_file(self, rel_path: str) -> bool:
+        """Add or update a single file entry
+
+        Returns:
+            bool: True if the file was not indexed before
+        """
+        with self.lock:
+            if self.is_ignored_path(rel_path, False):
+                return False
+            try:
+                st = os.stat(self._abs(rel_path))
+            except OSError:
+                self.entries.pop(rel_path, None)
+                return False
+            is_new = rel_path not in self.entries
+            self.entries[rel_path] = FileEntry(
+                classify(os.path.basename(rel_path)), st.st_size, st.st_mtime
+            )
+            self._touch_dir(os.path.dirname(rel_path))
+            return is_new
+
+    def add_tree(self, rel_dir: str) -> Tuple[List[str], List[str]]:
+        """Index a directory that appeared below the root
+
+        Returns:
+            Tuple of (new file paths, new directory paths)
+        """
+        with self.lock:
+            if self.is_ignored_path(rel_dir, True):
+                return [], []
+            before_files = set(self.entries)
+            before_dirs = set(self.dirs)
+            self._scan_tree(rel_dir)
+            new_files = [p for p in self.entries if p not in before_files]
+            new_dirs = [d for d in self.dirs if d not in before_dirs]
+            return new_files, new_dirs
+
+    def remove_path(self, rel_path: str) -> List[str]:
+        """Remove a file or directory tree from the index
+
+        Returns:
+            List of removed file paths
+        """
+        with self.lock:
+            self._touch_dir(os.path.dirname(rel_path))
+            if rel_path in self.entries:
+                del self.entries[rel_path]
+                return [rel_path]
+            if rel_path in self.dirs:
+                return self._drop_dir(rel_path)
+            return []
+
+    # Queries
+
+    def files_of_kind(self, kind: int) -> List[str]:
+        """Get sorted relative paths of all files of a kind
+
+        ``setup.py`` is a Python file too and is listed for both kinds.
+        """
+        with self.lock:
+            return sorted(
+                path
+                for path, entry in self.entries.items()
+                if entry.kind == kind
+                or (kind == KIND_PYTHON and is_python_setup(path, entry.kind))
+            )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Tuple[str, FileEntry]]:
+        return iter(self.entries.items())
+
+    # Persistence
+
+    @staticmethod
+    def index_path(root: str) -> str:
+        """Get the path of the persisted index for a repository
+
+        Clones of a repository share one index, keyed by their origin URL,
+        so temporary clones reuse it; other directories are keyed by their
+        location.
+        """
+        origin = os.path.realpath(root)
+        if os.path.exists(os.path.join(origin, ".git")):
+            from .project import get_repo_origin
+
+            origin = get_repo_origin(origin)
+        digest = hashlib.sha1(origin.encode("utf-8")).hexdigest()[:16]
+        name = os.path.basename(origin.rstrip("/")).replace(".git", "") or "root"
+        return os.path.join(get_cache_dir("index"), f"{name}-{digest}.json")
+
+    @staticmethod
+    def prune(keep: int = MAX_PERSISTED_INDEXES):
+        """Remove all but the ``keep`` most recently saved indexes"""
+        index_dir = get_cache_dir("index")
+        saved = []
+        for name in os.listdir(index_dir):
+            path = os.path.join(index_dir, name)
+            try:
+                saved.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        saved.sort(reverse=True)
+        for _, path in saved[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def save(self, path: Optional[str] = None):
+        """Persist the index atomically"""
+        path = path or self.index_path(self.root)
+        with self.lock:
+            data = {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "dirs": dict(self.dirs),
+                "ignore_files": dict(self.ignore_files),
+                "ignore_digests": {
+                    rel_file: file_digest(self._abs(rel_file))
+                    for rel_file in self.ignore_files
+                },
+                "entries": [
+                    [p, e.kind, e.size, e.mtime] for p, e in self.entries.items()
+                ],
+            }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.prune()
+
+    def _rebase(self, ignore_digests: Dict[str, Optional[str]]) -> bool:
+        """Adopt an index saved for another checkout of the repository
+
+        Directory mtimes are taken from this checkout. Directories holding
+        names the index does not know are marked stale, so the following
+        refresh() rescans them. File sizes and mtimes are those of the other
+        checkout until restat().
+
+        Returns:
+            bool: False if the ignore files differ and the index is unusable
+        """
+        for rel_file in self.ignore_files:
+            path = self._abs(rel_file)
+            if file_digest(path) != ignore_digests.get(rel_file):
+                return False
+            self.ignore_files[rel_file] = os.stat(path).st_mtime
+
+        known: Dict[str, set] = {}
+        for path in list(self.entries) + list(self.dirs):
+            if path:
+                known.setdefault(os.path.dirname(path), set()).add(
+                    os.path.basename(path)
+                )
+        for rel_dir in list(self.dirs):
+            if rel_dir not in self.dirs:
+                continue  # Dropped with a parent
+            try:
+                names = os.listdir(self._abs(rel_dir))
+                mtime = os.stat(self._abs(rel_dir)).st_mtime
+            except OSError:
+                self._drop_dir(rel_dir)
+                continue
+            stale = not known.get(rel_dir, set()).issuperset(names)
+            self.dirs[rel_dir] = -1.0 if stale else mtime
+        return True
+
+    @classmethod
+    def load(cls, root: str, path: Optional[str] = None) -> Optional["RepoIndex"]:
+        """Load a persisted index, or None if missing or incompatible
+
+        An index saved for another checkout of the same repository is
+        rebased onto ``root``, call refresh() before using it.
+        """
+        path = path or cls.index_path(root)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        index = cls(root)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        index.dirs = data["dirs"]
+        index.ignore_files = data["ignore_files"]
+        index.entries = {p: FileEntry(k, s, m) for p, k, s, m in data["entries"]}
+        if data["root"] != index.root and not index._rebase(data["ignore_digests"]):
+            return None
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls, root: str, persist_min_files: int = PERSIST_MIN_FILES
+    ) -> "RepoIndex":
+        """Load the persisted index for a repository, or build a new one
+
+        A loaded index is refreshed before use. The index is saved again if
+        it changed and holds at least ``persist_min_files`` files.
+        """
+        from .history import record_cache
+
+        index = cls.load(root)
+        if index is not None:
+            record_cache("repo-index", hits=1)
+            changed = index.refresh() > 0
+        else:
+            record_cache("repo-index", misses=1)
+            index = cls(root)
+            index.build()
+            changed = True
+
+        if changed and len(index) >= persist_min_files:
+            try:
+                index.save()
+            except OSError:
+                pass
+        return index
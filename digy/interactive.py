@@ -16,9 +16,77 @@ from rich.prompt import Confirm, Prompt
 from rich.syntax import Syntax
 from rich.table import Table
 from rich.text import Text
+from rich.tree import Tree
+
+from .importtime import ImportNode, compare_profiles, make_profile, slowest, total_us
+from .profiler import top_functions
+from .runner import ResourceUsage, format_resources
 
 console = Console()
 
+# Menu item actions that dispatch to a differently named action
+ACTION_ALIASES = {
+    "setup_env": "setup_environment",
+    "list_files": "list_python_files",
+    "run_file": "run_python_file",
+    "profile_file": "profile_python_file",
+    "import_times": "profile_imports",
+    "shell": "interactive_shell",
+}
+
+
+def show_profile(pstats_path: str, limit: int = 15, sort: str = "cumulative"):
+    """Print the hottest functions of a saved profile"""
+    table = Table(title=f"Top {limit} functions by {sort} time")
+    table.add_column("Function", style="cyan")
+    table.add_column("Location", style="dim")
+    table.add_column("Calls", justify="right")
+    table.add_column("Own (s)", justify="right")
+    table.add_column("Cumulative (s)", justify="right")
+    for row in top_functions(pstats_path, limit=limit, sort=sort):
+        table.add_row(
+            row["function"],
+            row["location"],
+            str(row["calls"]),
+            f"{row['total_time']:.4f}",
+            f"{row['cumulative_time']:.4f}",
+        )
+    console.print(table)
+
+
+def show_import_tree(
+    nodes: List[ImportNode], limit: int = 15, max_depth: int = 3, max_children: int = 5
+):
+    """Print the slowest imports as a cumulative tree"""
+    total = total_us(nodes)
+    tree = Tree(f"📦 Imports: {total / 1000:.1f} ms cumulative")
+
+    def add(branch, children, depth):
+        children = sorted(children, key=lambda n: n.cumulative_us, reverse=True)
+        for node in children[: limit if depth == 0 else max_children]:
+            # Skip noise: imports under 1% of the total
+            if node.cumulative_us * 100 < total:
+                break
+            child = branch.add(
+                f"[cyan]{node.name}[/cyan] {node.cumulative_us / 1000:.1f} ms"
+                f" [dim](self {node.self_us / 1000:.1f} ms)[/dim]"
+            )
+            if depth + 1 < max_depth:
+                add(child, node.children, depth + 1)
+
+    add(tree, nodes, 0)
+    console.print(tree)
+
+    table = Table(title=f"Slowest {limit} imports")
+    table.add_column("Module", style="cyan")
+    table.add_column("Self (ms)", justify="right")
+    table.add_column("Cumulative (ms)", justify="right")
+    for node in slowest(nodes, limit):
+        table.add_row(
+            node.name, f"{node.self_us / 1000:.1f}", f"{node.cumulative_us / 1000:.1f}"
+        )
+    console.print(table)
+
 
 class InteractiveMenu:
     """Interactive menu with arrow key navigation"""
@@ -39,8 +107,11 @@ class InteractiveMenu:
             {"title": "🔧 Setup Environment", "action": "setup_env"},
             {"title": "📁 List Python Files", "action": "list_files"},
             {"title": "🚀 Run Python File", "action": "run_file"},
+            {"title": "🔬 Profile Python File", "action": "profile_file"},
+            {"title": "📦 Import Times", "action": "import_times"},
             {"title": "🔍 Inspect File", "action": "inspect_file"},
             {"title": "💻 Interactive Shell", "action": "shell"},
+            {"title": "⏱️ Run Settings", "action": "run_settings"},
             {"title": "🧹 Cleanup & Exit", "action": "exit"},
         ]
 
@@ -93,6 +164,7 @@ class InteractiveMenu:
 
     def execute_action(self, action: str) -> bool:
         """Execute selected menu action and return whether to continue"""
+        action = ACTION_ALIASES.get(action, action)
         if action == "show_info":
             self.show_repository_info()
             return True
@@ -111,12 +183,21 @@ class InteractiveMenu:
         elif action == "run_python_file":
             self.run_python_file()
             return True
+        elif action == "profile_python_file":
+            self.profile_python_file()
+            return True
+        elif action == "profile_imports":
+            self.profile_imports()
+            return True
         elif action == "inspect_file":
             self.inspect_file()
             return True
         elif action == "interactive_shell":
             self.interactive_shell()
             return True
+        elif action == "run_settings":
+            self.run_settings()
+            return True
         return True
 
     def show_repository_info(self):
@@ -129,6 +210,8 @@ class InteractiveMenu:
         info_table.add_row("Python Files", str(len(self.deployer.python_files)))
         info_table.add_row("Requirements", str(len(self.deployer.requirements_files)))
         info_table.add_row("Setup Files", str(len(self.deployer.setup_files)))
+        entry_points = self.get_entry_point_paths(limit=3)
+        info_table.add_row("Entry Points", ", ".join(entry_points) or "None found")
         info_table.add_row("Has README", "Yes" if self.readme_path else "No")
 
         console.print(info_table)
@@ -180,8 +263,9 @@ class InteractiveMenu:
         table.add_column("Size", justify="right", style="green")
         table.add_column("Has Main", justify="center", style="blue")
 
+        infos = self.deployer.get_files_info(self.deployer.python_files)
         for py_file in self.deployer.python_files:
-            info = self.deployer.get_file_info(py_file)
+            info = infos[py_file]
             table.add_row(
                 py_file,
                 str(info["lines"]),
@@ -199,19 +283,11 @@ class InteractiveMenu:
             self.wait_for_key()
             return
 
-        # Display files for selection
-        console.print("📁 Available Python files:")
-        for i, py_file in enumerate(self.deployer.python_files):
-            console.print(f"{i + 1}. {py_file}")
-
         try:
-            choice = int(Prompt.ask("Select file to run (number)")) - 1
-            if 0 <= choice < len(self.deployer.python_files):
-                selected_file = self.deployer.python_files[choice]
-
+            selected_file = self.select_python_file("run")
+            if selected_file:
                 # Ask for arguments
-                args_input = Prompt.ask("Enter arguments (optional)", default="")
-                args = args_input.split() if args_input.strip() else []
+                args = self.ask_arguments()
 
                 console.print(f"🚀 Running {selected_file}...")
                 console.print("=" * 50)
@@ -220,19 +296,31 @@ class InteractiveMenu:
                     selected_file, args
                 )
 
-                if stdout:
-                    console.print("📤 Output:")
-                    console.print(stdout)
+                # Streamed output has already been shown while running
+                if not self.deployer.stream_output:
+                    if stdout:
+                        console.print("📤 Output:")
+                        console.print(stdout)
 
-                if stderr:
-                    console.print("⚠️ Errors:")
-                    console.print(stderr, style="red")
+                    if stderr:
+                        console.print("⚠️ Errors:")
+                        console.print(stderr, style="red")
 
                 console.print("=" * 50)
                 if success:
                     console.print("✅ Execution completed successfully")
                 else:
                     console.print("❌ Execution failed")
+                    if stderr and self.deployer.stream_output:
+                        console.print(stderr.splitlines()[-1], style="red")
+
+                last_run = self.deployer.last_run
+                if last_run and isinstance(last_run.resources, ResourceUsage):
+                    console.print(f"📊 {format_resources(last_run.resources)}")
+                if last_run and last_run.log_path:
+                    console.print(f"📝 Full log: {last_run.log_path}")
+                if last_run and last_run.memory_trace:
+                    console.print(f"🧠 Memory trace: {last_run.memory_trace}")
 
                 # Ask if user wants to run another file
                 if Confirm.ask("Run another file?"):
@@ -246,6 +334,142 @@ class InteractiveMenu:
 
         self.wait_for_key()
 
+    def select_python_file(self, verb: str) -> Optional[str]:
+        """List Python files, likely entry points first, and ask for one
+
+        Returns:
+            The selected file, or None after an invalid selection
+        """
+        entry_points = self.get_entry_point_paths(limit=5)
+        files = entry_points + list(self.deployer.python_files)
+        console.print("📁 Available Python files:")
+        for i, py_file in enumerate(files):
+            marker = " ⭐" if i < len(entry_points) else ""
+            console.print(f"{i + 1}. {py_file}{marker}")
+
+        choice = int(Prompt.ask(f"Select file to {verb} (number)")) - 1
+        if 0 <= choice < len(files):
+            return files[choice]
+        return None
+
+    def ask_arguments(self) -> List[str]:
+        """Ask for optional script arguments"""
+        args_input = Prompt.ask("Enter arguments (optional)", default="")
+        return args_input.split() if args_input.strip() else []
+
+    def profile_python_file(self):
+        """Run a selected Python file under the profiler"""
+        if not self.deployer.python_files:
+            console.print("❌ No Python files found")
+            self.wait_for_key()
+            return
+
+        try:
+            selected_file = self.select_python_file("profile")
+            if not selected_file:
+                console.print("❌ Invalid selection")
+                self.wait_for_key()
+                return
+            args = self.ask_arguments()
+
+            console.print(f"🔬 Profiling {selected_file}...")
+            console.print("=" * 50)
+            result, paths = self.deployer.profile_python_file(selected_file, args)
+            console.print("=" * 50)
+            if not result.success:
+                console.print("❌ Execution failed (profile saved up to the failure)")
+
+            if os.path.exists(paths["pstats"]):
+                show_profile(paths["pstats"])
+            console.print(f"📝 Profile: {paths['pstats']}")
+            console.print(f"🔥 Collapsed stacks: {paths['collapsed']}")
+        except (ValueError, KeyboardInterrupt):
+            console.print("❌ Invalid input or cancelled")
+        except (RuntimeError, FileNotFoundError) as e:
+            console.print(f"❌ {e}", style="red")
+
+        self.wait_for_key()
+
+    def profile_imports(self):
+        """Show the import-time breakdown of a selected Python file"""
+        if not self.deployer.python_files:
+            console.print("❌ No Python files found")
+            self.wait_for_key()
+            return
+
+        try:
+            selected_file = self.select_python_file("analyze")
+            if not selected_file:
+                console.print("❌ Invalid selection")
+                self.wait_for_key()
+                return
+            args = self.ask_arguments()
+
+            console.print(f"📦 Measuring imports of {selected_file}...")
+            result, nodes, previous = self.deployer.profile_imports(selected_file, args)
+            if not nodes:
+                console.print("❌ No import timings recorded", style="red")
+            else:
+                show_import_tree(nodes)
+            if nodes and previous:
+                current = make_profile(nodes)
+                before, after = previous["total_us"], current["total_us"]
+                change = (after - before) * 100 / before if before else 0.0
+                console.print(
+                    f"📈 Since commit {(previous['commit'] or 'unknown')[:10]}: "
+                    f"{before / 1000:.1f} ms → {after / 1000:.1f} ms ({change:+.0f}%)"
+                )
+                for diff in compare_profiles(previous, current, limit=5):
+                    delta = (diff["after_us"] - diff["before_us"]) / 1000
+                    console.print(f"   {diff['name']}: {delta:+.1f} ms")
+            if not result.success:
+                console.print("❌ Execution failed")
+            if result.log_path:
+                console.print(f"📝 Full log: {result.log_path}")
+        except (ValueError, KeyboardInterrupt):
+            console.print("❌ Invalid input or cancelled")
+        except (RuntimeError, FileNotFoundError) as e:
+            console.print(f"❌ {e}", style="red")
+
+        self.wait_for_key()
+
+    def get_entry_point_paths(self, limit: int) -> List[str]:
+        """Get paths of the most likely entry points"""
+        try:
+            return [ep["path"] for ep in self.deployer.get_entry_points(limit=limit)]
+        except Exception:
+            return []
+
+    def run_settings(self):
+        """Configure the timeout and grace period for script runs"""
+        timeout = self.deployer.get_timeout() or 0
+        grace_period = self.deployer.get_grace_period()
+
+        try:
+            timeout = float(
+                Prompt.ask("Timeout in seconds (0 for none)", default=f"{timeout:g}")
+            )
+            grace_period = float(
+                Prompt.ask(
+                    "Grace period before SIGKILL in seconds",
+                    default=f"{grace_period:g}",
+                )
+            )
+            if timeout < 0 or grace_period < 0:
+                raise ValueError
+        except (ValueError, KeyboardInterrupt):
+            console.print("❌ Invalid input or cancelled")
+            self.wait_for_key()
+            return
+
+        self.deployer.timeout = timeout
+        self.deployer.grace_period = grace_period
+        console.print(
+            f"✅ Timeout: {f'{timeout:g}s' if timeout else 'none'}, "
+            f"grace period: {grace_period:g}s"
+        )
+        self.wait_for_key()
+
     def inspect_file(self):
         """Inspect a Python file's content"""
         if not self.deployer.python_files:
@@ -336,6 +560,8 @@ class InteractiveMenu:
 
     def run(self):
         """Main menu loop"""
+        self.deployer.start_watching()
+        self.deployer.prepare_entry_points()
         try:
             while True:
                 self.clear_screen()
@@ -368,4 +594,5 @@ class InteractiveMenu:
         except KeyboardInterrupt:
             console.print("\n👋 Goodbye!")
         finally:
+            self.deployer.stop_watching()
             self.deployer.cleanup()
@@ -0,0 +1,31 @@
+"""
+Deferred objects for DIGY
+Keeps module-level singletons cheap until they are first used
+"""
+
+from typing import Any, Optional
+
+
+class LazyConsole:
+    """Stand-in for a module-level ``rich.console.Console``
+
+    rich is imported and the console created on first attribute access, so
+    importing a module that only prints in some code paths stays cheap.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self._kwargs = kwargs
+        self._console: Optional[Any] = None
+
+    def get(self):
+        """Get the real console, creating it if needed"""
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console(**self._kwargs)
+        return self._console
+
+    def __getattr__(self, name: str):
+        if name in ("_kwargs", "_console"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
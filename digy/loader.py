@@ -9,7 +9,6 @@ import shlex
 import shutil
 import subprocess
 import sys
-import tempfile
 import time
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -23,6 +22,9 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from .deployer import Deployer
 from .interactive import InteractiveMenu
+from .tempdirs import claim, make_temp_dir, release
+from .tracing import span
+from .trash import discard
 
 # Make docker import optional
 try:
@@ -77,11 +79,20 @@ class MemoryManager:
 memory_manager = MemoryManager()
 
 
+def is_bare_repo(path: str) -> bool:
+    """Check whether a directory is a bare Git repository"""
+    return (
+        os.path.isfile(os.path.join(path, "HEAD"))
+        and os.path.isdir(os.path.join(path, "objects"))
+        and not os.path.exists(os.path.join(path, ".git"))
+    )
+
+
 class GitLoader:
     """Load Git repositories into memory-based temporary directories."""
 
     def __init__(self, base_path: Optional[str] = None):
-        self.base_path = base_path or tempfile.mkdtemp(prefix="digy_")
+        self.base_path = base_path or make_temp_dir()
         self.loaded_repos: Dict[str, dict] = {}  # Store repo info including type
         self.manifest = self.load_manifest()
         self.ram_path = ""  # Initialize ram_path
@@ -226,13 +237,12 @@ class GitLoader:
                     # Try local Git clone first
                     import os
                     import shutil
-                    import tempfile
 
                     if shutil.which("git") is None:
                         raise Exception("Git is not installed locally")
 
                     # Create a temporary directory for the clone
-                    temp_dir = tempfile.mkdtemp(prefix="digy_")
+                    temp_dir = make_temp_dir()
                     repo_dir = os.path.join(temp_dir, project_name)
 
 
@@ -277,7 +287,7 @@ class GitLoader:
                         shutil.rmtree(temp_dir, ignore_errors=True)
 
                     # Create a new temporary directory for the zip download
-                    temp_dir = tempfile.mkdtemp(prefix="digy_zip_")
+                    temp_dir = make_temp_dir("digy_zip_")
                     progress.print("Attempting to download repository as zip...")
 
                     try:
@@ -513,6 +523,8 @@ echo "Repository cloned successfully"
         ram_disk = "/tmp/digy_ram"
         os.makedirs(ram_disk, exist_ok=True)
         os.system(f"mount -t tmpfs -o size={size_gb}G tmpfs {ram_disk}")
+        # Shared between sessions; `digy gc` unmounts it once all owners exit
+        claim(ram_disk)
         return ram_disk
 
     def parse_repo_url(self, url: str) -> Dict[str, str]:
@@ -524,6 +536,12 @@ echo "Repository cloned successfully"
         Returns:
             Dict containing URL components and local path
         """
+        with span("parse_repo_url", url=url) as s:
+            info = self._parse_repo_url(url)
+            s.set_attribute("is_local", info["is_local"])
+            return info
+
+    def _parse_repo_url(self, url: str) -> Dict[str, str]:
         # Handle local paths
         if os.path.isdir(url):
             repo_name = os.path.basename(os.path.abspath(url))
@@ -539,10 +557,11 @@ echo "Repository cloned successfully"
         if url.startswith("git@"):
             url = url.replace("git@", "https://").replace(":", "/")
             
-        # Handle local file URLs
+        # Handle local file URLs; a bare repository has no files to use in
+        # place and is cloned like a remote one
         if url.startswith("file://"):
             local_path = url[7:]
-            if os.path.isdir(local_path):
+            if os.path.isdir(local_path) and not is_bare_repo(local_path):
                 repo_name = os.path.basename(os.path.abspath(local_path))
                 return {
                     "url": url,
@@ -552,7 +571,7 @@ echo "Repository cloned successfully"
                 }
                 
         # Handle remote URLs
-        if not url.startswith(("http://", "https://")):
+        if not url.startswith(("http://", "https://", "file://")):
             url = f"https://{url}"
 
         # Extract repo name for local directory
@@ -603,12 +622,13 @@ echo "Repository cloned successfully"
                 for branch_name in branches_to_try:
                     try:
                         progress.update(task, description=f"Cloning branch '{branch_name}'...")
-                        repo = Repo.clone_from(
-                            repo_info["url"],
-                            local_path,
-                            branch=branch_name,
-                            depth=1,  # Shallow clone to save memory
-                        )
+                        with span("clone", url=repo_info["url"], branch=branch_name):
+                            repo = Repo.clone_from(
+                                repo_info["url"],
+                                local_path,
+                                branch=branch_name,
+                                depth=1,  # Shallow clone to save memory
+                            )
                         break
                     except Exception as e:
                         console.print(f"⚠️ Failed to clone branch '{branch_name}': {e}")
@@ -655,6 +675,12 @@ echo "Repository cloned successfully"
         Returns:
             str: Path to the downloaded repository or None if failed
         """
+        with span("load", repo=repo_url, branch=branch) as s:
+            local_path = self._download_repo(repo_url, branch)
+            s.set_attribute("path", local_path)
+            return local_path
+
+    def _download_repo(self, repo_url: str, branch: str) -> Optional[str]:
         try:
             repo_info = self.parse_repo_url(repo_url)
             project_name = repo_info["name"]
@@ -751,11 +777,19 @@ echo "Repository cloned successfully"
             # Clean up the directory if it still exists (only for non-local repos)
             if os.path.exists(local_path) and repo_type != 'local':
                 console.print(f"🧹 Removing repository directory: {local_path}")
-                shutil.rmtree(local_path, ignore_errors=True)
+                discard(local_path)
                 
             # Clean up RAM disk if it's empty
             if repo_type in ('ram', 'remote') and self.ram_path and os.path.exists(self.ram_path):
                 try:
+                    in_use = any(
+                        info["path"].startswith(self.ram_path + os.sep)
+                        for url, info in self.loaded_repos.items()
+                        if url != repo_url
+                    )
+                    if not in_use:
+                        # Other sessions keep their own claims on the RAM disk
+                        release(self.ram_path)
                     if not os.listdir(self.ram_path):
                         console.print(f"🧹 Removing empty RAM disk: {self.ram_path}")
                         os.rmdir(self.ram_path)
@@ -793,13 +827,24 @@ echo "Repository cloned successfully"
         # Clean up base path if it's empty
         if os.path.exists(self.base_path):
             try:
+                release(self.base_path)
                 if not os.listdir(self.base_path):
                     shutil.rmtree(self.base_path, ignore_errors=True)
             except Exception as e:
                 console.print(f"⚠️  Failed to clean up base path {self.base_path}: {e}")
 
 
-loader_instance = GitLoader()
+# Shared loader, created on first use: it makes a temporary directory and
+# reads the manifest, which importing the module should not do
+loader_instance: Optional[GitLoader] = None
+
+
+def get_loader() -> GitLoader:
+    """Get the shared GitLoader, creating it if needed"""
+    global loader_instance
+    if loader_instance is None:
+        loader_instance = GitLoader()
+    return loader_instance
 
 
 def digy(repo_url: str, branch: str = "main") -> Optional[str]:
@@ -816,7 +861,8 @@ def digy(repo_url: str, branch: str = "main") -> Optional[str]:
     console.print(f"🚀 DIGY - Loading repository: {repo_url}")
 
     # Download repository
-    local_path = loader_instance.download_repo(repo_url, branch)
+    loader = get_loader()
+    local_path = loader.download_repo(repo_url, branch)
     if not local_path:
         return None
 
@@ -843,7 +889,7 @@ def digy(repo_url: str, branch: str = "main") -> Optional[str]:
     finally:
         # Only clean up non-local repositories
         if not os.path.isdir(repo_url):
-            loader_instance.cleanup_repo(repo_url)
+            loader.cleanup_repo(repo_url)
         # Force cleanup of virtual environment if it exists
         if deployer.venv_path:
             deployer.cleanup(force=True)
@@ -0,0 +1,227 @@
+"""
+Load testing for DIGY
+Runs many non-interactive sessions at once against local repositories
+
+Each session is a separate ``digy run-many`` process, as on a host serving
+many users, that loads one of the generated bare repositories over
+``file://``, installs its requirements from a shared local wheelhouse and
+runs its entry point. No network is used.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from . import tracing
+from .bench import PHASES
+from .runner import DEFAULT_SAMPLE_INTERVAL, TreeSampler, popen_launcher, terminate_tree
+from .stats import summarize
+from .synthetic import ENTRY_POINT, RepoSpec, generate_repo, write_wheelhouse
+from .version import __version__
+
+# Seconds a session may take before it is stopped and counted as failed
+DEFAULT_SESSION_TIMEOUT = 600.0
+
+# Characters of a failed session's output kept in the report
+ERROR_TAIL = 2000
+
+
+@dataclass
+class SessionResult:
+    """Outcome of one session"""
+
+    index: int
+    repo: str
+    returncode: Optional[int]
+    latency: float
+    started: float
+    peak_rss: int = 0
+    cpu_time: float = 0.0
+    timed_out: bool = False
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+def session_command(repo_url: str, script: str = ENTRY_POINT) -> List[str]:
+    """Command line of one non-interactive session"""
+    return [sys.executable, "-m", "digy.cli", "run-many", repo_url, script]
+
+
+def run_session(
+    index: int,
+    repo_url: str,
+    env: Dict[str, str],
+    log_path: str,
+    timeout: float = DEFAULT_SESSION_TIMEOUT,
+    script: str = ENTRY_POINT,
+) -> SessionResult:
+    """Run one session to completion, sampling its process tree's memory"""
+    started = time.time()
+    with open(log_path, "wb") as log:
+        proc = popen_launcher(
+            session_command(repo_url, script),
+            None,
+            env,
+            log.fileno(),
+            subprocess.STDOUT,
+        )
+        sampler = TreeSampler(proc.pid, DEFAULT_SAMPLE_INTERVAL)
+        sampler.start()
+        timed_out = False
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            terminate_tree(proc)
+        finally:
+            sampler.stop()
+    latency = time.time() - started
+
+    rusage = getattr(proc, "rusage", None) or {}
+    result = SessionResult(
+        index=index,
+        repo=repo_url,
+        returncode=proc.returncode,
+        latency=latency,
+        started=started,
+        peak_rss=sampler.peak_rss,
+        cpu_time=rusage.get("user_time", 0.0) + rusage.get("system_time", 0.0),
+        timed_out=timed_out,
+    )
+    if not result.success:
+        with open(log_path, "rb") as f:
+            f.seek(max(0, os.path.getsize(log_path) - ERROR_TAIL))
+            result.error = f.read().decode(errors="replace")
+    return result
+
+
+def phase_timings(trace_paths: List[str]) -> Dict[str, Dict[str, float]]:
+    """Summarize span durations per name across session traces, in pipeline order"""
+    durations: Dict[str, List[float]] = {}
+    for path in trace_paths:
+        if not os.path.exists(path):
+            continue
+        for name, seconds in tracing.span_durations(path).items():
+            durations.setdefault(name, []).append(seconds)
+    order = {name: i for i, name in enumerate(PHASES)}
+    names = sorted(durations, key=lambda name: order.get(name, len(order)))
+    return {name: summarize(durations[name]) for name in names}
+
+
+def run_load_test(
+    sessions: int = 10,
+    concurrency: int = 4,
+    repos: int = 1,
+    spec: Optional[RepoSpec] = None,
+    timeout: float = DEFAULT_SESSION_TIMEOUT,
+    work_dir: Optional[str] = None,
+    progress: Optional[Callable[[SessionResult, int], None]] = None,
+) -> Dict[str, Any]:
+    """Run sessions concurrently and report throughput, latency and memory
+
+    Args:
+        sessions: Sessions to run in total
+        concurrency: Sessions running at once
+        repos: Distinct repositories the sessions are spread over
+        spec: Shape of the generated repositories (seeded per repository)
+        timeout: Seconds before a session is stopped and counted as failed
+        work_dir: Directory for repositories, wheelhouse, logs, traces and
+            the sessions' cache and state directories, defaults to a new
+            temporary directory that is removed afterwards
+        progress: Called with each finished session and the total
+
+    Returns:
+        Parameters, throughput, latency and per-phase summaries, peak memory
+        and the failed sessions
+    """
+    from .tempdirs import make_temp_dir
+    from .trash import discard
+
+    spec = spec or RepoSpec(requirements=2)
+    own_dir = work_dir is None
+    work_dir = work_dir or make_temp_dir("digy_load_")
+    try:
+        urls = []
+        for i in range(max(1, repos)):
+            bare = os.path.join(work_dir, f"repo{i}.git")
+            seeded = RepoSpec(
+                **dict(asdict(spec), seed=spec.seed + i, vendor_wheels=False)
+            )
+            generate_repo(bare, seeded)
+            urls.append(f"file://{bare}")
+        # Sessions share caches and history of their own, not the user's
+        base_env = dict(
+            os.environ,
+            DIGY_CACHE_DIR=os.path.join(work_dir, "cache"),
+            DIGY_STATE_DIR=os.path.join(work_dir, "state"),
+        )
+        base_env.update(write_wheelhouse(os.path.join(work_dir, "wheelhouse"), spec))
+        # Sessions run this copy of DIGY, installed or not
+        source_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        base_env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [source_root, os.getenv("PYTHONPATH")])
+        )
+        progress_lock = threading.Lock()
+
+        def job(index: int) -> SessionResult:
+            env = dict(
+                base_env,
+                DIGY_TRACE_FILE=os.path.join(work_dir, f"session{index}.jsonl"),
+            )
+            result = run_session(
+                index,
+                urls[index % len(urls)],
+                env,
+                os.path.join(work_dir, f"session{index}.log"),
+                timeout,
+            )
+            if progress:
+                with progress_lock:
+                    progress(result, sessions)
+            return result
+
+        # Every session process is a descendant of this one
+        host = TreeSampler(os.getpid(), DEFAULT_SAMPLE_INTERVAL)
+        host.start()
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                results = list(pool.map(job, range(sessions)))
+        finally:
+            elapsed = time.perf_counter() - started
+            host.stop()
+
+        phases = phase_timings(
+            [os.path.join(work_dir, f"session{i}.jsonl") for i in range(sessions)]
+        )
+    finally:
+        if own_dir:
+            discard(work_dir)
+
+    succeeded = [r for r in results if r.success]
+    failed = [r for r in results if not r.success]
+    return {
+        "digy_version": __version__,
+        "timestamp": time.time(),
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "repos": len(urls),
+        "spec": asdict(spec),
+        "elapsed": elapsed,
+        "throughput": len(succeeded) / elapsed if elapsed else 0.0,
+        "latency": summarize(r.latency for r in succeeded),
+        "cpu_time": summarize(r.cpu_time for r in succeeded),
+        "session_peak_rss": summarize(r.peak_rss for r in results),
+        "peak_rss": host.peak_rss,
+        "phases": phases,
+        "failures": len(failed),
+        "failed_sessions": [asdict(r) for r in failed],
+    }
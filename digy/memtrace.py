@@ -0,0 +1,134 @@
+"""
+Memory tracing for DIGY script runs
+Starts tracemalloc in a script's interpreter and dumps allocation statistics at exit
+
+This module is also the hook: it is installed as ``sitecustomize`` in a
+directory on the script's PYTHONPATH and must only depend on the standard
+library.
+"""
+
+import atexit
+import json
+import os
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+# Set by DIGY for a traced run; removed at start-up so child processes
+# do not overwrite the dump
+OUTPUT_ENV = "DIGY_MEMTRACE_OUTPUT"
+FRAMES_ENV = "DIGY_MEMTRACE_FRAMES"
+
+HOOK_DIR = "digy_hooks"
+
+# Allocation sites kept in a dump
+TOP_SITES = 50
+
+
+def normalize_path(filename: str, root: Optional[str]) -> str:
+    """Make allocation sites comparable across checkouts and venvs"""
+    marker = f"{os.sep}site-packages{os.sep}"
+    if marker in filename:
+        return "site-packages/" + filename.rsplit(marker, 1)[1]
+    if root and filename.startswith(root + os.sep):
+        return os.path.relpath(filename, root)
+    return filename
+
+
+def dump(path: str, root: Optional[str] = None, limit: int = TOP_SITES):
+    """Write peak memory and the top allocation sites to ``path`` as JSON"""
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    stats = snapshot.statistics("lineno")
+    data = {
+        "pid": os.getpid(),
+        "argv": sys.argv,
+        "peak": peak,
+        "current": current,
+        "total": sum(stat.size for stat in stats),
+        "sites": [
+            {
+                "site": f"{normalize_path(stat.traceback[0].filename, root)}:"
+                f"{stat.traceback[0].lineno}",
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ],
+    }
+    tracemalloc.stop()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def install():
+    """Start tracing if DIGY asked for it"""
+    path = os.environ.pop(OUTPUT_ENV, None)
+    if not path:
+        return
+    tracemalloc.start(int(os.environ.pop(FRAMES_ENV, "1")))
+    # Registered first, so it runs after the script's own exit handlers
+    atexit.register(dump, path, os.getcwd())
+
+
+def _chain():
+    """Import the sitecustomize this hook shadows, if there is one"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    module = sys.modules.pop(__name__)
+    saved = sys.path[:]
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != here]
+    try:
+        import sitecustomize  # noqa: F401
+    except ImportError:
+        sys.modules[__name__] = module
+    finally:
+        sys.path[:] = saved
+
+
+# Reading dumps (used by DIGY itself)
+
+
+def load_trace(path: str) -> Dict[str, Any]:
+    """Load a memory trace dump"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def diff_traces(
+    old: Dict[str, Any], new: Dict[str, Any], limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Allocation sites whose retained size changed most between two dumps
+
+    Sites missing from a dump (not among its top sites) count as zero.
+    """
+    before = {site["site"]: site for site in old["sites"]}
+    after = {site["site"]: site for site in new["sites"]}
+    changes = []
+    for name in set(before) | set(after):
+        old_site = before.get(name, {"size": 0, "count": 0})
+        new_site = after.get(name, {"size": 0, "count": 0})
+        changes.append(
+            {
+                "site": name,
+                "before": old_site["size"],
+                "after": new_site["size"],
+                "delta": new_site["size"] - old_site["size"],
+                "count_delta": new_site["count"] - old_site["count"],
+            }
+        )
+    changes.sort(key=lambda c: abs(c["delta"]), reverse=True)
+    return changes[:limit]
+
+
+if __name__ == "sitecustomize":
+    install()
+    _chain()
@@ -0,0 +1,166 @@
+"""
+Profiler for DIGY script runs
+Runs a script under cProfile and a sampling thread and saves both profiles
+
+This module is also the wrapper program: it is executed by the venv's
+interpreter and must only depend on the standard library.
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from typing import Dict, List, Optional
+
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+def _frame_name(code) -> str:
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class StackSampler(threading.Thread):
+    """Sample the stack of one thread into collapsed-stack counts
+
+    Stacks are cut at the first frame from ``stop_files`` (the wrapper and
+    cProfile), so they start at the profiled script.
+    """
+
+    def __init__(self, thread_id: int, interval: float, stop_files: List[str]):
+        super().__init__(name="digy-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_files = set(stop_files)
+        self.stacks: Dict[str, int] = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame.f_code.co_filename not in self.stop_files:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                key = ";".join(reversed(names))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path: str):
+        """Write stacks in the folded format read by flamegraph.pl/speedscope"""
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def profile_script(
+    script: str,
+    args: List[str],
+    pstats_path: str,
+    collapsed_path: str,
+    interval: float = DEFAULT_INTERVAL,
+):
+    """Run ``script`` as __main__ and save its profiles, even if it fails
+
+    Works like ``python -m cProfile``. Only the main thread is sampled;
+    cProfile also covers only the thread it was enabled in.
+    """
+    sys.argv = [script] + list(args)
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    with open(script, "rb") as f:
+        code = compile(f.read(), script, "exec")
+    globs = {
+        "__file__": script,
+        "__name__": "__main__",
+        "__package__": None,
+        "__cached__": None,
+    }
+
+    sampler = StackSampler(
+        threading.get_ident(),
+        interval,
+        [profile_script.__code__.co_filename, cProfile.__file__],
+    )
+    profile = cProfile.Profile()
+    sampler.start()
+    try:
+        profile.runctx(code, globs, None)
+    finally:
+        sampler.stop()
+        profile.dump_stats(pstats_path)
+        sampler.write(collapsed_path)
+
+
+# Reading profiles (used by DIGY itself)
+
+
+def top_functions(
+    pstats_path: str, limit: int = 20, sort: str = "cumulative"
+) -> List[Dict]:
+    """Get the hottest functions of a saved profile
+
+    Args:
+        pstats_path: File written by cProfile
+        limit: Number of functions to return
+        sort: One of ``SORT_KEYS``
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    stats = pstats.Stats(pstats_path)
+    field = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][field], reverse=True)
+
+    result = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:limit]:
+        result.append(
+            {
+                "function": name,
+                "location": f"{filename}:{line}" if line else filename,
+                "calls": calls,
+                "total_time": tottime,
+                "cumulative_time": cumtime,
+            }
+        )
+    return result
+
+
+def read_collapsed(path: str) -> Dict[str, int]:
+    """Read a collapsed-stack file into {stack: samples}"""
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pstats", required=True)
+    parser.add_argument("--collapsed", required=True)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args(argv)
+    profile_script(
+        options.script,
+        options.args,
+        options.pstats,
+        options.collapsed,
+        options.interval,
+    )
+
+
+if __name__ == "__main__":
+    main()
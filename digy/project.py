@@ -0,0 +1,237 @@
+"""
+Project metadata helpers for DIGY
+Reads packaging metadata (pyproject.toml, setup.cfg, setup.py) without building
+"""
+
+import ast
+import configparser
+import os
+import subprocess
+from typing import Any, Dict, List, Optional
+
+try:
+    import tomllib  # type: ignore
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None
+
+# Source files that indicate a package needs a compiler to build
+EXTENSION_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".pyx", ".pxd", ".f90", ".rs")
+
+# Build backends known to produce pure-Python packages for pure source trees
+PURE_BACKENDS = (
+    "setuptools.build_meta",
+    "flit_core.buildapi",
+    "hatchling.build",
+    "poetry.core.masonry.api",
+    "pdm.backend",
+)
+
+SKIP_DIRS = ["__pycache__", "build", "dist", "node_modules"]
+
+
+def load_pyproject(repo_path: str) -> Dict[str, Any]:
+    """Load pyproject.toml from repository root
+
+    Returns:
+        Dict with parsed content, empty if missing or unreadable
+    """
+    path = os.path.join(repo_path, "pyproject.toml")
+    if tomllib is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except Exception:
+        return {}
+
+
+def load_setup_cfg(repo_path: str) -> Optional[configparser.ConfigParser]:
+    """Load setup.cfg from repository root"""
+    path = os.path.join(repo_path, "setup.cfg")
+    if not os.path.exists(path):
+        return None
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding="utf-8")
+    except configparser.Error:
+        return None
+    return parser
+
+
+def _setup_py_keyword(repo_path: str, keyword: str, default: Any = None) -> Any:
+    """Get a literal keyword argument of the setup() call in setup.py
+
+    Returns:
+        The literal value, ``default`` if the keyword is not passed, or None
+        if setup.py cannot be parsed or the value is not a plain literal
+    """
+    path = os.path.join(repo_path, "setup.py")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+        if name != "setup":
+            continue
+        for kw in node.keywords:
+            if kw.arg == keyword:
+                try:
+                    return ast.literal_eval(kw.value)
+                except (ValueError, TypeError, SyntaxError):
+                    return None
+    return default
+
+
+def _split_lines(value: str) -> List[str]:
+    """Split a multi-line setup.cfg value into non-empty entries"""
+    return [
+        line.strip()
+        for line in value.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def has_compiled_extensions(repo_path: str) -> bool:
+    """Check whether the repository needs a compiler to be installed"""
+    pyproject = load_pyproject(repo_path)
+    backend = pyproject.get("build-system", {}).get("build-backend")
+    if backend and backend not in PURE_BACKENDS:
+        return True
+
+    setup_py = os.path.join(repo_path, "setup.py")
+    if os.path.exists(setup_py):
+        try:
+            with open(setup_py, "r", encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return True
+        if "ext_modules" in content or "Extension(" in content:
+            return True
+
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS]
+        if any(f.endswith(EXTENSION_SUFFIXES) for f in files):
+            return True
+    return False
+
+
+def get_declared_dependencies(repo_path: str) -> Optional[List[str]]:
+    """Get runtime dependencies declared by the project
+
+    Returns:
+        List of requirement strings, or None if they cannot be determined
+        statically (dynamic metadata, non-literal setup.py arguments, ...)
+    """
+    pyproject = load_pyproject(repo_path)
+    if not pyproject and os.path.exists(os.path.join(repo_path, "pyproject.toml")):
+        return None
+    project = pyproject.get("project")
+    if project:
+        if "dependencies" in project.get("dynamic", []):
+            return None
+        return list(project.get("dependencies", []))
+
+    setup_cfg = load_setup_cfg(repo_path)
+    if setup_cfg is not None and setup_cfg.has_option("options", "install_requires"):
+        return _split_lines(setup_cfg.get("options", "install_requires"))
+
+    if os.path.exists(os.path.join(repo_path, "setup.py")):
+        requires = _setup_py_keyword(repo_path, "install_requires", default=[])
+        if isinstance(requires, (list, tuple)):
+            return [str(r) for r in requires]
+        return None
+
+    if "poetry" in pyproject.get("tool", {}):
+        # Poetry version constraints are not PEP 508; let pip resolve them
+        return None
+
+    return []
+
+
+def get_source_roots(repo_path: str) -> List[str]:
+    """Get directories that should be on sys.path for an editable install"""
+    src_dir = os.path.join(repo_path, "src")
+    if os.path.isdir(src_dir):
+        return [os.path.abspath(src_dir)]
+    return [os.path.abspath(repo_path)]
+
+
+def get_console_scripts(repo_path: str) -> Dict[str, str]:
+    """Get console_scripts entry points declared by the project
+
+    Returns:
+        Mapping of script name to ``module:function`` reference
+    """
+    scripts: Dict[str, str] = {}
+    pyproject = load_pyproject(repo_path)
+    scripts.update(pyproject.get("project", {}).get("scripts", {}))
+    poetry_scripts = pyproject.get("tool", {}).get("poetry", {}).get("scripts", {})
+    for name, ref in poetry_scripts.items():
+        if isinstance(ref, str):
+            scripts[name] = ref
+
+    setup_cfg = load_setup_cfg(repo_path)
+    if setup_cfg is not None and setup_cfg.has_option(
+        "options.entry_points", "console_scripts"
+    ):
+        for line in _split_lines(
+            setup_cfg.get("options.entry_points", "console_scripts")
+        ):
+            name, _, ref = line.partition("=")
+            scripts[name.strip()] = ref.strip()
+
+    if os.path.exists(os.path.join(repo_path, "setup.py")):
+        entry_points = _setup_py_keyword(repo_path, "entry_points", default={})
+        if isinstance(entry_points, dict):
+            for line in entry_points.get("console_scripts", []):
+                name, _, ref = str(line).partition("=")
+                scripts[name.strip()] = ref.strip()
+
+    return {name: ref.split("[")[0].strip() for name, ref in scripts.items() if ref}
+
+
+# Repository identity
+
+
+def _git_output(repo_path: str, *args: str) -> Optional[str]:
+    """Run a git command in a repository, or None if it fails"""
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, *args],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def get_repo_origin(repo_path: str) -> str:
+    """Get the origin URL of a repository
+
+    Temporary clones of the same repository share the origin URL; paths
+    that are not clones are identified by their location.
+    """
+    return _git_output(
+        repo_path, "config", "--get", "remote.origin.url"
+    ) or os.path.realpath(repo_path)
+
+
+def get_repo_identity(repo_path: str) -> Dict[str, Optional[str]]:
+    """Get the origin URL and HEAD commit of a repository"""
+    return {
+        "origin": get_repo_origin(repo_path),
+        "commit": _git_output(repo_path, "rev-parse", "HEAD"),
+    }
@@ -0,0 +1,491 @@
+"""
+Process runner for DIGY
+Streams script output live while keeping memory use bounded
+"""
+
+import collections
+import csv
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+import psutil
+
+# Bytes of output kept in memory per stream
+DEFAULT_BUFFER_BYTES = 1024 * 1024
+
+READ_CHUNK = 64 * 1024
+
+# Seconds between RSS samples of the process tree
+DEFAULT_SAMPLE_INTERVAL = 0.1
+
+# Seconds between SIGTERM and SIGKILL when stopping a run
+DEFAULT_GRACE_PERIOD = 5.0
+
+
+@dataclass
+class ResourceUsage:
+    """Resources consumed by a run
+
+    CPU times, ``max_rss`` (largest single process, bytes), block I/O and
+    context switches come from ``wait4`` and include reaped descendants;
+    ``tree_peak_rss`` is the highest sampled RSS sum over the process tree.
+    """
+
+    wall_time: float = 0.0
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss: int = 0
+    tree_peak_rss: int = 0
+    block_in: int = 0
+    block_out: int = 0
+    voluntary_switches: int = 0
+    involuntary_switches: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def format_resources(usage: ResourceUsage) -> str:
+    """One-line human readable summary of a run's resource usage"""
+    peak = max(usage.max_rss, usage.tree_peak_rss) / (1024 * 1024)
+    return (
+        f"{usage.wall_time:.2f}s wall, {usage.user_time:.2f}s user, "
+        f"{usage.system_time:.2f}s sys, peak RSS {peak:.1f} MB, "
+        f"I/O {usage.block_in}/{usage.block_out} blocks in/out, "
+        f"{usage.voluntary_switches + usage.involuntary_switches} context switches"
+    )
+
+
+def rusage_to_dict(ru) -> Dict[str, Any]:
+    """Convert a ``resource.struct_rusage`` to ResourceUsage fields"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "user_time": ru.ru_utime,
+        "system_time": ru.ru_stime,
+        "max_rss": ru.ru_maxrss * scale,
+        "block_in": ru.ru_inblock,
+        "block_out": ru.ru_oublock,
+        "voluntary_switches": ru.ru_nvcsw,
+        "involuntary_switches": ru.ru_nivcsw,
+    }
+
+
+@dataclass
+class RunResult:
+    """Outcome of a streamed process run
+
+    ``stdout`` and ``stderr`` hold the tail of each stream; the complete,
+    interleaved output is in ``log_path``. ``survivors`` lists descendants
+    that were still running when the run finished. ``memory_trace`` is the
+    tracemalloc dump of a traced run.
+    """
+
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    log_path: Optional[str] = None
+    truncated: bool = False
+    timed_out: bool = False
+    duration: float = 0.0
+    resources: Optional[ResourceUsage] = None
+    survivors: List[int] = field(default_factory=list)
+    memory_trace: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class RingBuffer:
+    """Keep the last ``max_bytes`` bytes of a byte stream"""
+
+    def __init__(self, max_bytes: int = DEFAULT_BUFFER_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._chunks: collections.deque = collections.deque()
+
+    def append(self, chunk: bytes):
+        if len(chunk) > self.max_bytes:
+            chunk = chunk[-self.max_bytes :]
+            self.truncated = True
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        while self.size > self.max_bytes:
+            excess = self.size - self.max_bytes
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self.size -= len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self.size -= excess
+            self.truncated = True
+
+    def getvalue(self) -> str:
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+
+def _pump(
+    source: BinaryIO,
+    buffer: RingBuffer,
+    tee: Optional[BinaryIO],
+    log_file: Optional[BinaryIO],
+    log_lock: threading.Lock,
+):
+    """Copy a pipe into the ring buffer, the console and the log file"""
+    read = getattr(source, "read1", source.read)
+    while True:
+        chunk = read(READ_CHUNK)
+        if not chunk:
+            break
+        buffer.append(chunk)
+        if tee is not None:
+            try:
+                tee.write(chunk)
+                tee.flush()
+            except (OSError, ValueError):
+                tee = None
+        if log_file is not None:
+            with log_lock:
+                if log_file.closed:
+                    break
+                log_file.write(chunk)
+    source.close()
+
+
+def _console_stream(stream) -> Optional[BinaryIO]:
+    """Get the binary buffer behind a text stream, if any"""
+    return getattr(stream, "buffer", None)
+
+
+class ChildProcess:
+    """A subprocess reaped with ``os.wait4`` so its resource usage is kept
+
+    Offers the subset of the Popen interface used by :func:`stream_process`,
+    plus ``rusage``. Signals are sent with ``os.kill`` directly: Popen's own
+    methods would poll, and could reap the child before ``wait4`` does.
+    """
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.pid = popen.pid
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[Dict[str, Any]] = None
+        self._done = threading.Event()
+        threading.Thread(target=self._reap, daemon=True).start()
+
+    def _reap(self):
+        _, status, ru = os.wait4(self.pid, 0)
+        self.rusage = rusage_to_dict(ru)
+        self.returncode = self.popen.returncode = os.waitstatus_to_exitcode(status)
+        self._done.set()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.popen.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig: int):
+        if not self._done.is_set():
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class TreeSampler(threading.Thread):
+    """Sample the RSS of a process and its descendants until stopped
+
+    Every descendant seen is remembered, so those that outlive the run can
+    be reported even after they have been re-parented.
+    """
+
+    def __init__(self, pid: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self.seen: Dict[int, psutil.Process] = {}
+        self._stop_event = threading.Event()
+
+    def sample(self, root: psutil.Process) -> int:
+        total = 0
+        for proc in [root] + root.children(recursive=True):
+            if proc.pid != self.pid:
+                self.seen.setdefault(proc.pid, proc)
+            try:
+                total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total
+
+    def survivors(self) -> List[int]:
+        """Get descendants seen during the run that are still alive"""
+        alive = []
+        for pid, proc in self.seen.items():
+            try:
+                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
+                    alive.append(pid)
+            except psutil.Error:
+                pass
+        return sorted(alive)
+
+    def run(self):
+        try:
+            root = psutil.Process(self.pid)
+            while not self._stop_event.is_set():
+                self.peak_rss = max(self.peak_rss, self.sample(root))
+                self._stop_event.wait(self.interval)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def popen_launcher(
+    cmd: List[str],
+    cwd: Optional[str],
+    env: Optional[Dict[str, str]],
+    stdout: int,
+    stderr: int,
+    stdin: Optional[int] = subprocess.DEVNULL,
+):
+    """Start ``cmd`` as a fresh subprocess writing to the given descriptors
+
+    ``stdin`` is passed to Popen: ``subprocess.DEVNULL`` for no input, None
+    to inherit this process's stdin, or a descriptor. On POSIX the process
+    leads a new session, so :func:`terminate_tree` can signal everything it
+    starts through its process group, unless it inherits stdin: interactive
+    scripts stay on this process's terminal for Ctrl-C, job control and
+    ``/dev/tty``.
+    """
+    popen = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdin=stdin,
+        stdout=stdout,
+        stderr=stderr,
+        start_new_session=os.name == "posix" and stdin is not None,
+    )
+    return ChildProcess(popen) if hasattr(os, "wait4") else popen
+
+
+def _signal_tree(pid: int, descendants: List[psutil.Process], sig: int):
+    """Signal a process group and descendants that may have left it"""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            # Not a group leader, e.g. an interactive script
+            try:
+                os.kill(pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+    for proc in descendants:
+        try:
+            proc.send_signal(sig)
+        except psutil.Error:
+            pass
+
+
+def terminate_tree(proc, grace_period: float = DEFAULT_GRACE_PERIOD):
+    """Stop a process started by a launcher together with all its descendants
+
+    Sends SIGTERM to the process group and every known descendant, waits up
+    to ``grace_period`` seconds, then sends SIGKILL to whatever is left.
+    """
+    if not hasattr(os, "killpg"):
+        proc.kill()
+        proc.wait()
+        return
+
+    try:
+        descendants = psutil.Process(proc.pid).children(recursive=True)
+    except psutil.Error:
+        descendants = []
+
+    _signal_tree(proc.pid, descendants, signal.SIGTERM)
+    deadline = time.monotonic() + grace_period
+    try:
+        proc.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        pass
+    psutil.wait_procs(descendants, timeout=max(0.0, deadline - time.monotonic()))
+
+    # Anything still in the group or still running gets no more grace
+    _signal_tree(proc.pid, [p for p in descendants if p.is_running()], signal.SIGKILL)
+    proc.wait()
+
+
+def stream_process(
+    cmd: List[str],
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    log_path: Optional[str] = None,
+    tee: bool = True,
+    max_buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+    timeout: Optional[float] = None,
+    launcher: Optional[Callable[..., Any]] = None,
+    grace_period: float = DEFAULT_GRACE_PERIOD,
+    stdin: Optional[int] = subprocess.DEVNULL,
+) -> RunResult:
+    """Run a command, streaming its output
+
+    Output is written to the console as it arrives (``tee``), appended to
+    ``log_path`` in full, and only the last ``max_buffer_bytes`` of each
+    stream are kept in memory.
+
+    Args:
+        cmd: Command to run
+        cwd: Working directory
+        env: Environment, defaults to the current one
+        log_path: File receiving the complete interleaved output
+        tee: Echo output to this process's stdout/stderr
+        max_buffer_bytes: In-memory tail size per stream
+        timeout: Seconds before the process tree is stopped
+        launcher: Callable starting the process, see :func:`popen_launcher`;
+            it must return an object with ``pid``, ``wait``, ``kill`` and
+            ``returncode``, and optionally ``rusage``
+        grace_period: Seconds between SIGTERM and SIGKILL on timeout or
+            Ctrl-C; :exc:`KeyboardInterrupt` is re-raised once the tree is gone
+        stdin: Input of the process, as for :func:`popen_launcher`; None
+            lets interactive scripts read this process's stdin
+
+    Returns:
+        RunResult with exit code, output tails, log location and resources
+    """
+    env = dict(os.environ if env is None else env)
+    env.setdefault("PYTHONUNBUFFERED", "1")
+
+    launcher = launcher or popen_launcher
+    log_file = open(log_path, "wb") if log_path else None
+    log_lock = threading.Lock()
+    buffers = [RingBuffer(max_buffer_bytes), RingBuffer(max_buffer_bytes)]
+    pipes = [os.pipe(), os.pipe()]
+    start = time.monotonic()
+    try:
+        try:
+            proc = launcher(cmd, cwd, env, pipes[0][1], pipes[1][1], stdin)
+        finally:
+            for _, write_fd in pipes:
+                os.close(write_fd)
+        pumps = [
+            threading.Thread(
+                target=_pump,
+                args=(
+                    os.fdopen(read_fd, "rb"),
+                    buffer,
+                    _console_stream(console) if tee else None,
+                    log_file,
+                    log_lock,
+                ),
+                daemon=True,
+            )
+            for (read_fd, _), buffer, console in zip(
+                pipes, buffers, (sys.stdout, sys.stderr)
+            )
+        ]
+        pipes = []
+        for pump in pumps:
+            pump.start()
+        sampler = TreeSampler(
+            proc.pid,
+            float(os.getenv("DIGY_SAMPLE_INTERVAL", str(DEFAULT_SAMPLE_INTERVAL))),
+        )
+        sampler.start()
+
+        timed_out = interrupted = False
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            terminate_tree(proc, grace_period)
+        except KeyboardInterrupt:
+            interrupted = True
+            terminate_tree(proc, grace_period)
+        duration = time.monotonic() - start
+        sampler.stop()
+        for pump in pumps:
+            # A descendant that escaped termination may still hold the pipes
+            pump.join(timeout=grace_period if timed_out or interrupted else None)
+    finally:
+        for read_fd, _ in pipes:
+            os.close(read_fd)
+        if log_file is not None:
+            with log_lock:
+                log_file.close()
+
+    if interrupted:
+        raise KeyboardInterrupt
+
+    return RunResult(
+        returncode=proc.returncode,
+        stdout=buffers[0].getvalue(),
+        stderr=buffers[1].getvalue(),
+        log_path=log_path,
+        truncated=any(b.truncated for b in buffers),
+        timed_out=timed_out,
+        duration=duration,
+        survivors=sampler.survivors(),
+        resources=ResourceUsage(
+            wall_time=duration,
+            tree_peak_rss=sampler.peak_rss,
+            **(getattr(proc, "rusage", None) or {}),
+        ),
+    )
+
+
+SUMMARY_FIELDS = [
+    "index",
+    "file",
+    "args",
+    "returncode",
+    "success",
+    "timed_out",
+    "duration",
+    "user_time",
+    "system_time",
+    "max_rss",
+    "tree_peak_rss",
+    "block_in",
+    "block_out",
+    "voluntary_switches",
+    "involuntary_switches",
+    "log_path",
+    "error",
+]
+
+
+def write_summary(rows: List[Dict[str, Any]], path: str):
+    """Write run summary rows as CSV (``.csv``) or JSON (anything else)"""
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "args": shlex.join(row.get("args") or [])})
+    else:
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,74 @@
+"""
+Summary statistics for DIGY timings
+Percentiles and summaries shared by benchmarks and run statistics
+"""
+
+import math
+import random
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Percentiles reported by summarize()
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Get the q-th percentile with linear interpolation between samples
+
+    Matches the default method of ``numpy.percentile``.
+    """
+    if not values:
+        raise ValueError("percentile of an empty sequence")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """Summarize samples: count, min, max, mean, stdev, median and percentiles"""
+    samples: List[float] = list(values)
+    if not samples:
+        return {"count": 0}
+    mean = sum(samples) / len(samples)
+    variance = (
+        sum((v - mean) ** 2 for v in samples) / (len(samples) - 1)
+        if len(samples) > 1
+        else 0.0
+    )
+    summary = {
+        "count": len(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": mean,
+        "stdev": math.sqrt(variance),
+        "median": percentile(samples, 50),
+    }
+    for q in PERCENTILES[1:]:
+        summary[f"p{q}"] = percentile(samples, q)
+    return summary
+
+
+def bootstrap_ci(
+    base: Sequence[float],
+    head: Sequence[float],
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> Tuple[float, float]:
+    """Bootstrap confidence interval of the difference in medians (head - base)
+
+    Both samples are resampled with replacement; the interval holds the
+    central ``confidence`` share of the resampled differences. The generator
+    is seeded, so the same samples always give the same interval.
+    """
+    if not base or not head:
+        raise ValueError("bootstrap of an empty sequence")
+    rng = random.Random(seed)
+    differences = [
+        percentile(rng.choices(head, k=len(head)), 50)
+        - percentile(rng.choices(base, k=len(base)), 50)
+        for _ in range(resamples)
+    ]
+    tail = (1 - confidence) / 2 * 100
+    return percentile(differences, tail), percentile(differences, 100 - tail)
@@ -0,0 +1,273 @@
+"""
+Synthetic repositories for DIGY
+Deterministically generates large Git repositories on local disk for scale
+testing and benchmarks
+
+Content is streamed into ``git fast-import``, so a repository with hundreds
+of thousands of files and a commit history is built without writing a
+working tree. The same :class:`RepoSpec` always gives the same commits.
+Requirements are pure-Python wheels, committed to the repository or written
+to a local wheelhouse, and installed with ``--no-index``, so nothing needs
+the network.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import random
+import subprocess
+import time
+import zipfile
+from dataclasses import asdict, dataclass
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+ENTRY_POINT = "main.py"
+
+# Directory holding the wheels a synthetic repository requires
+WHEELHOUSE = "wheels"
+
+AUTHOR = "DIGY Synthetic <synthetic@digy.invalid>"
+
+# Commit time of the first commit; later commits follow an hour apart
+EPOCH = 1704067200  # 2024-01-01T00:00:00Z
+
+# Fixed zip timestamp, so wheels are byte-for-byte reproducible
+ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+
+
+@dataclass
+class RepoSpec:
+    """Shape of a synthetic repository
+
+    Args:
+        files: Python modules besides the entry point
+        depth: Directory levels the modules are spread over
+        fanout: Subdirectories per directory
+        binaries: Binary files under ``assets/``
+        binary_size: Bytes per binary file (random, so incompressible)
+        requirements: Local wheels listed in ``requirements.txt``
+        vendor_wheels: Commit the wheels to the repository; otherwise pip
+            needs a wheelhouse, see :func:`write_wheelhouse`
+        commits: Commits in the history; each after the first changes
+            ``changes`` modules
+        changes: Modules modified per commit after the first
+        seed: Seed for all generated content
+    """
+
+    files: int = 100
+    depth: int = 3
+    fanout: int = 4
+    binaries: int = 0
+    binary_size: int = 1024 * 1024
+    requirements: int = 0
+    vendor_wheels: bool = True
+    commits: int = 1
+    changes: int = 10
+    seed: int = 0
+
+
+def wheel_bytes(name: str, version: str = "1.0") -> Tuple[str, bytes]:
+    """Build a minimal pure-Python wheel with one module
+
+    Returns:
+        Tuple of (wheel file name, wheel content)
+    """
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": f'VERSION = "{version}"\n',
+        f"{dist_info}/METADATA": (
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+        ),
+        f"{dist_info}/WHEEL": (
+            "Wheel-Version: 1.0\nGenerator: digy\n"
+            "Root-Is-Purelib: true\nTag: py3-none-any\n"
+        ),
+    }
+    record = []
+    for path, content in files.items():
+        digest = hashlib.sha256(content.encode()).digest()
+        encoded = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+        record.append(f"{path},sha256={encoded},{len(content.encode())}")
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as wheel:
+        for path, content in files.items():
+            wheel.writestr(zipfile.ZipInfo(path, ZIP_DATE), content)
+    return f"{name}-{version}-py3-none-any.whl", buffer.getvalue()
+
+
+def write_wheel(directory: str, name: str, version: str = "1.0") -> str:
+    """Write a minimal pure-Python wheel to a directory
+
+    Returns:
+        Path of the wheel
+    """
+    filename, content = wheel_bytes(name, version)
+    path = os.path.join(directory, filename)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def requirement_names(spec: RepoSpec) -> List[str]:
+    """Distribution names of a repository's requirements"""
+    return [f"digy_synth_pkg{i}" for i in range(spec.requirements)]
+
+
+def write_wheelhouse(directory: str, spec: RepoSpec) -> Dict[str, str]:
+    """Write the wheels a repository requires to a shared directory
+
+    Returns:
+        Environment variables pointing pip at the wheelhouse only
+    """
+    os.makedirs(directory, exist_ok=True)
+    for package in requirement_names(spec):
+        write_wheel(directory, package)
+    return {"PIP_NO_INDEX": "1", "PIP_FIND_LINKS": os.path.abspath(directory)}
+
+
+def module_path(index: int, spec: RepoSpec) -> str:
+    """Path of the index-th module"""
+    parts = [
+        f"d{(index // spec.fanout ** level) % spec.fanout}"
+        for level in range(spec.depth)
+    ]
+    return "/".join(["pkg", *parts, f"mod_{index}.py"])
+
+
+def module_name(index: int, spec: RepoSpec) -> str:
+    """Dotted import name of the index-th module"""
+    return module_path(index, spec)[: -len(".py")].replace("/", ".")
+
+
+def module_source(index: int, revision: int, spec: RepoSpec, rng: random.Random) -> str:
+    """Source of a module; some modules import an earlier one"""
+    lines = ["import os\n"]
+    if index and rng.random() < 0.25:
+        lines.append(f"import {module_name(rng.randrange(index), spec)}\n")
+    lines.append(
+        f"\n\ndef func_{index}(value):\n"
+        f'    """Function {index}, revision {revision}"""\n'
+        f"    return value + {index + revision}\n"
+    )
+    return "".join(lines)
+
+
+def initial_files(spec: RepoSpec, rng: random.Random) -> Iterator[Tuple[str, bytes]]:
+    """Files of the first commit, in a fixed order"""
+    packages = requirement_names(spec)
+    yield "README.md", (
+        f"# Synthetic repository\n\nGenerated by DIGY from {asdict(spec)}\n"
+    ).encode()
+    entry = "".join(f"import {package}\n" for package in packages)
+    yield ENTRY_POINT, (entry + 'print("synthetic ok")\n').encode()
+    if packages:
+        requirements = "".join(f"{package}==1.0\n" for package in packages)
+        if spec.vendor_wheels:
+            # --find-links is resolved relative to the requirements file
+            requirements = f"--no-index\n--find-links {WHEELHOUSE}\n" + requirements
+        yield "requirements.txt", requirements.encode()
+        for package in packages if spec.vendor_wheels else ():
+            filename, content = wheel_bytes(package)
+            yield f"{WHEELHOUSE}/{filename}", content
+    for i in range(spec.files):
+        yield module_path(i, spec), module_source(i, 0, spec, rng).encode()
+    for i in range(spec.binaries):
+        yield f"assets/blob_{i}.bin", rng.randbytes(spec.binary_size)
+
+
+def _write_data(stream: IO[bytes], content: bytes):
+    stream.write(b"data %d\n" % len(content))
+    stream.write(content)
+    stream.write(b"\n")
+
+
+def _write_commit(
+    stream: IO[bytes],
+    number: int,
+    message: str,
+    changes: Iterator[Tuple[str, bytes]],
+):
+    """Write one fast-import commit with inline file contents"""
+    stamp = EPOCH + number * 3600
+    stream.write(b"commit refs/heads/main\n")
+    stream.write(b"mark :%d\n" % (number + 1))
+    stream.write(f"author {AUTHOR} {stamp} +0000\n".encode())
+    stream.write(f"committer {AUTHOR} {stamp} +0000\n".encode())
+    _write_data(stream, message.encode())
+    if number:
+        stream.write(b"from :%d\n" % number)
+    count = 0
+    for path, content in changes:
+        stream.write(f"M 100644 inline {path}\n".encode())
+        _write_data(stream, content)
+        count += 1
+    stream.write(b"\n")
+    return count
+
+
+def write_history(stream: IO[bytes], spec: RepoSpec) -> Dict[str, int]:
+    """Write the repository's commits as a ``git fast-import`` stream
+
+    Returns:
+        Commit and file counts
+    """
+    rng = random.Random(spec.seed)
+    files = _write_commit(stream, 0, "Initial commit", initial_files(spec, rng))
+    for number in range(1, spec.commits):
+        count = min(spec.changes, spec.files)
+        indexes = sorted(rng.sample(range(spec.files), count)) if count else []
+        _write_commit(
+            stream,
+            number,
+            f"Update {count} modules",
+            (
+                (module_path(i, spec), module_source(i, number, spec, rng).encode())
+                for i in indexes
+            ),
+        )
+    return {"commits": max(spec.commits, 1), "files": files}
+
+
+def generate_repo(path: str, spec: Optional[RepoSpec] = None) -> Dict[str, int]:
+    """Create a bare repository at ``path`` from a spec
+
+    Returns:
+        Commit and file counts and the seconds taken
+    """
+    spec = spec or RepoSpec()
+    started = time.perf_counter()
+    subprocess.run(["git", "init", "-q", "--bare", path], check=True)
+    subprocess.run(
+        ["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path, check=True
+    )
+    proc = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"],
+        cwd=path,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=1024 * 1024,
+    )
+    try:
+        counts = write_history(proc.stdin, spec)
+        proc.stdin.write(b"done\n")
+    except BrokenPipeError:
+        counts = {}
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"git fast-import failed: {stderr.decode().strip()}")
+    counts["seconds"] = time.perf_counter() - started
+    return counts
+
+
+def checkout_repo(bare_path: str, dest: str, branch: str = "main") -> str:
+    """Clone a generated repository into a working tree"""
+    subprocess.run(
+        ["git", "clone", "-q", "--branch", branch, f"file://{bare_path}", dest],
+        check=True,
+        capture_output=True,
+    )
+    return dest
@@ -0,0 +1,213 @@
+"""
+Temporary directory ownership for DIGY
+Marks temporary directories with owner lockfiles and reclaims orphaned ones
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+import psutil
+
+# Prefix shared by digy_*, digy_venv_*, digy_zip_* and digy_ram
+TEMP_PREFIX = "digy_"
+
+LOCK_PREFIX = ".digy-lock."
+
+# Unmarked directories younger than this are left alone
+DEFAULT_MIN_AGE = 24 * 3600.0
+
+
+class Orphan(NamedTuple):
+    """A temporary directory no live DIGY session owns"""
+
+    path: str
+    reason: str
+    age: float
+    size: int = 0
+    mounted: bool = False
+
+
+def _process_start(pid: int) -> Optional[float]:
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+def claim(path: str):
+    """Mark ``path`` as owned by the current process"""
+    pid = os.getpid()
+    with open(os.path.join(path, f"{LOCK_PREFIX}{pid}"), "w") as f:
+        json.dump(
+            {"pid": pid, "started": _process_start(pid), "created": time.time()}, f
+        )
+
+
+def release(path: str):
+    """Drop the current process's ownership of ``path``"""
+    try:
+        os.unlink(os.path.join(path, f"{LOCK_PREFIX}{os.getpid()}"))
+    except OSError:
+        pass
+
+
+def make_temp_dir(prefix: str = TEMP_PREFIX) -> str:
+    """Create a temporary directory owned by the current process"""
+    path = tempfile.mkdtemp(prefix=prefix)
+    claim(path)
+    return path
+
+
+def lock_owners(path: str) -> Optional[List[int]]:
+    """Get the live owners of ``path``
+
+    Returns:
+        List of owner PIDs that are still running (the same process, not a
+        reused PID), or None if ``path`` has no lockfiles at all
+
+    Raises:
+        OSError: If ``path`` or a lockfile cannot be read, so whether it is
+            still owned is unknown
+    """
+    names = [n for n in os.listdir(path) if n.startswith(LOCK_PREFIX)]
+    if not names:
+        return None
+
+    owners = []
+    for name in names:
+        try:
+            with open(os.path.join(path, name)) as f:
+                lock = json.load(f)
+            pid = int(lock["pid"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            # Released meanwhile, or not a lock DIGY wrote
+            continue
+        started = _process_start(pid)
+        if started is None:
+            continue
+        if lock.get("started") is not None and abs(started - lock["started"]) > 1:
+            continue
+        owners.append(pid)
+    return owners
+
+
+def dir_size(path: str) -> int:
+    """Get the disk space used by a directory tree, in bytes"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return total
+
+
+def find_orphans(
+    root: Optional[str] = None,
+    min_age: float = DEFAULT_MIN_AGE,
+    with_sizes: bool = False,
+    max_workers: Optional[int] = None,
+) -> List[Orphan]:
+    """Find DIGY temporary directories that no live session owns
+
+    A directory is orphaned when all owners recorded in its lockfiles have
+    exited, or when it has no lockfiles and is older than ``min_age``
+    seconds (sessions from before lockfiles were written).
+
+    Args:
+        root: Directory to scan, defaults to the system temp directory
+        min_age: Minimum age of directories without lockfiles
+        with_sizes: Also measure reclaimable bytes (walks each tree)
+        max_workers: Threads used to measure sizes
+    """
+    root = root or tempfile.gettempdir()
+    now = time.time()
+    orphans = []
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return []
+
+    for entry in entries:
+        if not entry.name.startswith(TEMP_PREFIX):
+            continue
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            age = now - entry.stat(follow_symlinks=False).st_mtime
+        except OSError:
+            continue
+
+        try:
+            owners = lock_owners(entry.path)
+        except OSError:
+            # Possibly a live session's, leave it alone
+            continue
+        if owners:
+            continue
+        if owners is None:
+            if age < min_age:
+                continue
+            reason = "no owner, stale"
+        else:
+            reason = "owner exited"
+        orphans.append(
+            Orphan(entry.path, reason, age, mounted=os.path.ismount(entry.path))
+        )
+
+    if with_sizes and orphans:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            sizes = list(pool.map(lambda o: dir_size(o.path), orphans))
+        orphans = [o._replace(size=size) for o, size in zip(orphans, sizes)]
+    return sorted(orphans, key=lambda o: o.path)
+
+
+def _remove(orphan: Orphan) -> Optional[str]:
+    """Remove one orphan; returns an error message on failure"""
+    if orphan.mounted:
+        result = subprocess.run(["umount", orphan.path], capture_output=True, text=True)
+        if result.returncode != 0:
+            return result.stderr.strip() or f"umount failed for {orphan.path}"
+    shutil.rmtree(orphan.path, ignore_errors=True)
+    if os.path.exists(orphan.path):
+        return f"could not remove {orphan.path}"
+    return None
+
+
+def remove_orphans(
+    orphans: List[Orphan], max_workers: Optional[int] = None
+) -> List[Optional[str]]:
+    """Remove orphans in parallel
+
+    Returns:
+        One entry per orphan: None if removed, otherwise the error
+    """
+    if not orphans:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_remove, orphans))
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for display"""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
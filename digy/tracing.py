@@ -0,0 +1,361 @@
+"""
+Phase tracing for DIGY
+Records timed spans around loading, setup and runs as OpenTelemetry JSON Lines
+
+Tracing is off unless ``DIGY_TRACE=true`` (or ``DIGY_TRACE_FILE`` is set)
+or a listener is registered, e.g. by the run history; a disabled
+:func:`span` costs one function call. Each line of the trace file
+is an OTLP/JSON ``ExportTraceServiceRequest`` holding one span, the format
+written by the OpenTelemetry Collector's file exporter.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .version import __version__
+
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "digy_span", default=None
+)
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    """Encode an attribute value as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A timed operation; use through :func:`span`"""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id: Optional[str] = None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent else None
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.export(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode as an OTLP/JSON span"""
+        status = (
+            {"code": STATUS_CODE_ERROR, "message": self.error}
+            if self.error
+            else {"code": STATUS_CODE_OK}
+        )
+        return {
+            "traceId": self.tracer.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _any_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": status,
+        }
+
+
+class _NoopSpan:
+    """Returned by :func:`span` while tracing is off"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Appends finished spans of one session (trace) to a JSON Lines file
+
+    Args:
+        path: Trace file, or None to only pass spans to the listeners
+        forward: Tracer that also exports the spans, e.g. the session's
+            while :func:`trace_to` is active; it calls the listeners instead
+    """
+
+    def __init__(self, path: Optional[str], forward: Optional["Tracer"] = None):
+        self.path = path
+        self.forward = forward
+        self.trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self._resource = {
+            "attributes": [
+                {"key": "service.name", "value": {"stringValue": "digy"}},
+                {"key": "service.version", "value": {"stringValue": __version__}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]
+        }
+
+    def export(self, finished: Span):
+        if self.forward is not None:
+            self.forward.export(finished)
+        else:
+            for listener in _listeners:
+                try:
+                    listener(finished)
+                except Exception:
+                    pass
+        if self.path is None:
+            return
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": self._resource,
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": "digy", "version": __version__},
+                                "spans": [finished.to_otlp()],
+                            }
+                        ],
+                    }
+                ]
+            }
+        )
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+
+_tracer: Optional[Tracer] = None
+_configured = False
+_listeners: List[Callable[[Span], None]] = []
+
+
+def default_trace_path() -> str:
+    """Get the trace file of this session"""
+    from .cache import get_cache_dir
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(get_cache_dir("traces"), f"{stamp}-{os.getpid()}.jsonl")
+
+
+def configure(path: Optional[str] = None, enabled: Optional[bool] = None):
+    """Turn tracing on or off
+
+    Args:
+        path: Trace file, defaults to ``DIGY_TRACE_FILE`` or a new file in the
+            ``traces`` cache directory
+        enabled: Defaults to ``DIGY_TRACE`` (or ``DIGY_TRACE_FILE`` being set)
+    """
+    global _tracer, _configured
+    path = path or os.getenv("DIGY_TRACE_FILE")
+    if enabled is None:
+        enabled = bool(path) or os.getenv("DIGY_TRACE", "false").lower() == "true"
+    if enabled:
+        _tracer = Tracer(path or default_trace_path())
+    else:
+        _tracer = Tracer(None) if _listeners else None
+    _configured = True
+
+
+@contextlib.contextmanager
+def trace_to(path: str) -> Iterator[Tracer]:
+    """Also write the spans finished inside the block to ``path``
+
+    The active tracer, if any, keeps receiving them and is restored
+    afterwards, so a session traced with ``--trace`` loses no spans.
+    """
+    global _tracer
+    previous = get_tracer()
+    tracer = Tracer(path, forward=previous)
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        if _tracer is tracer:
+            _tracer = previous
+
+
+def add_listener(listener: Callable[[Span], None]):
+    """Call ``listener`` with every finished span, traced to a file or not"""
+    global _configured
+    _listeners.append(listener)
+    # Spans are created from the next call on
+    _configured = False
+
+
+def remove_listener(listener: Callable[[Span], None]):
+    """Stop calling a listener added with :func:`add_listener`"""
+    global _configured
+    if listener in _listeners:
+        _listeners.remove(listener)
+        _configured = False
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Get the active tracer, or None while tracing is off"""
+    if not _configured:
+        configure()
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Context manager timing a phase
+
+    Example:
+        with span("pip", requirements=path) as s:
+            result = subprocess.run(...)
+            s.set_attribute("returncode", result.returncode)
+    """
+    tracer = _tracer if _configured else get_tracer()
+    if tracer is None:
+        return NOOP_SPAN
+    return Span(tracer, name, attributes)
+
+
+# Reading traces
+
+
+def read_spans(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the spans of an OTLP JSON Lines file"""
+    with open(path) as f:
+        for line in f:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    yield from scope_spans.get("spans", [])
+
+
+def span_durations(path: str) -> Dict[str, float]:
+    """Seconds per span name in a trace file, summed over repeated spans"""
+    totals: Dict[str, float] = {}
+    for otlp_span in read_spans(path):
+        seconds = (
+            int(otlp_span["endTimeUnixNano"]) - int(otlp_span["startTimeUnixNano"])
+        ) / 1e9
+        totals[otlp_span["name"]] = totals.get(otlp_span["name"], 0.0) + seconds
+    return totals
+
+
+def attribute_dict(otlp_span: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the attributes of an OTLP/JSON span"""
+    result = {}
+    for attribute in otlp_span.get("attributes", []):
+        value = attribute["value"]
+        if "intValue" in value:
+            result[attribute["key"]] = int(value["intValue"])
+        else:
+            result[attribute["key"]] = next(iter(value.values()), None)
+    return result
+
+
+def build_waterfall(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order spans depth-first by start time for a waterfall view
+
+    Returns:
+        Rows with name, depth, start/duration offsets in seconds (relative
+        to the first span of the trace), status and attributes
+    """
+    if not spans:
+        return []
+    by_parent: Dict[str, List[Dict[str, Any]]] = {}
+    ids = {s["spanId"] for s in spans}
+    for s in spans:
+        parent = s.get("parentSpanId") or ""
+        # Spans whose parent was not exported are shown as roots
+        by_parent.setdefault(parent if parent in ids else "", []).append(s)
+    origin = min(int(s["startTimeUnixNano"]) for s in spans)
+
+    rows = []
+
+    def visit(parent_id: str, depth: int):
+        children = sorted(
+            by_parent.get(parent_id, []), key=lambda s: int(s["startTimeUnixNano"])
+        )
+        for s in children:
+            start = int(s["startTimeUnixNano"])
+            rows.append(
+                {
+                    "name": s["name"],
+                    "depth": depth,
+                    "start": (start - origin) / 1e9,
+                    "duration": (int(s["endTimeUnixNano"]) - start) / 1e9,
+                    "error": s.get("status", {}).get("code") == STATUS_CODE_ERROR,
+                    "attributes": attribute_dict(s),
+                }
+            )
+            visit(s["spanId"], depth + 1)
+
+    visit("", 0)
+    return rows
+
+
+def latest_trace_file() -> Optional[str]:
+    """Get the most recent trace file in the cache"""
+    from .cache import get_cache_dir
+
+    directory = get_cache_dir("traces")
+    files = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".jsonl")
+    ]
+    return max(files, key=os.path.getmtime) if files else None
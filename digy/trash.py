@@ -0,0 +1,140 @@
+"""
+Background deletion for DIGY
+Moves directories into a trash directory and deletes them in a detached process
+
+This module is also the deleter program: it is executed directly by the
+interpreter and must only depend on the standard library.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from typing import List, Optional
+
+TRASH_NAME = ".digy_trash"
+
+# Niceness of the deleter process
+DELETER_NICENESS = 19
+
+
+def async_delete_enabled() -> bool:
+    """Whether deletions are handed to a background process"""
+    return (
+        os.getenv("DIGY_ASYNC_DELETE", "true").lower() == "true" and os.name == "posix"
+    )
+
+
+def get_trash_dir(path: str) -> str:
+    """Get a trash directory on the same filesystem as ``path``
+
+    The shared trash in the temp directory is used when it is on the same
+    device, otherwise a trash directory next to ``path``. Renames into it
+    are therefore atomic.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    shared = os.path.join(tempfile.gettempdir(), TRASH_NAME)
+    try:
+        if os.stat(tempfile.gettempdir()).st_dev == os.stat(parent).st_dev:
+            return shared
+    except OSError:
+        pass
+    return os.path.join(parent, TRASH_NAME)
+
+
+def spawn_deleter(trash_dir: str) -> Optional[subprocess.Popen]:
+    """Start a detached, low-priority process emptying ``trash_dir``"""
+    try:
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), trash_dir],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            preexec_fn=lambda: os.nice(DELETER_NICENESS),
+        )
+    except OSError:
+        return None
+
+
+def discard(path: str) -> bool:
+    """Remove a directory without waiting for the deletion
+
+    ``path`` is renamed into a trash directory, which takes constant time,
+    and a background process deletes it. Where that is not possible (not
+    POSIX, ``DIGY_ASYNC_DELETE=false``, a mount point or another filesystem)
+    the directory is deleted synchronously.
+
+    Returns:
+        bool: True if ``path`` no longer exists
+    """
+    if not os.path.lexists(path):
+        return True
+
+    if async_delete_enabled():
+        trash_dir = get_trash_dir(path)
+        target = os.path.join(
+            trash_dir, f"{os.path.basename(path)}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        )
+        try:
+            os.makedirs(trash_dir, exist_ok=True)
+            os.rename(path, target)
+        except OSError:
+            pass
+        else:
+            spawn_deleter(trash_dir)
+            return True
+
+    shutil.rmtree(path, ignore_errors=True)
+    return not os.path.lexists(path)
+
+
+def known_trash_dirs() -> List[str]:
+    """Trash directories a startup sweep looks at"""
+    return [os.path.join(tempfile.gettempdir(), TRASH_NAME)]
+
+
+def sweep() -> int:
+    """Start deleters for trash left behind by crashed sessions
+
+    Only lists a couple of directories, so it is cheap enough to call at
+    every start-up.
+
+    Returns:
+        int: Number of deleters started
+    """
+    if not async_delete_enabled():
+        return 0
+    started = 0
+    for trash_dir in known_trash_dirs():
+        try:
+            if not os.listdir(trash_dir):
+                continue
+        except OSError:
+            continue
+        if spawn_deleter(trash_dir):
+            started += 1
+    return started
+
+
+def empty_trash(trash_dir: str):
+    """Delete everything in ``trash_dir``"""
+    try:
+        entries = os.listdir(trash_dir)
+    except OSError:
+        return
+    for name in entries:
+        path = os.path.join(trash_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    empty_trash(sys.argv[1])
@@ -0,0 +1,257 @@
+"""
+File watcher for DIGY
+Keeps a repository index current while a session is open
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .indexer import IGNORE_FILES, RepoIndex
+from .lazy import LazyConsole
+
+console = LazyConsole()
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# Callback receiving (added, removed, changed) file paths; None means
+# "resync all"
+ChangeCallback = Callable[
+    [Optional[List[str]], Optional[List[str]], Optional[List[str]]], None
+]
+
+
+class InotifyError(OSError):
+    """Raised when inotify cannot be used"""
+
+
+class _Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise InotifyError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+            init1 = libc.inotify_init1
+        except AttributeError as e:
+            raise InotifyError(f"inotify is not supported by libc: {e}")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise InotifyError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise InotifyError(errno, f"inotify_add_watch failed: {os.strerror(errno)}")
+        return wd
+
+    def read_events(self):
+        """Read pending events as (wd, mask, name) tuples"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class IndexWatcher:
+    """Apply filesystem changes to a RepoIndex in a background thread
+
+    Uses inotify on Linux, so work is proportional to the number of
+    changes. Elsewhere, or when inotify watches are exhausted, it falls
+    back to polling ``RepoIndex.refresh`` and ``RepoIndex.restat``, which
+    stat every directory and file.
+    """
+
+    def __init__(
+        self,
+        index: RepoIndex,
+        on_change: Optional[ChangeCallback] = None,
+        poll_interval: float = 2.0,
+    ):
+        self.index = index
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.backend: Optional[str] = None
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread is not None:
+            return
+        try:
+            self._inotify = _Inotify()
+            self._watch_dirs(list(self.index.dirs))
+            self.backend = "inotify"
+            target = self._run_inotify
+        except InotifyError:
+            self._close_inotify()
+            self.backend = "polling"
+            target = self._run_polling
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=target, name="digy-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._close_inotify()
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+    def _watch_dirs(self, rel_dirs: List[str]):
+        for rel_dir in rel_dirs:
+            path = self.index.root
+            if rel_dir:
+                path = os.path.join(path, rel_dir)
+            try:
+                wd = self._inotify.add_watch(path, WATCH_MASK)
+            except InotifyError as e:
+                if e.errno == 28:  # ENOSPC: out of inotify watches
+                    raise
+                continue  # Directory vanished before it could be watched
+            self._watches[wd] = rel_dir
+
+    def _notify(
+        self,
+        added: Optional[List[str]],
+        removed: Optional[List[str]],
+        changed: Optional[List[str]] = None,
+    ):
+        if self.on_change is None:
+            return
+        if added is not None and not added and not removed and not changed:
+            return
+        try:
+            self.on_change(added, removed, changed)
+        except Exception as e:
+            console.print(f"⚠️ Error applying file changes: {e}")
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            # Edits in place leave directory mtimes alone, so files are checked too
+            rescanned = self.index.refresh()
+            if self.index.restat() or rescanned:
+                self._notify(None, None)
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._inotify.fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                self._apply_events(list(self._inotify.read_events()))
+            except InotifyError:
+                # Ran out of watches while following new directories
+                self._close_inotify()
+                self.backend = "polling"
+                self.index.refresh()
+                self._notify(None, None)
+                self._run_polling()
+                return
+
+    def _apply_events(self, events):
+        added: List[str] = []
+        removed: List[str] = []
+        changed: List[str] = []
+        with self.index.lock:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped, fall back to a directory rescan
+                    self.index.refresh()
+                    self._watch_dirs(list(self.index.dirs))
+                    self._notify(None, None)
+                    return
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                rel_dir = self._watches.get(wd)
+                if rel_dir is None or not name:
+                    continue
+
+                rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                if name in IGNORE_FILES:
+                    # Ignore rules changed, rebuild and watch any new directories
+                    self.index.build()
+                    self._watch_dirs(list(self.index.dirs))
+                    self._notify(None, None)
+                    return
+
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed.extend(self.index.remove_path(rel_path))
+                elif mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        new_files, new_dirs = self.index.add_tree(rel_path)
+                        added.extend(new_files)
+                        self._watch_dirs(new_dirs)
+                elif self.index.update_file(rel_path):
+                    added.append(rel_path)
+                elif rel_path in self.index.entries:
+                    changed.append(rel_path)
+
+        # A file created and deleted within one batch is neither
+        net_added = [p for p in added if p in self.index.entries]
+        net_removed = [p for p in removed if p not in self.index.entries]
+        net_changed = [
+            p
+            for p in dict.fromkeys(changed)
+            if p in self.index.entries and p not in net_added
+        ]
+        self._notify(net_added, net_removed, net_changed)
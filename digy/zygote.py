@@ -0,0 +1,368 @@
+"""
+Zygote interpreter for DIGY
+Keeps a pre-imported interpreter per venv and forks it for each script run
+
+This module is also the server program: it is executed by the venv's
+interpreter and must only depend on the standard library.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Seconds to wait for the server socket to appear
+START_TIMEOUT = 10.0
+
+# Seconds between checks for a dead parent while idle
+IDLE_POLL = 1.0
+
+RECV_SIZE = 64 * 1024
+
+# Bytes per unit of ru_maxrss: kilobytes on Linux, bytes on macOS
+MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+class ZygoteError(RuntimeError):
+    """Raised when the zygote server cannot be started or reached"""
+
+
+def _read_line(sock: socket.socket, buffer: bytearray) -> bytes:
+    """Read one newline-terminated message, keeping any remainder"""
+    while b"\n" not in buffer:
+        data = sock.recv(RECV_SIZE)
+        if not data:
+            raise ZygoteError("Zygote connection closed")
+        buffer.extend(data)
+    line, _, rest = bytes(buffer).partition(b"\n")
+    buffer[:] = rest
+    return line
+
+
+def _send(sock: socket.socket, message: Dict):
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+# Server side
+
+
+def _run_child(
+    request: Dict, stdout_fd: int, stderr_fd: int, stdin_fd: Optional[int] = None
+):
+    """Execute a script in the forked child; never returns
+
+    The child reads ``stdin_fd`` as its stdin, or /dev/null if None.
+    """
+    import runpy
+    import traceback
+
+    code = 0
+    try:
+        if stdin_fd is None:
+            stdin_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(stdin_fd, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        for fd in (stdin_fd, stdout_fd, stderr_fd):
+            os.close(fd)
+        # Own session, so the whole tree can be stopped with killpg
+        os.setsid()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        # Unbuffered, like PYTHONUNBUFFERED for a fresh interpreter
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+        sys.stdout.reconfigure(write_through=True)
+        sys.stderr.reconfigure(write_through=True)
+
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        script = request["script"]
+        sys.argv = [script] + request["args"]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    try:
+        import atexit
+
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+
+def _handle(conn: socket.socket):
+    """Serve one run request in a forked handler process; never returns"""
+    code = 1
+    try:
+        # stdout and stderr, then stdin if the script reads the caller's
+        data, fds, _, _ = socket.recv_fds(conn, RECV_SIZE, 3)
+        buffer = bytearray(data)
+        request = json.loads(_read_line(conn, buffer))
+        stdout_fd, stderr_fd = fds[:2]
+        stdin_fd = fds[2] if len(fds) > 2 else None
+
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            _run_child(request, stdout_fd, stderr_fd, stdin_fd)
+        for fd in fds:
+            os.close(fd)
+        _send(conn, {"pid": pid})
+
+        _, status, ru = os.wait4(pid, 0)
+        _send(
+            conn,
+            {
+                "returncode": os.waitstatus_to_exitcode(status),
+                "rusage": {
+                    "user_time": ru.ru_utime,
+                    "system_time": ru.ru_stime,
+                    "max_rss": ru.ru_maxrss * MAXRSS_SCALE,
+                    "block_in": ru.ru_inblock,
+                    "block_out": ru.ru_oublock,
+                    "voluntary_switches": ru.ru_nvcsw,
+                    "involuntary_switches": ru.ru_nivcsw,
+                },
+            },
+        )
+        code = 0
+    finally:
+        os._exit(code)
+
+
+def _reap():
+    """Collect exited handler processes"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def serve(socket_path: str, modules: List[str]):
+    """Preload modules and fork a child for each request on ``socket_path``"""
+    # Do not let DIGY's own modules shadow the application's
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(
+        os.path.abspath(__file__)
+    ):
+        sys.path.pop(0)
+    parent = os.getppid()
+
+    # Bound and listening under a temporary name first, so the socket appears
+    # at ``socket_path`` only once it accepts connections
+    staging = f"{socket_path}.{os.getpid()}"
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(staging)
+    server.listen(16)
+    os.rename(staging, socket_path)
+
+    # Clients may connect while preloading; they are served once it is done
+    for module in modules:
+        try:
+            __import__(module)
+        except BaseException as e:
+            print(f"preload {module} failed: {e!r}", file=sys.stderr)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    server.settimeout(IDLE_POLL)
+    while os.getppid() == parent:
+        _reap()
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            continue
+        conn.settimeout(None)
+        if os.fork() == 0:
+            server.close()
+            _handle(conn)
+        conn.close()
+
+
+# Client side
+
+
+class ZygoteProcess:
+    """A script run by the zygote, with a subset of the Popen interface"""
+
+    def __init__(self, conn: socket.socket):
+        self._conn = conn
+        self._buffer = bytearray()
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[Dict] = None
+        self.pid: int = json.loads(_read_line(conn, self._buffer))["pid"]
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                self.wait(timeout=0)
+            except subprocess.TimeoutExpired:
+                pass
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if self.returncode is not None:
+            return self.returncode
+        self._conn.settimeout(timeout)
+        try:
+            line = _read_line(self._conn, self._buffer)
+        except (socket.timeout, BlockingIOError):
+            raise subprocess.TimeoutExpired("zygote", timeout)
+        finally:
+            self._conn.settimeout(None)
+        message = json.loads(line)
+        self.rusage = message.get("rusage")
+        self.returncode = message["returncode"]
+        self._conn.close()
+        return self.returncode
+
+    def send_signal(self, sig: int):
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class Zygote:
+    """Client for a zygote server running in a virtual environment
+
+    Args:
+        python: Interpreter of the virtual environment
+        socket_path: Unix socket the server listens on
+        modules: Modules imported once before any script runs
+        cwd: Working directory of the server
+        log_path: File receiving the server's own output
+    """
+
+    def __init__(
+        self,
+        python: str,
+        socket_path: str,
+        modules: List[str],
+        cwd: Optional[str] = None,
+        log_path: Optional[str] = None,
+    ):
+        self.python = python
+        self.socket_path = socket_path
+        self.modules = modules
+        self.cwd = cwd
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        """Start the server and wait until its socket accepts connections"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        log = open(self.log_path or os.devnull, "ab")
+        try:
+            self.process = subprocess.Popen(
+                [self.python, os.path.abspath(__file__), self.socket_path]
+                + self.modules,
+                cwd=self.cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+            )
+        except OSError as e:
+            raise ZygoteError(f"Cannot start zygote: {e}") from e
+        finally:
+            log.close()
+
+        deadline = time.monotonic() + START_TIMEOUT
+        while not os.path.exists(self.socket_path):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise ZygoteError("Zygote server did not start")
+            time.sleep(0.01)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def spawn(
+        self,
+        cmd: List[str],
+        cwd: Optional[str],
+        env: Optional[Dict[str, str]],
+        stdout: int,
+        stderr: int,
+        stdin: Optional[int] = subprocess.DEVNULL,
+    ) -> ZygoteProcess:
+        """Run ``cmd`` (interpreter, script, args...) in a forked child
+
+        Matches the launcher signature of :func:`digy.runner.stream_process`;
+        ``stdin`` None passes this process's stdin to the child.
+        """
+        if not self.is_alive():
+            raise ZygoteError("Zygote server is not running")
+        request = {
+            "script": cmd[1],
+            "args": list(cmd[2:]),
+            "cwd": os.path.abspath(cwd or os.getcwd()),
+            "env": dict(os.environ if env is None else env),
+        }
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.socket_path)
+            payload = json.dumps(request).encode() + b"\n"
+            fds = [stdout, stderr]
+            if stdin is None:
+                # Inherit, as Popen does; a closed stdin leaves no input
+                try:
+                    os.fstat(0)
+                    stdin = 0
+                except OSError:
+                    stdin = subprocess.DEVNULL
+            if stdin != subprocess.DEVNULL:
+                fds.append(stdin)
+            socket.send_fds(conn, [payload], fds)
+            return ZygoteProcess(conn)
+        except OSError as e:
+            conn.close()
+            raise ZygoteError(f"Zygote request failed: {e}") from e
+
+    def stop(self):
+        """Stop the server; running children are left to finish"""
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], sys.argv[2:])
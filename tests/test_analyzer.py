@@ -0,0 +1,158 @@
+"""Tests for DIGY file analyzer."""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from digy.analyzer import FileAnalyzer, MetadataCache, analyze_source
+
+SAMPLE = """
+import argparse
+import os, sys as system
+from .helpers import util
+from pathlib import Path
+
+
+class Runner:
+    pass
+
+
+def main():
+    import json
+    parser = argparse.ArgumentParser()
+
+
+if "__main__" == __name__:
+    main()
+"""
+
+
+class TestAnalyzeSource:
+    """Test ast-based source analysis"""
+
+    def test_analyze_source(self):
+        """Test main guard, imports, definitions and CLI usage"""
+        info = analyze_source(SAMPLE)
+
+        assert info["has_main"] is True
+        assert info["functions"] == ["main"]
+        assert info["classes"] == ["Runner"]
+        assert info["uses_argparse"] is True
+        assert info["uses_click"] is False
+        assert "import os, sys as system" in info["imports"]
+        assert "from .helpers import util" in info["imports"]
+        assert info["modules"] == [
+            "argparse",
+            "os",
+            "sys",
+            ".helpers",
+            ".helpers.util",
+            "pathlib",
+            "pathlib.Path",
+            "json",
+        ]
+
+    def test_main_guard_in_string_is_not_main(self):
+        """Test a main guard inside a string literal is not detected"""
+        info = analyze_source('DOC = """if __name__ == "__main__":"""\n')
+        assert info["has_main"] is False
+
+    def test_syntax_error(self):
+        """Test unparsable files report the error"""
+        info = analyze_source("def broken(:\n")
+        assert info["syntax_error"]
+        assert info["imports"] == []
+
+
+class TestFileAnalyzer:
+    """Test cached, parallel analysis"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = MetadataCache(os.path.join(self.cache_dir, "meta.sqlite"))
+        self.files = {}
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"mod{i}.py")
+            with open(path, "w") as f:
+                f.write(f"import os\nVALUE = {i}\n")
+            st = os.stat(path)
+            self.files[f"mod{i}.py"] = (st.st_size, st.st_mtime)
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_results_are_cached_persistently(self):
+        """Test a second analyzer reuses stored results"""
+        results = FileAnalyzer(self.temp_dir, self.cache).analyze(self.files)
+        assert results["mod0.py"]["imports"] == ["import os"]
+
+        with patch("digy.analyzer.analyze_path") as mock_analyze:
+            again = FileAnalyzer(self.temp_dir, self.cache).analyze(self.files)
+            mock_analyze.assert_not_called()
+        assert again == results
+
+    def test_changed_files_are_reanalyzed(self):
+        """Test a size/mtime change invalidates the cached entry"""
+        analyzer = FileAnalyzer(self.temp_dir, self.cache)
+        analyzer.analyze(self.files)
+
+        with open(os.path.join(self.temp_dir, "mod0.py"), "w") as f:
+            f.write("import sys\n")
+        st = os.stat(os.path.join(self.temp_dir, "mod0.py"))
+        self.files["mod0.py"] = (st.st_size, st.st_mtime + 1)
+
+        results = analyzer.analyze(self.files)
+        assert results["mod0.py"]["imports"] == ["import sys"]
+
+    def test_clones_share_results(self):
+        """Test another checkout with the same contents reuses the results"""
+        FileAnalyzer(self.temp_dir, self.cache).analyze(self.files)
+        clone = os.path.join(self.cache_dir, "clone")
+        shutil.copytree(self.temp_dir, clone)
+        files = {}
+        for name in self.files:
+            os.utime(os.path.join(clone, name), (1, 1))
+            files[name] = (self.files[name][0], 1)
+
+        with patch("digy.analyzer.analyze_path") as mock_analyze:
+            results = FileAnalyzer(clone, self.cache).analyze(files)
+            mock_analyze.assert_not_called()
+        assert results["mod1.py"]["imports"] == ["import os"]
+        with patch("digy.analyzer.file_digest") as mock_digest:
+            FileAnalyzer(clone, self.cache).analyze(files)
+            mock_digest.assert_not_called()
+
+    def test_prune(self):
+        """Test removed checkouts and their unused results are dropped"""
+        FileAnalyzer(self.temp_dir, self.cache).analyze(self.files)
+        self.cache.prune(max_age=0)
+        assert len(self.cache.load(self.temp_dir)) == 4
+
+        shutil.rmtree(self.temp_dir)
+        self.cache.prune(max_age=3600)
+        assert self.cache.load(self.temp_dir) == {}
+        count = "SELECT COUNT(*) FROM analysis"
+        assert self.cache._conn.execute(count).fetchone()[0] == 4
+        self.cache.prune(max_age=0)
+        assert self.cache._conn.execute(count).fetchone()[0] == 0
+
+    @patch("digy.analyzer.PARALLEL_MIN_FILES", 2)
+    def test_parallel_analysis(self):
+        """Test cache misses are analyzed on a process pool"""
+        results = FileAnalyzer(self.temp_dir, self.cache).analyze(
+            self.files, max_workers=2
+        )
+        assert sorted(results) == sorted(self.files)
+        assert all(r["lines"] == 2 for r in results.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
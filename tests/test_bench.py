@@ -0,0 +1,119 @@
+"""Tests for DIGY benchmarks and summary statistics."""
+
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from digy.bench import build_fixture_repo, run_benchmark
+from digy.cli import main
+from digy.loader import GitLoader
+from digy.stats import bootstrap_ci, percentile, summarize
+from digy.synthetic import write_wheel
+
+
+class TestStats:
+    """Test percentiles and summaries"""
+
+    def test_percentile_interpolates(self):
+        """Test values between samples are interpolated like numpy"""
+        values = [4.0, 1.0, 3.0, 2.0]
+        assert percentile(values, 50) == 2.5
+        assert percentile(values, 0) == 1.0
+        assert percentile(values, 100) == 4.0
+        assert percentile(values, 90) == pytest.approx(3.7)
+        with pytest.raises(ValueError):
+            percentile([], 50)
+
+    def test_summarize(self):
+        """Test the summary keys"""
+        summary = summarize([1.0, 2.0, 3.0])
+        assert summary["median"] == 2.0
+        assert summary["stdev"] == 1.0
+        assert set(summary) >= {"count", "min", "max", "mean", "p90", "p95", "p99"}
+        assert summarize([]) == {"count": 0}
+
+    def test_bootstrap_ci(self):
+        """Test the interval brackets the difference and is reproducible"""
+        base = [1.0, 1.2, 0.9, 1.1, 1.0, 1.05]
+        head = [v + 0.5 for v in base]
+
+        low, high = bootstrap_ci(base, head)
+        assert low <= 0.5 <= high
+        assert low > 0
+        assert bootstrap_ci(base, head) == (low, high)
+        assert bootstrap_ci(base, base, confidence=0.9)[0] <= 0
+        with pytest.raises(ValueError):
+            bootstrap_ci([], head)
+
+
+class TestBench:
+    """Test fixture repositories and the benchmark runner"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_write_wheel(self):
+        """Test the wheel lists its files with hashes"""
+        path = write_wheel(self.temp_dir, "demo_pkg")
+
+        with zipfile.ZipFile(path) as wheel:
+            record = wheel.read("demo_pkg-1.0.dist-info/RECORD").decode()
+            assert "demo_pkg/__init__.py,sha256=" in record
+            assert wheel.read("demo_pkg/__init__.py") == b'VERSION = "1.0"\n'
+        with open(path, "rb") as f:
+            first = f.read()
+        with open(write_wheel(self.temp_dir, "demo_pkg"), "rb") as f:
+            assert f.read() == first
+
+    def test_fixture_is_cloned(self):
+        """Test the bare fixture is cloned rather than used in place"""
+        url = build_fixture_repo(self.temp_dir, files=20, depth=2, requirements=1)
+        loader = GitLoader(os.path.join(self.temp_dir, "base"))
+
+        info = loader.parse_repo_url(url)
+        assert info["is_local"] is False
+        assert info["name"] == "fixture"
+
+        repo_path = loader.download_repo(url, "main")
+        assert repo_path == info["local_path"]
+        assert os.path.exists(os.path.join(repo_path, "pkg", "d3", "d1", "mod_7.py"))
+        assert os.path.exists(
+            os.path.join(repo_path, "wheels", "digy_synth_pkg0-1.0-py3-none-any.whl")
+        )
+
+    def test_run_benchmark(self):
+        """Test a pipeline run installs the local wheels without network"""
+        results = run_benchmark(
+            iterations=1,
+            warmup=0,
+            files=10,
+            depth=1,
+            requirements=1,
+            work_dir=self.temp_dir,
+        )
+
+        assert results["fixture"] == {"files": 10, "depth": 1, "requirements": 1}
+        phases = results["phases"]
+        assert list(phases)[-1] == "total"
+        assert {"clone", "discover_files", "venv", "pip", "run"} <= set(phases)
+        assert phases["total"]["median"] >= phases["setup"]["median"]
+
+    def test_bench_command_json(self):
+        """Test --json prints the results only"""
+        results = {"phases": {"total": {"median": 1.0}}}
+        with patch("digy.bench.run_benchmark", return_value=results) as mock_run:
+            result = CliRunner().invoke(main, ["bench", "-n", "3", "--json"])
+
+        assert result.exit_code == 0, result.output
+        assert result.output.startswith("{")
+        assert mock_run.call_args.kwargs["iterations"] == 3
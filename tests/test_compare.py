@@ -0,0 +1,193 @@
+"""Tests for DIGY A/B comparisons between commits."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from digy import compare
+from digy.cli import main
+from digy.compare import (
+    compare_samples,
+    ensure_worktree,
+    requirements_fingerprint,
+    resolve_ref,
+    run_comparison,
+    update_mirror,
+)
+from digy.tempdirs import claim, lock_owners, release
+
+
+def git(cwd, *args):
+    """Run git with a fixed identity"""
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+class TestCompare:
+    """Test worktrees, shared environments and comparisons"""
+
+    def setup_method(self):
+        """Setup a repository with a base branch and a newer main"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(
+            os.environ,
+            {
+                "DIGY_CACHE_DIR": os.path.join(self.temp_dir, "cache"),
+                "DIGY_STATE_DIR": os.path.join(self.temp_dir, "state"),
+                "DIGY_OUTPUT_DIR": os.path.join(self.temp_dir, "runs"),
+            },
+        )
+        self.env.start()
+        self.repo = os.path.join(self.temp_dir, "repo")
+        os.makedirs(self.repo)
+        git(self.repo, "init", "-q", "-b", "main")
+        with open(os.path.join(self.repo, "job.py"), "w") as f:
+            f.write("print('base')\n")
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-qm", "base")
+        git(self.repo, "branch", "base")
+        with open(os.path.join(self.repo, "job.py"), "w") as f:
+            f.write("print('head')\n")
+        git(self.repo, "commit", "-qam", "head")
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.env.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_worktrees_are_cached(self):
+        """Test each commit is checked out once and refreshed when removed"""
+        mirror = update_mirror(self.repo)
+        commit = resolve_ref(mirror, "base")
+        path = ensure_worktree(mirror, commit)
+
+        with open(os.path.join(path, "job.py")) as f:
+            assert f.read() == "print('base')\n"
+        with patch("digy.compare._git", wraps=compare._git) as mock_git:
+            assert ensure_worktree(mirror, commit) == path
+        assert [c.args[0] for c in mock_git.call_args_list] == ["rev-parse"]
+
+        shutil.rmtree(path)
+        assert ensure_worktree(mirror, commit) == path
+        assert os.path.exists(os.path.join(path, "job.py"))
+        assert update_mirror(self.repo) == mirror
+        with pytest.raises(RuntimeError, match="Unknown ref"):
+            resolve_ref(mirror, "missing")
+
+    def test_requirements_fingerprint(self):
+        """Test checkouts share a venv only with equal requirements and no package"""
+        for name, content in (("a", "six\n"), ("b", "six\n"), ("c", "six==1.0\n")):
+            os.makedirs(os.path.join(self.temp_dir, name))
+            with open(os.path.join(self.temp_dir, name, "requirements.txt"), "w") as f:
+                f.write(content)
+
+        def checkout(name, setup_files=()):
+            return SimpleNamespace(
+                repo_path=os.path.join(self.temp_dir, name),
+                requirements_files=["requirements.txt"],
+                setup_files=list(setup_files),
+            )
+
+        assert requirements_fingerprint(checkout("a")) == requirements_fingerprint(
+            checkout("b")
+        )
+        assert requirements_fingerprint(checkout("a")) != requirements_fingerprint(
+            checkout("c")
+        )
+        assert requirements_fingerprint(checkout("a", ["setup.py"])) is None
+
+    def test_cached_venvs_are_locked(self):
+        """Test venvs are set up under a lock and claimed ones are not pruned"""
+        fcntl = pytest.importorskip("fcntl")
+        mirror = update_mirror(self.repo)
+        venvs = os.path.join(os.path.dirname(mirror), "venvs")
+        for i in range(compare.MAX_CACHED_VENVS):
+            os.makedirs(os.path.join(venvs, f"old{i}"))
+            ready = os.path.join(venvs, f"old{i}", compare.VENV_READY)
+            with open(ready, "w"):
+                pass
+            os.utime(ready, (i + 1, i + 1))
+        claim(os.path.join(venvs, "old0"))
+
+        def setup_environment(path):
+            with open(f"{venvs}.lock") as f:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.makedirs(path)
+            return True
+
+        deployer = SimpleNamespace(
+            setup_environment=setup_environment, precompile_process=None
+        )
+        assert compare.prepare_cached_venv(deployer, mirror, "f" * 40)
+
+        assert lock_owners(os.path.join(venvs, "f" * 16)) == [os.getpid()]
+        assert len(os.listdir(venvs)) == compare.MAX_CACHED_VENVS + 1
+
+        release(os.path.join(venvs, "old0"))
+        assert compare.prepare_cached_venv(deployer, mirror, "f" * 40)
+        assert "old0" not in os.listdir(venvs)
+
+    def test_compare_samples(self):
+        """Test a consistent slowdown is significant and noise is not"""
+        base = [{"wall": w, "cpu": 1.0, "rss": 100} for w in (1.0, 1.1, 0.9, 1.0)]
+        head = [{"wall": w, "cpu": 1.0, "rss": 100} for w in (2.0, 2.1, 1.9, 2.0)]
+
+        result = compare_samples(base, head)
+
+        assert result["wall"]["delta"] == pytest.approx(1.0)
+        assert result["wall"]["change"] == pytest.approx(1.0)
+        assert result["wall"]["significant"] is True
+        assert result["cpu"]["significant"] is False
+        assert result["rss"]["ci"] == [0, 0]
+
+    def test_run_comparison(self):
+        """Test both commits run alternately in one cached shared environment"""
+        report = run_comparison(
+            self.repo, "job.py", base="base", head="main", iterations=2, warmup=0
+        )
+
+        assert report["base"]["commit"] != report["head"]["commit"]
+        assert report["shared_environment"] is True
+        assert [len(report["samples"][side]) for side in ("base", "head")] == [2, 2]
+        assert set(report["metrics"]) == {"wall", "cpu", "rss"}
+        assert report["samples"]["head"][0]["rss"] > 0
+        venvs = os.path.join(compare.repo_cache_dir(self.repo), "venvs")
+        (venv,) = os.listdir(venvs)
+        assert os.path.exists(os.path.join(venvs, venv, compare.VENV_READY))
+        assert lock_owners(os.path.join(venvs, venv)) is None
+
+        with patch("digy.deployer.Deployer.setup_environment") as mock_setup:
+            run_comparison(self.repo, "job.py", "base", "main", iterations=1, warmup=0)
+            mock_setup.assert_not_called()
+        with pytest.raises(RuntimeError, match="same commit"):
+            run_comparison(self.repo, "job.py", "main", "HEAD")
+
+    def test_compare_command_json(self):
+        """Test options reach the comparison and --json prints the report only"""
+        report = {"metrics": {}}
+        args = ["compare", self.repo, "job.py", "x", "--base", "v1", "-n", "3"]
+        with patch("digy.compare.run_comparison", return_value=report) as mock_run:
+            assert CliRunner().invoke(main, args).exit_code == 2
+            result = CliRunner().invoke(main, args + ["--head", "v2", "--json"])
+
+        assert result.exit_code == 0, result.output
+        assert result.output.startswith("{")
+        assert mock_run.call_args.kwargs["base"] == "v1"
+        assert mock_run.call_args.kwargs["head"] == "v2"
+        assert mock_run.call_args.kwargs["iterations"] == 3
+        assert mock_run.call_args.kwargs["args"] == ["x"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -2,12 +2,14 @@
 
 import os
 import subprocess
+import sys
 import tempfile
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from digy.deployer import Deployer
+from digy.runner import RunResult
 
 
 class TestDeployer:
@@ -66,6 +68,32 @@ class TestDeployer:
         assert os.path.normpath("requirements.txt") in requirements_files
         # setup_files might be empty if not implemented, so we don't check it
 
+    def test_setup_script_is_a_python_file(self):
+        """Test setup.py is listed as a Python file and a setup file"""
+        with open(os.path.join(self.temp_dir, "setup.py"), "w") as f:
+            f.write("# Test content")
+        self.deployer.discover_files()
+
+        assert self.deployer.python_files == ["setup.py"]
+        assert self.deployer.setup_files == ["setup.py"]
+
+        self.deployer.apply_index_changes([], ["setup.py"])
+        assert self.deployer.python_files == []
+        assert self.deployer.setup_files == []
+        self.deployer.apply_index_changes(["setup.py"], [])
+        assert self.deployer.python_files == ["setup.py"]
+        assert self.deployer.setup_files == ["setup.py"]
+
+    def test_index_changes_replace_lists(self):
+        """Test watcher updates leave lists being iterated untouched"""
+        listed = self.deployer.python_files
+        before = list(listed)
+
+        self.deployer.apply_index_changes(["new.py"], [])
+
+        assert listed == before
+        assert self.deployer.python_files == sorted(before + ["new.py"])
+
     @patch("subprocess.run")
     def test_create_virtual_environment_success(self, mock_run):
         """Test successful virtual environment creation"""
@@ -81,6 +109,38 @@ class TestDeployer:
         mock_run.return_value.stderr = "Test error"
         assert self.deployer.create_virtual_environment() is False
 
+    @patch("digy.deployer.ensure_pip_bootstrap", return_value="/fake/bootstrap")
+    @patch("subprocess.run")
+    def test_create_virtual_environment_fast_path(self, mock_run, mock_bootstrap):
+        """Test venv creation links the cached pip bootstrap instead of ensurepip"""
+        if os.name == "nt":
+            pytest.skip("Fast venv path is POSIX only")
+        mock_run.return_value.returncode = 0
+        with patch.dict(os.environ, {"DIGY_FAST_VENV": "true"}):
+            assert self.deployer.create_virtual_environment() is True
+
+        cmd = mock_run.call_args[0][0]
+        assert "--without-pip" in cmd
+        pth_file = os.path.join(
+            self.deployer._get_site_packages(), "_digy_pip_bootstrap.pth"
+        )
+        with open(pth_file) as f:
+            assert f.read().strip() == "/fake/bootstrap"
+        assert os.access(self.deployer.get_pip_executable(), os.X_OK)
+
+    @patch("digy.deployer.ensure_pip_bootstrap")
+    @patch("subprocess.run")
+    def test_create_virtual_environment_fast_path_disabled(
+        self, mock_run, mock_bootstrap
+    ):
+        """Test DIGY_FAST_VENV=false falls back to a regular venv"""
+        mock_run.return_value.returncode = 0
+        with patch.dict(os.environ, {"DIGY_FAST_VENV": "false"}):
+            assert self.deployer.create_virtual_environment() is True
+
+        assert "--without-pip" not in mock_run.call_args[0][0]
+        mock_bootstrap.assert_not_called()
+
     def test_get_python_executable(self):
         """Test Python executable path detection"""
         self.deployer.venv_path = "/fake/venv"
@@ -149,7 +209,41 @@ class TestDeployer:
         assert result is True  # Should succeed if no requirements
 
     @patch("subprocess.run")
-    def test_run_python_file_success(self, mock_run):
+    def test_install_package_fast(self, mock_run):
+        """Test fast editable install links sources and installs dependencies"""
+        with open(os.path.join(self.temp_dir, "setup.py"), "w") as f:
+            f.write("from setuptools import setup\nsetup(install_requires=['rich'])\n")
+        self.deployer.venv_path = tempfile.mkdtemp()
+        mock_run.return_value.returncode = 0
+
+        assert self.deployer.install_package_fast() is True
+
+        assert mock_run.call_args[0][0][1:] == ["install", "rich"]
+        pth_file = os.path.join(
+            self.deployer._get_site_packages(), "_digy_editable.pth"
+        )
+        with open(pth_file) as f:
+            assert f.read().strip() == os.path.abspath(self.temp_dir)
+
+    @patch("subprocess.run")
+    def test_install_package_fast_falls_back_for_extensions(self, mock_run):
+        """Test packages with compiled extensions use pip install -e"""
+        with open(os.path.join(self.temp_dir, "setup.cfg"), "w") as f:
+            f.write("[options]\ninstall_requires =\n    rich\n")
+        with open(os.path.join(self.temp_dir, "ext.c"), "w") as f:
+            f.write("int x;\n")
+        self.deployer.discover_files()
+        self.deployer.venv_path = "/fake/venv"
+        mock_run.return_value.returncode = 0
+
+        with patch.dict(os.environ, {"DIGY_FAST_EDITABLE": "true"}):
+            assert self.deployer.install_package() is True
+
+        assert mock_run.call_args[0][0][1:] == ["install", "-e", "."]
+
+    @patch("digy.deployer.stream_process")
+    @patch("subprocess.run")
+    def test_run_python_file_success(self, mock_run, mock_stream):
         """Test successful Python file execution"""
         # Create test Python file
         test_file = os.path.join(self.temp_dir, "test.py")
@@ -160,17 +254,21 @@ class TestDeployer:
 
         # Mock successful execution
         mock_run.return_value.returncode = 0
-        mock_run.return_value.stdout = "Hello World\n"
-        mock_run.return_value.stderr = ""
+        mock_stream.return_value = RunResult(
+            returncode=0, stdout="Hello World\n", log_path="/fake/test.log"
+        )
 
         success, stdout, stderr = self.deployer.run_python_file("test.py")
 
         assert success is True
         assert "Hello World" in stdout
         assert stderr == ""
+        assert self.deployer.last_run.log_path == "/fake/test.log"
+        assert mock_stream.call_args[1]["cwd"] == self.temp_dir
 
+    @patch("digy.deployer.stream_process")
     @patch("subprocess.run")
-    def test_run_python_file_failure(self, mock_run):
+    def test_run_python_file_failure(self, mock_run, mock_stream):
         """Test Python file execution failure"""
         # Create test Python file with error
         test_file = os.path.join(self.temp_dir, "error.py")
@@ -186,6 +284,9 @@ class TestDeployer:
         mock_run.return_value.returncode = 1
         mock_run.return_value.stdout = ""
         mock_run.return_value.stderr = "ValueError: Test error"
+        mock_stream.return_value = RunResult(
+            returncode=1, stderr="ValueError: Test error"
+        )
 
         success, stdout, stderr = self.deployer.run_python_file("error.py")
 
@@ -232,6 +333,145 @@ class TestDeployer:
             msg in stderr for msg in ["timed out", "Failed to set up environment"]
         )
 
+    @patch("subprocess.Popen")
+    def test_start_precompile(self, mock_popen):
+        """Test background compileall covers repo files and site-packages"""
+        with open(os.path.join(self.temp_dir, "main.py"), "w") as f:
+            f.write("print('hi')\n")
+        self.deployer.discover_files()
+        self.deployer.venv_path = tempfile.mkdtemp()
+
+        with patch.dict(os.environ, {"DIGY_PRECOMPILE": "true"}):
+            self.deployer.start_precompile()
+
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[1:4] == ["-m", "compileall", "-q"]
+        assert int(cmd[cmd.index("-j") + 1]) >= 1
+        assert cmd[-1] == self.deployer._get_site_packages()
+        with open(cmd[cmd.index("-i") + 1]) as f:
+            assert f.read().split() == [os.path.join(self.temp_dir, "main.py")]
+
+    def test_run_many(self):
+        """Test jobs run in parallel and report results in job order"""
+        with open(os.path.join(self.temp_dir, "job.py"), "w") as f:
+            f.write("import sys\nprint(sys.argv[1:])\nsys.exit(len(sys.argv) - 2)\n")
+        venv = tempfile.mkdtemp()
+        os.makedirs(os.path.join(venv, "bin"))
+        os.symlink(sys.executable, os.path.join(venv, "bin", "python"))
+        self.deployer.venv_path = venv
+
+        with patch.dict(os.environ, {"DIGY_OUTPUT_DIR": venv, "DIGY_STATE_DIR": venv}):
+            rows = self.deployer.run_many(
+                [
+                    ("job.py", ["a"]),
+                    {"file": "job.py", "args": ["a", "b"]},
+                    ("gone.py", []),
+                ],
+                max_workers=2,
+            )
+
+        assert [row["returncode"] for row in rows] == [0, 1, None]
+        assert [row["success"] for row in rows] == [True, False, False]
+        assert rows[2]["error"] == "File not found: gone.py"
+        assert rows[0]["max_rss"] > 0
+        assert len(self.deployer.history.read()) == 2
+        with open(rows[1]["log_path"]) as f:
+            assert f.read() == "['a', 'b']\n"
+        self.deployer.cleanup(force=True)
+
+    @patch("psutil.process_iter")
+    def test_cleanup_checks_own_children(self, mock_process_iter):
+        """Test cleanup waits for tracked scripts instead of scanning the host"""
+        self.deployer.venv_path = tempfile.mkdtemp()
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        self.deployer.register_child(proc, "script")
+        try:
+            self.deployer.cleanup()
+            assert os.path.exists(self.deployer.venv_path)
+        finally:
+            proc.kill()
+            proc.wait()
+
+        venv = self.deployer.venv_path
+        self.deployer.cleanup()
+        assert not os.path.exists(venv)
+        assert self.deployer.children == {}
+        mock_process_iter.assert_not_called()
+
+    def test_run_registers_survivors(self):
+        """Test descendants outliving a script are tracked as orphans"""
+        with open(os.path.join(self.temp_dir, "daemon.py"), "w") as f:
+            f.write(
+                "import subprocess, sys, time\n"
+                "sleep = 'import time; time.sleep(30)'\n"
+                "quiet = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}\n"
+                "subprocess.Popen([sys.executable, '-c', sleep], **quiet)\n"
+                "time.sleep(0.5)\n"
+            )
+        venv = tempfile.mkdtemp()
+        os.makedirs(os.path.join(venv, "bin"))
+        os.symlink(sys.executable, os.path.join(venv, "bin", "python"))
+        self.deployer.venv_path = venv
+
+        with patch.dict(os.environ, {"DIGY_OUTPUT_DIR": venv, "DIGY_STATE_DIR": venv}):
+            result = self.deployer._run_file("daemon.py", [], tee=False)
+
+        orphans = self.deployer.get_active_children(["orphan"])
+        try:
+            assert [p.pid for p in orphans] == result.survivors
+            assert len(orphans) == 1
+        finally:
+            for orphan in orphans:
+                orphan.kill()
+        self.deployer.cleanup(force=True)
+
+    def test_timeout_settings(self):
+        """Test timeouts come from the Deployer, environment or manifest"""
+        with open(os.path.join(self.temp_dir, "manifest.yml"), "w") as f:
+            f.write("config:\n  timeout: 42\n")
+
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("DIGY_TIMEOUT", None)
+            assert self.deployer.get_timeout() == 42
+            assert self.deployer.get_grace_period() == 5
+            os.environ["DIGY_TIMEOUT"] = "0"
+            assert self.deployer.get_timeout() is None
+            self.deployer.timeout = 7
+            assert self.deployer.get_timeout() == 7
+
+    def test_memory_trace_env(self):
+        """Test traced runs put the venv's hook first on PYTHONPATH"""
+        self.deployer.venv_path = os.path.join(self.temp_dir, "venv")
+        os.makedirs(self.deployer.venv_path)
+
+        with patch.dict(os.environ, {"PYTHONPATH": "/opt/lib"}):
+            env = self.deployer._get_memory_trace_env("/tmp/out.memory.json")
+
+        hook_dir = os.path.join(self.deployer.venv_path, "digy_hooks")
+        assert os.path.exists(os.path.join(hook_dir, "sitecustomize.py"))
+        assert env["PYTHONPATH"] == os.pathsep.join([hook_dir, "/opt/lib"])
+        assert env["DIGY_MEMTRACE_OUTPUT"] == "/tmp/out.memory.json"
+
+        with patch.dict(os.environ, {"DIGY_TRACE_MEMORY": "true"}):
+            assert self.deployer.get_trace_memory() is True
+            self.deployer.trace_memory = False
+            assert self.deployer.get_trace_memory() is False
+
+    def test_get_preload_modules(self):
+        """Test zygote preloads third-party imports but not repository modules"""
+        files = {
+            "helpers.py": "import json\n",
+            "main.py": "import helpers\nimport numpy.linalg\nfrom . import x\n",
+        }
+        for name, content in files.items():
+            with open(os.path.join(self.temp_dir, name), "w") as f:
+                f.write(content)
+        self.deployer.discover_files()
+
+        assert self.deployer.get_preload_modules() == ["json", "numpy"]
+        with patch.dict(os.environ, {"DIGY_ZYGOTE_PRELOAD": "pandas, sklearn"}):
+            assert self.deployer.get_preload_modules() == ["pandas", "sklearn"]
+
     def test_get_file_info(self):
         """Test file information extraction"""
         # Create test Python file
@@ -258,6 +498,22 @@ if __name__ == "__main__":
         assert info["has_main"] is True
         assert len(info["imports"]) >= 2  # os, sys imports
 
+    def test_get_file_info_after_edit(self):
+        """Test files edited in place are analyzed again"""
+        test_file = os.path.join(self.temp_dir, "edited.py")
+        with open(test_file, "w") as f:
+            f.write("import os\n")
+        self.deployer.discover_files()
+        assert self.deployer.get_file_info("edited.py")["has_main"] is False
+
+        with open(test_file, "w") as f:
+            f.write("import os\n\nif __name__ == '__main__':\n    pass\n")
+        os.utime(test_file, (1, 1))
+
+        info = self.deployer.get_file_info("edited.py")
+        assert info["has_main"] is True
+        assert info["lines"] == 4
+
     def test_get_file_info_nonexistent(self):
         """Test file information for non-existent file"""
         info = self.deployer.get_file_info("nonexistent.py")
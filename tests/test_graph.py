@@ -0,0 +1,121 @@
+"""Tests for DIGY import graph and entry point ranking."""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from digy.deployer import Deployer
+from digy.graph import ImportGraph, module_name
+
+
+def info(modules=(), has_main=False, uses_argparse=False):
+    """Build a minimal analyzer result"""
+    return {
+        "modules": list(modules),
+        "has_main": has_main,
+        "uses_argparse": uses_argparse,
+        "uses_click": False,
+    }
+
+
+class TestImportGraph:
+    """Test import resolution and ranking"""
+
+    def setup_method(self):
+        """Setup test graph"""
+        self.files = {
+            os.path.join("src", "app", "__init__.py"): info(),
+            os.path.join("src", "app", "cli.py"): info(
+                [".core", "argparse"], uses_argparse=True
+            ),
+            os.path.join("src", "app", "core.py"): info(["app.utils.helper"]),
+            os.path.join("src", "app", "utils.py"): info(["os"]),
+            os.path.join("src", "app", "__main__.py"): info([".cli"]),
+            "run_demo.py": info(["app.core"], has_main=True),
+        }
+        self.graph = ImportGraph(self.files, {"app": "app.cli:main"})
+
+    def test_module_name(self):
+        """Test src layout and packages map to module names"""
+        assert module_name(os.path.join("src", "app", "__init__.py")) == "app"
+        assert module_name(os.path.join("pkg", "mod.py")) == "pkg.mod"
+
+    def test_edges(self):
+        """Test absolute, attribute and relative imports resolve to files"""
+        core = os.path.join("src", "app", "core.py")
+        cli = os.path.join("src", "app", "cli.py")
+        utils = os.path.join("src", "app", "utils.py")
+
+        assert self.graph.imports_of(cli) == [core]
+        assert self.graph.imports_of(core) == [utils]
+        assert self.graph.importers(core) == sorted([cli, "run_demo.py"])
+        assert self.graph.in_degree(utils) == 1
+
+    def test_entry_points_ranked(self):
+        """Test console scripts rank above main guards and libraries are excluded"""
+        ranked = [ep["path"] for ep in self.graph.entry_points()]
+
+        assert ranked == [
+            os.path.join("src", "app", "cli.py"),
+            "run_demo.py",
+            os.path.join("src", "app", "__main__.py"),
+        ]
+        assert self.graph.entry_points(limit=1)[0]["scripts"] == ["app"]
+
+    def test_imported_submodules(self):
+        """Test names imported from a package resolve to its submodules"""
+        files = {
+            os.path.join("pkg", "__init__.py"): info(),
+            os.path.join("pkg", "util.py"): info(),
+            os.path.join("pkg", "api.py"): info([".", ".util"]),
+            "main.py": info(["pkg", "pkg.util", "pkg.missing"], has_main=True),
+        }
+        graph = ImportGraph(files)
+        util = os.path.join("pkg", "util.py")
+
+        assert graph.importers(util) == ["main.py", os.path.join("pkg", "api.py")]
+        assert graph.in_degree(os.path.join("pkg", "__init__.py")) == 2
+        assert graph.resolve("pkg.missing") == os.path.join("pkg", "__init__.py")
+
+
+class TestDeployerEntryPoints:
+    """Test entry point queries through the Deployer"""
+
+    def setup_method(self):
+        """Setup test repository"""
+        self.temp_dir = tempfile.mkdtemp()
+        files = {
+            "lib.py": "def helper():\n    pass\n",
+            "main.py": "import lib\n\nif __name__ == '__main__':\n    lib.helper()\n",
+            "pkg/__init__.py": "",
+            "pkg/util.py": "",
+            "pkg/api.py": "from . import util\n",
+            "tool.py": "from pkg import util\n",
+        }
+        for name, content in files.items():
+            path = os.path.join(self.temp_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def teardown_method(self):
+        """Cleanup test repository"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_get_entry_points(self):
+        """Test the Deployer ranks files from cached analysis"""
+        deployer = Deployer(self.temp_dir)
+
+        assert [ep["path"] for ep in deployer.get_entry_points()] == ["main.py"]
+        graph = deployer.get_import_graph()
+        assert graph.importers("lib.py") == ["main.py"]
+        assert graph.importers(os.path.join("pkg", "util.py")) == [
+            os.path.join("pkg", "api.py"),
+            "tool.py",
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
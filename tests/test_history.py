@@ -0,0 +1,173 @@
+"""Tests for DIGY run history."""
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import fields
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from digy import history, tracing
+from digy.cli import main
+from digy.history import RESOURCE_FIELDS, RunHistory
+from digy.runner import ResourceUsage, RunResult
+
+
+def timed_run(duration: float, max_rss: int = 1024) -> RunResult:
+    """A successful run result with the given duration"""
+    return RunResult(
+        returncode=0,
+        duration=duration,
+        resources=ResourceUsage(wall_time=duration, max_rss=max_rss),
+    )
+
+
+class TestRunHistory:
+    """Test the run history store"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = RunHistory(os.path.join(self.temp_dir, "history.sqlite"))
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.history.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_resource_fields_match(self):
+        """Test every resource usage field has a column"""
+        assert RESOURCE_FIELDS == tuple(f.name for f in fields(ResourceUsage))
+
+    def test_record_run(self):
+        """Test runs are stored with their resource usage"""
+        result = RunResult(
+            returncode=0,
+            duration=1.5,
+            resources=ResourceUsage(wall_time=1.5, user_time=1.0, max_rss=2048),
+        )
+        self.history.record_run("/repo", "main.py", ["-v"], result)
+        self.history.record_run("/repo", "other.py", [], RunResult(returncode=2))
+
+        records = self.history.read()
+        assert [r["file"] for r in records] == ["main.py", "other.py"]
+        assert records[0]["args"] == ["-v"]
+        assert records[0]["user_time"] == 1.0
+        assert records[0]["peak_rss"] == 2048
+        assert records[0]["origin"] == "/repo"
+        assert records[1]["success"] is False
+        assert self.history.read(limit=1) == records[1:]
+
+    def test_regression_is_flagged(self):
+        """Test a run well above the median of earlier runs is flagged"""
+        for duration in (1.0, 1.1, 0.9, 1.0, 1.05):
+            record = self.history.record_run(
+                "/tmp/clone1", "main.py", [], timed_run(duration), origin="git@x:r.git"
+            )
+            assert self.history.check_regression(record) == {}
+
+        normal = self.history.record_run(
+            "/tmp/clone2", "main.py", [], timed_run(1.1), origin="git@x:r.git"
+        )
+        slow = self.history.record_run(
+            "/tmp/clone3", "main.py", [], timed_run(1.5, 4096), origin="git@x:r.git"
+        )
+
+        assert self.history.check_regression(normal) == {}
+        regressions = self.history.check_regression(slow)
+        assert set(regressions) == {"duration", "peak_rss"}
+        assert regressions["duration"]["median"] == pytest.approx(1.025)
+        assert regressions["peak_rss"]["change"] == 3.0
+        assert self.history.check_regression(slow, threshold=5.0) == {}
+        assert [run["id"] for run, _ in self.history.recent_regressions()] == [
+            slow["id"]
+        ]
+
+    def test_statistics(self):
+        """Test per-script, per-phase and per-cache summaries"""
+        for duration in (1.0, 2.0, 3.0):
+            self.history.record_run("/r", "main.py", [], timed_run(duration))
+        self.history.record_run("/r", "main.py", [], RunResult(returncode=1))
+        command = self.history.start_command("run-many", ["run-many", "/r"])
+        self.history.record_phase(command, "run", 0.25)
+        self.history.record_phase(command, "clone", 0.5)
+        self.history.record_cache(command, "analysis", 3, 1)
+        self.history.record_cache(command, "analysis", 4, 0)
+        self.history.finish_command(command, 0, 1.0)
+
+        (script,) = self.history.script_stats(script="main.py")
+        assert script["runs"] == 4
+        assert script["success_rate"] == 0.75
+        assert script["duration"]["median"] == 2.0
+        assert list(self.history.phase_stats()) == ["clone", "run"]
+        assert self.history.cache_stats()["analysis"] == {
+            "hits": 7,
+            "misses": 1,
+            "hit_rate": 0.875,
+        }
+        assert self.history.recent_commands()[0]["exit_code"] == 0
+
+
+class TestCommandHistory:
+    """Test commands recorded by the CLI"""
+
+    def setup_method(self):
+        """Setup test environment with a history of its own"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(
+            os.environ, {"DIGY_STATE_DIR": self.temp_dir, "DIGY_HISTORY": "true"}
+        )
+        self.env.start()
+        self.shared = patch.object(history, "_history", None)
+        self.shared.start()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        history.get_history().close()
+        self.shared.stop()
+        self.env.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_phases_and_exit_code(self):
+        """Test spans become phases of the command and failures are recorded"""
+        command = history.start_command("run-many", ["run-many", "/r"])
+        with tracing.span("clone"):
+            pass
+        history.record_cache("repo-index", misses=1)
+        history.finish_command(2)
+
+        with tracing.span("clone"):
+            pass
+
+        store = history.get_history()
+        assert tracing.span("setup") is tracing.NOOP_SPAN
+        assert store.phase_stats()["clone"]["count"] == 1
+        assert store.cache_stats()["repo-index"]["misses"] == 1
+        (recorded,) = store.recent_commands()
+        assert recorded["id"] == command
+        assert recorded["exit_code"] == 2
+
+    def test_status_and_stats(self):
+        """Test status lists earlier commands and stats shows the runs"""
+        store = history.get_history()
+        store.record_run("/r/demo", "main.py", [], timed_run(0.5))
+
+        result = CliRunner().invoke(main, ["stats", "--json"])
+        assert result.exit_code == 0, result.output
+        stats = json.loads(result.output)
+        assert stats["scripts"][0]["file"] == "main.py"
+
+        with patch("digy.cli.console.print") as mock_print:
+            result = CliRunner().invoke(main, ["status"])
+        assert result.exit_code == 0, result.output
+        table = mock_print.call_args.args[0].renderable
+        rows = dict(zip(table.columns[0]._cells, table.columns[1]._cells))
+        assert rows["Recent Commands"].startswith("stats (")
+        assert rows["Regressions"] == "None"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""Tests for DIGY import-time analysis."""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from digy.importtime import (
+    compare_profiles,
+    flatten,
+    load_profiles,
+    parse_importtime,
+    save_profile,
+    slowest,
+    total_us,
+)
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       200 |        300 | io
+hello from the script
+import time:       171 |        171 |       _json
+import time:       403 |        574 |     json.scanner
+import time:       385 |        959 |   json.decoder
+import time:       454 |        454 |   json.encoder
+import time:      1400 |       2813 | json
+"""
+
+
+class TestImportTime:
+    """Test parsing and storing import profiles"""
+
+    def setup_method(self):
+        """Setup test environment with its own state directory"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"DIGY_STATE_DIR": self.temp_dir})
+        self.env.start()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.env.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_parse_importtime(self):
+        """Test the indentation is turned into a tree"""
+        nodes = parse_importtime(OUTPUT)
+
+        assert [n.name for n in nodes] == ["io", "json"]
+        json_node = nodes[1]
+        assert (json_node.self_us, json_node.cumulative_us) == (1400, 2813)
+        assert [c.name for c in json_node.children] == ["json.decoder", "json.encoder"]
+        assert json_node.children[0].children[0].children[0].name == "_json"
+        assert total_us(nodes) == 3113
+        assert len(flatten(nodes)) == 7
+
+    def test_slowest(self):
+        """Test imports are ranked by cumulative time"""
+        names = [n.name for n in slowest(parse_importtime(OUTPUT), limit=3)]
+        assert names == ["json", "json.decoder", "json.scanner"]
+
+    def test_save_profile_per_commit(self):
+        """Test one profile is kept per commit, newest last"""
+        nodes = parse_importtime(OUTPUT)
+        save_profile("https://example.com/repo.git", "main.py", "aaa", nodes)
+        save_profile("https://example.com/repo.git", "main.py", "bbb", nodes[:1])
+        save_profile("https://example.com/repo.git", "main.py", "aaa", nodes)
+
+        profiles = load_profiles("https://example.com/repo.git", "main.py")
+        assert [p["commit"] for p in profiles] == ["bbb", "aaa"]
+        assert profiles[1]["imports"]["json"] == [1400, 2813]
+        assert load_profiles("https://example.com/repo.git", "other.py") == []
+
+    def test_compare_profiles(self):
+        """Test the largest changes come first"""
+        previous = {"imports": {"json": [1, 1000], "io": [1, 300]}}
+        current = {"imports": {"json": [1, 5000], "yaml": [1, 200]}}
+
+        changes = compare_profiles(previous, current)
+        assert [c["name"] for c in changes] == ["json", "io", "yaml"]
+        assert changes[0]["after_us"] - changes[0]["before_us"] == 4000
@@ -0,0 +1,235 @@
+"""Tests for DIGY repository indexer."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from digy.indexer import (
+    KIND_OTHER,
+    KIND_PYTHON,
+    KIND_REQUIREMENTS,
+    KIND_SETUP,
+    RepoIndex,
+    is_ignored,
+    parse_ignore_lines,
+)
+
+
+def write_file(root: str, rel_path: str, content: str = ""):
+    """Write a file below root, creating parent directories"""
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestIgnoreRules:
+    """Test gitignore pattern matching"""
+
+    def test_basename_pattern(self):
+        """Test patterns without a slash match at any depth"""
+        rules = parse_ignore_lines(["*.log"])
+        assert is_ignored(rules, "app.log", False)
+        assert is_ignored(rules, "a/b/app.log", False)
+        assert not is_ignored(rules, "app.py", False)
+
+    def test_anchored_and_dir_only(self):
+        """Test leading slash anchors and trailing slash limits to dirs"""
+        rules = parse_ignore_lines(["/out", "cache/"])
+        assert is_ignored(rules, "out", True)
+        assert not is_ignored(rules, "sub/out", True)
+        assert is_ignored(rules, "sub/cache", True)
+        assert not is_ignored(rules, "sub/cache", False)
+
+    def test_negation_and_double_star(self):
+        """Test the last matching rule wins and ** spans directories"""
+        rules = parse_ignore_lines(["docs/**/*.py", "!docs/**/keep.py"])
+        assert is_ignored(rules, "docs/a/b/gen.py", False)
+        assert not is_ignored(rules, "docs/a/keep.py", False)
+
+    def test_rules_relative_to_base(self):
+        """Test nested ignore files only apply below their directory"""
+        rules = parse_ignore_lines(["/data"], base="pkg")
+        assert is_ignored(rules, "pkg/data", True)
+        assert not is_ignored(rules, "data", True)
+
+
+class TestRepoIndex:
+    """Test RepoIndex building, refreshing and persistence"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"DIGY_CACHE_DIR": self.cache_dir})
+        self.env.start()
+        for rel_path in [
+            "main.py",
+            "setup.py",
+            "requirements.txt",
+            "README.md",
+            "pkg/core.py",
+            "pkg/generated/out.py",
+            "build/lib/old.py",
+            ".git/config",
+        ]:
+            write_file(self.temp_dir, rel_path, "x = 1\n")
+        write_file(self.temp_dir, ".gitignore", "generated/\n")
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.env.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_build_classifies_and_ignores(self):
+        """Test files are classified and ignore rules applied"""
+        index = RepoIndex(self.temp_dir)
+        index.build()
+
+        assert index.files_of_kind(KIND_PYTHON) == [
+            "main.py",
+            os.path.join("pkg", "core.py"),
+            "setup.py",
+        ]
+        assert index.files_of_kind(KIND_SETUP) == ["setup.py"]
+        assert index.files_of_kind(KIND_REQUIREMENTS) == ["requirements.txt"]
+        assert "README.md" in index.files_of_kind(KIND_OTHER)
+        assert index.entries["main.py"].size == len("x = 1\n")
+
+    def test_digyignore_can_reinclude_defaults(self):
+        """Test .digyignore can re-include a default-ignored directory"""
+        write_file(self.temp_dir, ".digyignore", "!build/\n")
+        index = RepoIndex(self.temp_dir)
+        index.build()
+
+        assert os.path.join("build", "lib", "old.py") in index.entries
+
+    def test_save_and_load(self):
+        """Test a persisted index round-trips"""
+        index = RepoIndex(self.temp_dir)
+        index.build()
+        index.save()
+
+        loaded = RepoIndex.load(self.temp_dir)
+        assert loaded is not None
+        assert loaded.entries == index.entries
+        assert loaded.refresh() == 0
+
+    def test_refresh_rescans_changed_directories(self):
+        """Test refresh picks up added and removed files"""
+        index = RepoIndex(self.temp_dir)
+        index.build()
+
+        write_file(self.temp_dir, "pkg/new.py")
+        write_file(self.temp_dir, "pkg/sub/deep.py")
+        os.remove(os.path.join(self.temp_dir, "main.py"))
+        os.utime(os.path.join(self.temp_dir, "pkg"), (0, 0))
+        os.utime(self.temp_dir, (0, 0))
+
+        assert index.refresh() == 2
+        python_files = index.files_of_kind(KIND_PYTHON)
+        assert "main.py" not in python_files
+        assert os.path.join("pkg", "new.py") in python_files
+        assert os.path.join("pkg", "sub", "deep.py") in python_files
+
+    def test_restat_edited_files(self):
+        """Test restat picks up files edited in place"""
+        index = RepoIndex(self.temp_dir)
+        index.build()
+        mtime = os.stat(self.temp_dir).st_mtime
+
+        write_file(self.temp_dir, "main.py", "x = 1\ny = 2\n")
+        os.utime(os.path.join(self.temp_dir, "main.py"), (1, 1))
+        os.utime(self.temp_dir, (mtime, mtime))
+
+        assert index.refresh() == 0
+        assert index.restat(["main.py", "missing.py"]) == ["main.py"]
+        assert index.entries["main.py"].size == len("x = 1\ny = 2\n")
+        assert index.entries["main.py"].mtime == 1
+        assert index.restat() == []
+
+    def test_warm_load_stats_directories_only(self):
+        """Test loading a persisted index does not stat indexed files"""
+        RepoIndex.load_or_build(self.temp_dir, persist_min_files=1)
+        stat = os.stat
+        statted = []
+
+        def record_stat(path, *args, **kwargs):
+            statted.append(os.path.relpath(path, self.temp_dir))
+            return stat(path, *args, **kwargs)
+
+        with patch("os.stat", side_effect=record_stat):
+            index = RepoIndex.load_or_build(self.temp_dir, persist_min_files=1)
+
+        assert statted
+        assert not set(statted) & (set(index.entries) - set(index.ignore_files))
+
+    def test_load_or_build_persists_large_indexes(self):
+        """Test only indexes above the threshold are persisted"""
+        RepoIndex.load_or_build(self.temp_dir, persist_min_files=1000)
+        assert not os.path.exists(RepoIndex.index_path(self.temp_dir))
+
+        RepoIndex.load_or_build(self.temp_dir, persist_min_files=1)
+        assert os.path.exists(RepoIndex.index_path(self.temp_dir))
+
+        with patch.object(RepoIndex, "build") as mock_build:
+            index = RepoIndex.load_or_build(self.temp_dir, persist_min_files=1)
+            mock_build.assert_not_called()
+        assert "main.py" in index.entries
+
+    def test_clones_share_an_index(self):
+        """Test a clone of the same origin reuses and rebases the index"""
+        subprocess.run(["git", "init", "-q", self.temp_dir], check=True)
+        subprocess.run(
+            ["git", "remote", "add", "origin", "https://x/demo.git"],
+            cwd=self.temp_dir,
+            check=True,
+        )
+        RepoIndex.load_or_build(self.temp_dir, persist_min_files=1)
+        clone = os.path.join(self.cache_dir, "clone")
+        shutil.copytree(self.temp_dir, clone)
+        write_file(clone, "pkg/added.py")
+        write_file(clone, "main.py", "x = 10\n")
+        os.remove(os.path.join(clone, "README.md"))
+
+        path = RepoIndex.index_path(clone)
+        assert path == RepoIndex.index_path(self.temp_dir)
+        assert os.path.basename(path).startswith("demo-")
+        with patch.object(RepoIndex, "build") as mock_build:
+            index = RepoIndex.load_or_build(clone, persist_min_files=1)
+            mock_build.assert_not_called()
+
+        assert index.root == clone
+        assert os.path.join("pkg", "added.py") in index.entries
+        assert "README.md" not in index.entries
+        index.restat(["main.py"])
+        assert index.entries["main.py"].size == len("x = 10\n")
+        assert os.path.join("pkg", "generated", "out.py") not in index.entries
+
+        write_file(self.temp_dir, ".gitignore", "pkg/\n")
+        assert RepoIndex.load(self.temp_dir) is None
+
+    def test_prune_keeps_recent_indexes(self):
+        """Test only the most recently saved indexes are kept"""
+        index = RepoIndex(self.temp_dir)
+        index.build()
+        index_dir = os.path.dirname(RepoIndex.index_path(self.temp_dir))
+        for i in range(3):
+            index.save(os.path.join(index_dir, f"old-{i}.json"))
+            os.utime(os.path.join(index_dir, f"old-{i}.json"), (i, i))
+        index.save()
+
+        RepoIndex.prune(keep=2)
+        assert set(os.listdir(index_dir)) == {
+            os.path.basename(RepoIndex.index_path(self.temp_dir)),
+            "old-2.json",
+        }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
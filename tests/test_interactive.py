@@ -33,7 +33,7 @@ class TestInteractiveMenu:
         assert self.menu.deployer == self.mock_deployer
         assert self.menu.readme_path == self.readme_path
         assert self.menu.current_selection == 0
-        assert len(self.menu.menu_items) == 8  # 8 menu items
+        assert len(self.menu.menu_items) == 11  # 11 menu items
 
     def test_setup_menu(self):
         """Test menu setup"""
@@ -43,8 +43,11 @@ class TestInteractiveMenu:
             "setup_env",
             "list_files",
             "run_file",
+            "profile_file",
+            "import_times",
             "inspect_file",
             "shell",
+            "run_settings",
             "exit",
         ]
 
@@ -130,15 +133,17 @@ class TestInteractiveMenu:
     def test_list_python_files_success(self, mock_console):
         """Test Python files listing"""
         # Mock file info
-        self.mock_deployer.get_file_info.side_effect = [
-            {"lines": 50, "size": 1200, "has_main": True},
-            {"lines": 30, "size": 800, "has_main": False},
-        ]
+        self.mock_deployer.get_files_info.return_value = {
+            "main.py": {"lines": 50, "size": 1200, "has_main": True},
+            "utils.py": {"lines": 30, "size": 800, "has_main": False},
+        }
 
         with patch.object(self.menu, "wait_for_key"):
             self.menu.list_python_files()
             mock_console.print.assert_called()
-            assert self.mock_deployer.get_file_info.call_count == 2
+            self.mock_deployer.get_files_info.assert_called_once_with(
+                ["main.py", "utils.py"]
+            )
 
     @patch("digy.interactive.console")
     def test_list_python_files_empty(self, mock_console):
@@ -177,6 +182,43 @@ class TestInteractiveMenu:
             self.menu.run_python_file()
             mock_console.print.assert_called()
 
+    @patch("digy.interactive.Prompt.ask")
+    @patch("digy.interactive.console")
+    def test_run_settings(self, mock_console, mock_prompt):
+        """Test timeout and grace period are set on the deployer"""
+        self.mock_deployer.get_timeout.return_value = 300.0
+        self.mock_deployer.get_grace_period.return_value = 5.0
+        mock_prompt.side_effect = ["60", "2.5"]
+
+        with patch.object(self.menu, "wait_for_key"):
+            self.menu.run_settings()
+
+        assert self.mock_deployer.timeout == 60.0
+        assert self.mock_deployer.grace_period == 2.5
+
+    @patch("digy.interactive.show_profile")
+    @patch("digy.interactive.Prompt.ask")
+    @patch("digy.interactive.console")
+    def test_profile_python_file(self, mock_console, mock_prompt, mock_show):
+        """Test profiling a selected file shows the saved profile"""
+        pstats_path = os.path.join(self.temp_dir, "run.pstats")
+        open(pstats_path, "w").close()
+        self.mock_deployer.python_files = ["main.py"]
+        self.mock_deployer.get_entry_points.return_value = []
+        self.mock_deployer.profile_python_file.return_value = (
+            MagicMock(success=True),
+            {"pstats": pstats_path, "collapsed": pstats_path + ".collapsed"},
+        )
+        mock_prompt.side_effect = ["1", "--fast"]
+
+        with patch.object(self.menu, "wait_for_key"):
+            self.menu.profile_python_file()
+
+        self.mock_deployer.profile_python_file.assert_called_once_with(
+            "main.py", ["--fast"]
+        )
+        mock_show.assert_called_once_with(pstats_path)
+
     @patch("digy.interactive.Prompt.ask")
     @patch("digy.interactive.console")
     def test_run_python_file_no_files(self, mock_console, mock_prompt):
@@ -271,6 +313,10 @@ class TestInteractiveMenu:
             ("run_python_file", "run_python_file"),
             ("inspect_file", "inspect_file"),
             ("interactive_shell", "interactive_shell"),
+            ("run_settings", "run_settings"),
+            ("run_file", "run_python_file"),
+            ("profile_file", "profile_python_file"),
+            ("import_times", "profile_imports"),
             ("exit", None),  # Special case for exit action
         ]
 
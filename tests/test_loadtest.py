@@ -0,0 +1,85 @@
+"""Tests for the DIGY load-test harness."""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+from digy.loadtest import phase_timings, run_load_test
+from digy.synthetic import RepoSpec
+from digy.tracing import configure, span
+
+
+class TestLoadTest:
+    """Test running concurrent sessions"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        configure(enabled=False)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sessions_use_local_wheelhouse(self):
+        """Test sessions install from the wheelhouse and report phases"""
+        report = run_load_test(
+            sessions=2,
+            concurrency=2,
+            spec=RepoSpec(files=10, requirements=1),
+            work_dir=self.temp_dir,
+        )
+
+        assert report["failures"] == 0, report["failed_sessions"]
+        assert report["latency"]["count"] == 2
+        assert report["throughput"] > 0
+        assert report["peak_rss"] >= report["session_peak_rss"]["max"] > 0
+        assert list(report["phases"])[:3] == ["load", "parse_repo_url", "clone"]
+        assert report["phases"]["pip"]["count"] == 2
+
+    def test_failures_are_reported(self):
+        """Test a failing session keeps its exit code and output tail"""
+        code = (
+            "import os, sys; print('boom', os.environ['DIGY_CACHE_DIR'],"
+            " os.environ['DIGY_STATE_DIR']); sys.exit(3)"
+        )
+        failing = [sys.executable, "-c", code]
+        with patch("digy.loadtest.session_command", return_value=failing):
+            report = run_load_test(
+                sessions=3,
+                concurrency=2,
+                repos=2,
+                spec=RepoSpec(files=5),
+                work_dir=self.temp_dir,
+            )
+
+        assert report["failures"] == 3
+        assert report["throughput"] == 0
+        failed = report["failed_sessions"][0]
+        assert failed["returncode"] == 3
+        assert failed["error"].split() == [
+            "boom",
+            os.path.join(self.temp_dir, "cache"),
+            os.path.join(self.temp_dir, "state"),
+        ]
+        assert {f["repo"] for f in report["failed_sessions"]} == {
+            f"file://{self.temp_dir}/repo0.git",
+            f"file://{self.temp_dir}/repo1.git",
+        }
+
+    def test_phase_timings_order(self):
+        """Test phases follow the pipeline and repeated spans are summed"""
+        path = f"{self.temp_dir}/trace.jsonl"
+        configure(path, enabled=True)
+        with span("run"):
+            pass
+        with span("pip"):
+            pass
+        with span("pip"):
+            pass
+
+        phases = phase_timings([path, f"{self.temp_dir}/missing.jsonl"])
+        assert list(phases) == ["pip", "run"]
+        assert phases["pip"]["count"] == 1
@@ -0,0 +1,99 @@
+"""Tests for DIGY memory tracing."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from digy import memtrace
+from digy.memtrace import diff_traces, load_trace, normalize_path
+
+SCRIPT = """
+import subprocess
+import sys
+
+blocks = [bytearray(1000) for _ in range(2000)]
+# A child inherits the environment but must not overwrite the dump
+subprocess.run([sys.executable, "-c", "x = [0] * 10"], check=True)
+print("done")
+"""
+
+
+class TestMemTrace:
+    """Test the sitecustomize hook and comparing dumps"""
+
+    def setup_method(self):
+        """Setup test environment with the hook installed"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.hook_dir = os.path.join(self.temp_dir, memtrace.HOOK_DIR)
+        os.makedirs(self.hook_dir)
+        shutil.copyfile(
+            memtrace.__file__, os.path.join(self.hook_dir, "sitecustomize.py")
+        )
+        self.script = os.path.join(self.temp_dir, "alloc.py")
+        with open(self.script, "w") as f:
+            f.write(SCRIPT)
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_traced(self, output):
+        """Run the script with the hook enabled"""
+        env = dict(os.environ, PYTHONPATH=self.hook_dir)
+        if output:
+            env[memtrace.OUTPUT_ENV] = output
+        return subprocess.run(
+            [sys.executable, self.script],
+            cwd=self.temp_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_hook_dumps_allocations(self):
+        """Test the dump names the allocating line relative to the repo"""
+        output = os.path.join(self.temp_dir, "run.memory.json")
+        result = self.run_traced(output)
+
+        assert result.returncode == 0, result.stderr
+        trace = load_trace(output)
+        assert trace["pid"] != os.getpid()
+        assert trace["peak"] >= trace["current"] >= 2000 * 1000
+        assert trace["sites"][0]["site"] == "alloc.py:5"
+        assert trace["sites"][0]["count"] >= 2000
+
+    def test_hook_is_inactive_by_default(self):
+        """Test nothing is traced without the output variable"""
+        result = self.run_traced(None)
+
+        assert result.returncode == 0
+        assert [n for n in os.listdir(self.temp_dir) if n.endswith(".json")] == []
+
+    def test_normalize_path(self):
+        """Test venv and checkout locations are stripped"""
+        site = os.path.join(
+            "/tmp/venv", "lib", "python3.11", "site-packages", "pkg", "m.py"
+        )
+        assert normalize_path(site, "/tmp/repo") == "site-packages/pkg/m.py"
+        assert normalize_path("/tmp/repo/app/main.py", "/tmp/repo") == os.path.join(
+            "app", "main.py"
+        )
+        assert normalize_path("/usr/lib/json.py", "/tmp/repo") == "/usr/lib/json.py"
+
+    def test_diff_traces(self):
+        """Test sites are ranked by the size of their change"""
+        old = {"peak": 100, "sites": [{"site": "a.py:1", "size": 100, "count": 1}]}
+        new = {
+            "peak": 500,
+            "sites": [
+                {"site": "a.py:1", "size": 150, "count": 2},
+                {"site": "b.py:9", "size": 300, "count": 3},
+            ],
+        }
+
+        changes = diff_traces(old, new)
+        assert [c["site"] for c in changes] == ["b.py:9", "a.py:1"]
+        assert changes[0]["delta"] == 300
+        assert changes[1]["count_delta"] == 1
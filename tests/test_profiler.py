@@ -0,0 +1,90 @@
+"""Tests for the DIGY profiler wrapper."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from digy import profiler
+from digy.profiler import read_collapsed, top_functions
+
+SCRIPT = """
+import sys
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+def work():
+    return sum(fib(18) for _ in range(20))
+
+print(work(), sys.argv[1:])
+sys.exit(int(sys.argv[1]))
+"""
+
+
+class TestProfiler:
+    """Test profiling a script and reading the results"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.script = os.path.join(self.temp_dir, "slow.py")
+        with open(self.script, "w") as f:
+            f.write(SCRIPT)
+        self.pstats = os.path.join(self.temp_dir, "run.pstats")
+        self.collapsed = os.path.join(self.temp_dir, "run.collapsed")
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_wrapper(self, *args):
+        """Run the wrapper program like the Deployer does"""
+        return subprocess.run(
+            [
+                sys.executable,
+                profiler.__file__,
+                "--pstats",
+                self.pstats,
+                "--collapsed",
+                self.collapsed,
+                "--interval",
+                "0.001",
+                self.script,
+            ]
+            + list(args),
+            capture_output=True,
+            text=True,
+            cwd=self.temp_dir,
+        )
+
+    def test_profile_script(self):
+        """Test both profiles are written and the exit code is kept"""
+        result = self.run_wrapper("3", "--flag")
+
+        assert result.returncode == 3
+        assert "['3', '--flag']" in result.stdout
+
+        functions = [row["function"] for row in top_functions(self.pstats, limit=10)]
+        assert "fib" in functions
+        assert "work" in functions
+
+        stacks = read_collapsed(self.collapsed)
+        assert stacks
+        assert all(stack.startswith("<module> (slow.py:") for stack in stacks)
+        assert any("fib (slow.py:" in stack for stack in stacks)
+
+    def test_top_functions_sort(self):
+        """Test sorting by own time and rejecting unknown keys"""
+        self.run_wrapper("0")
+
+        rows = top_functions(self.pstats, limit=3, sort="tottime")
+        assert len(rows) == 3
+        assert rows[0]["function"] == "fib"
+        assert rows[0]["total_time"] >= rows[1]["total_time"]
+
+        with pytest.raises(ValueError):
+            top_functions(self.pstats, sort="name")
@@ -0,0 +1,140 @@
+"""Tests for DIGY project metadata helpers."""
+
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from digy.project import (
+    get_console_scripts,
+    get_declared_dependencies,
+    get_repo_identity,
+    get_source_roots,
+    has_compiled_extensions,
+    tomllib,
+)
+
+
+def write_file(root: str, rel_path: str, content: str):
+    """Write a file below root, creating parent directories"""
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestProjectMetadata:
+    """Test static project metadata extraction"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    @pytest.mark.skipif(tomllib is None, reason="No TOML parser available")
+    def test_pyproject_dependencies(self):
+        """Test PEP 621 dependencies are read from pyproject.toml"""
+        write_file(
+            self.temp_dir,
+            "pyproject.toml",
+            '[project]\nname = "demo"\ndependencies = ["requests>=2", "click"]\n',
+        )
+        assert get_declared_dependencies(self.temp_dir) == ["requests>=2", "click"]
+
+    @pytest.mark.skipif(tomllib is None, reason="No TOML parser available")
+    def test_pyproject_dynamic_dependencies(self):
+        """Test dynamic dependencies cannot be resolved statically"""
+        write_file(
+            self.temp_dir,
+            "pyproject.toml",
+            '[project]\nname = "demo"\ndynamic = ["dependencies"]\n',
+        )
+        assert get_declared_dependencies(self.temp_dir) is None
+
+    def test_setup_cfg_dependencies(self):
+        """Test install_requires is read from setup.cfg"""
+        write_file(
+            self.temp_dir,
+            "setup.cfg",
+            "[options]\ninstall_requires =\n    requests\n    pyyaml>=6\n",
+        )
+        assert get_declared_dependencies(self.temp_dir) == ["requests", "pyyaml>=6"]
+
+    def test_setup_py_dependencies(self):
+        """Test literal install_requires is read from setup.py"""
+        write_file(
+            self.temp_dir,
+            "setup.py",
+            "from setuptools import setup\n"
+            "setup(name='demo', install_requires=['rich'])\n",
+        )
+        assert get_declared_dependencies(self.temp_dir) == ["rich"]
+
+    def test_setup_py_computed_dependencies(self):
+        """Test computed install_requires falls back to pip"""
+        write_file(
+            self.temp_dir,
+            "setup.py",
+            "from setuptools import setup\n"
+            "setup(name='demo', install_requires=open('reqs').read().split())\n",
+        )
+        assert get_declared_dependencies(self.temp_dir) is None
+
+    def test_console_scripts(self):
+        """Test console_scripts are read from setup.cfg and setup.py"""
+        write_file(
+            self.temp_dir,
+            "setup.cfg",
+            "[options.entry_points]\nconsole_scripts =\n    tool = pkg.cli:main\n",
+        )
+        write_file(
+            self.temp_dir,
+            "setup.py",
+            "from setuptools import setup\n"
+            "setup(entry_points={\n"
+            "    'console_scripts': ['other=pkg.other:run [extra]'],\n"
+            "})\n",
+        )
+        assert get_console_scripts(self.temp_dir) == {
+            "tool": "pkg.cli:main",
+            "other": "pkg.other:run",
+        }
+
+    def test_compiled_extensions_detected(self):
+        """Test C sources mark the project as needing a build"""
+        write_file(self.temp_dir, "setup.py", "from setuptools import setup\n")
+        write_file(self.temp_dir, "pkg/_speedups.c", "int x;\n")
+        assert has_compiled_extensions(self.temp_dir) is True
+
+    def test_pure_python_project(self):
+        """Test pure-Python trees do not need a build"""
+        write_file(self.temp_dir, "setup.py", "from setuptools import setup\n")
+        write_file(self.temp_dir, "pkg/__init__.py", "")
+        assert has_compiled_extensions(self.temp_dir) is False
+
+    def test_source_roots(self):
+        """Test src layout is preferred over the repository root"""
+        assert get_source_roots(self.temp_dir) == [os.path.abspath(self.temp_dir)]
+        os.makedirs(os.path.join(self.temp_dir, "src"))
+        assert get_source_roots(self.temp_dir) == [
+            os.path.abspath(os.path.join(self.temp_dir, "src"))
+        ]
+
+    def test_get_repo_identity(self):
+        """Test clones share the origin and report HEAD"""
+        repo = os.path.join(self.temp_dir, "repo")
+        os.makedirs(repo)
+        git = ["git", "-C", repo, "-c", "user.email=a@b", "-c", "user.name=a"]
+        subprocess.run(git + ["init", "-q"], check=True)
+        subprocess.run(git + ["commit", "-q", "--allow-empty", "-m", "x"], check=True)
+
+        identity = get_repo_identity(repo)
+        assert identity["origin"] == os.path.realpath(repo)
+        assert len(identity["commit"]) == 40
+
+        subprocess.run(git + ["remote", "add", "origin", "https://example.com/r.git"])
+        assert get_repo_identity(repo)["origin"] == "https://example.com/r.git"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
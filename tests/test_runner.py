@@ -0,0 +1,187 @@
+"""Tests for DIGY streaming process runner."""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import psutil
+import pytest
+
+from digy.runner import RingBuffer, stream_process, write_summary
+
+
+def wait_for_exit(pid, timeout=5.0):
+    """Wait until a process that is not our child is gone or a zombie"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.NoSuchProcess:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestRingBuffer:
+    """Test bounded output buffering"""
+
+    def test_keeps_tail(self):
+        """Test only the last max_bytes are kept"""
+        buffer = RingBuffer(max_bytes=8)
+        for chunk in (b"abc", b"defg", b"hijkl"):
+            buffer.append(chunk)
+
+        assert buffer.getvalue() == "efghijkl"
+        assert buffer.size == 8
+        assert buffer.truncated is True
+
+    def test_oversized_chunk(self):
+        """Test a single chunk larger than the buffer is trimmed"""
+        buffer = RingBuffer(max_bytes=4)
+        buffer.append(b"0123456789")
+
+        assert buffer.getvalue() == "6789"
+        assert buffer.truncated is True
+
+
+class TestStreamProcess:
+    """Test streamed process execution"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, "run.log")
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_code(self, code, **kwargs):
+        """Run Python code through stream_process"""
+        return stream_process(
+            [sys.executable, "-c", code],
+            cwd=self.temp_dir,
+            log_path=self.log_path,
+            tee=False,
+            **kwargs,
+        )
+
+    def test_captures_output_and_log(self):
+        """Test both streams are captured and written to the log"""
+        result = self.run_code(
+            "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"
+        )
+
+        assert result.returncode == 3
+        assert result.success is False
+        assert result.stdout == "out\n"
+        assert result.stderr == "err\n"
+        with open(self.log_path) as f:
+            # The two streams may interleave at any point
+            assert sorted(f.read()) == sorted("out\nerr\n")
+
+    def test_stdin(self):
+        """Test runs get no input unless given a descriptor to read"""
+        code = "print(repr(input()))"
+        assert "EOFError" in self.run_code(code).stderr
+
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"2\n")
+        os.close(write_fd)
+        try:
+            result = self.run_code(code, stdin=read_fd)
+        finally:
+            os.close(read_fd)
+        assert result.stdout == "'2'\n"
+
+    @pytest.mark.skipif(os.name != "posix", reason="Requires sessions")
+    def test_interactive_runs_keep_the_session(self):
+        """Test runs reading this process's stdin stay on its terminal"""
+        code = "import os; print(os.getsid(0))"
+        assert self.run_code(code).stdout != f"{os.getsid(0)}\n"
+        assert self.run_code(code, stdin=None).stdout == f"{os.getsid(0)}\n"
+
+        result = self.run_code("import time; time.sleep(30)", stdin=None, timeout=0.5)
+        assert result.timed_out is True
+        assert result.duration < 10
+
+    def test_memory_is_bounded(self):
+        """Test large output is truncated in memory but complete on disk"""
+        result = self.run_code(
+            "print('x' * 99 * 1000, end=''); print('END', end='')",
+            max_buffer_bytes=1024,
+        )
+
+        assert result.success is True
+        assert result.truncated is True
+        assert len(result.stdout) == 1024
+        assert result.stdout.endswith("END")
+        assert os.path.getsize(self.log_path) == 99 * 1000 + 3
+
+    def test_resource_usage(self):
+        """Test CPU, memory and context switch accounting"""
+        result = self.run_code(
+            "import time\n"
+            "data = bytearray(64 * 1024 * 1024)\n"
+            "end = time.process_time() + 0.3\n"
+            "while time.process_time() < end: pass\n"
+        )
+        usage = result.resources
+
+        assert usage.wall_time == result.duration
+        assert usage.user_time + usage.system_time >= 0.25
+        assert usage.max_rss >= 64 * 1024 * 1024
+        assert usage.tree_peak_rss >= 64 * 1024 * 1024
+        assert usage.voluntary_switches + usage.involuntary_switches > 0
+
+    def test_timeout(self):
+        """Test a process exceeding the timeout is killed"""
+        result = self.run_code("import time; time.sleep(30)", timeout=0.5)
+
+        assert result.timed_out is True
+        assert result.success is False
+        assert result.duration < 10
+
+    def test_timeout_stops_process_tree(self):
+        """Test grandchildren are stopped and SIGTERM is escalated to SIGKILL"""
+        pid_file = os.path.join(self.temp_dir, "grandchild.pid")
+        result = self.run_code(
+            "import signal, subprocess, sys, time\n"
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "sleep = 'import time; time.sleep(60)'\n"
+            "child = subprocess.Popen([sys.executable, '-c', sleep])\n"
+            f"open({pid_file!r}, 'w').write(str(child.pid))\n"
+            "time.sleep(60)\n",
+            timeout=1,
+            grace_period=0.5,
+        )
+
+        assert result.timed_out is True
+        assert result.duration < 10
+        with open(pid_file) as f:
+            grandchild = int(f.read())
+        assert wait_for_exit(grandchild)
+
+    def test_write_summary(self):
+        """Test summaries are written as JSON or CSV by extension"""
+        rows = [{"index": 0, "file": "a.py", "args": ["x y"], "returncode": 0}]
+        json_path = os.path.join(self.temp_dir, "summary.json")
+        csv_path = os.path.join(self.temp_dir, "summary.csv")
+        write_summary(rows, json_path)
+        write_summary(rows, csv_path)
+
+        with open(json_path) as f:
+            assert json.load(f) == rows
+        with open(csv_path) as f:
+            row = next(csv.DictReader(f))
+        assert row["args"] == "'x y'"
+        assert row["returncode"] == "0"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
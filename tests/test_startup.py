@@ -0,0 +1,90 @@
+"""Tests for DIGY start-up cost: lazy imports and deferred singletons."""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from digy import cli, profiler, tempdirs
+from digy.importtime import parse_importtime
+from digy.lazy import LazyConsole
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds `import digy.cli` may take, measured with -X importtime
+IMPORT_BUDGET_MS = float(os.getenv("DIGY_IMPORT_BUDGET_MS", "100"))
+
+HEAVY_MODULES = ("docker", "dotenv", "git", "psutil", "requests", "rich", "yaml")
+
+
+def run_python(*args, **kwargs):
+    """Run a fresh interpreter with the source tree importable"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, **kwargs
+    )
+
+
+class TestStartup:
+    """Test the CLI starts without importing the whole package"""
+
+    def test_cli_import_is_light(self):
+        """Test importing the CLI leaves heavy dependencies unimported"""
+        result = run_python(
+            "-c",
+            "import json, sys, digy.cli; print(json.dumps(sorted(sys.modules)))",
+        )
+
+        assert result.returncode == 0, result.stderr
+        modules = json.loads(result.stdout)
+        loaded = [m for m in modules if m.split(".")[0] in HEAVY_MODULES]
+        assert loaded == []
+        assert "Manifest" not in result.stdout + result.stderr
+
+    def test_cli_import_budget(self):
+        """Test importing the CLI stays within the time budget"""
+        result = run_python("-X", "importtime", "-c", "import digy.cli")
+
+        assert result.returncode == 0, result.stderr
+        nodes = parse_importtime(result.stderr)
+        nodes = [n for n in nodes if n.name.startswith("digy")]
+        elapsed_ms = sum(n.cumulative_us for n in nodes) / 1000
+        assert nodes
+        message = f"import digy.cli took {elapsed_ms:.1f} ms"
+        assert elapsed_ms < IMPORT_BUDGET_MS, message
+
+    def test_version(self):
+        """Test --version works without creating a loader"""
+        result = run_python("-m", "digy.cli", "--version", cwd=ROOT)
+
+        assert result.returncode == 0, result.stderr
+        assert "version" in result.stdout
+
+    def test_package_exports_are_lazy(self):
+        """Test package attributes resolve on first access"""
+        result = run_python(
+            "-c",
+            "import sys, digy; assert 'digy.deployer' not in sys.modules; "
+            "from digy import Deployer, main; print(Deployer.__module__)",
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "digy.deployer"
+
+    def test_cli_constants_match(self):
+        """Test values copied into the CLI to avoid imports stay in sync"""
+        assert cli.PROFILE_SORT_KEYS == profiler.SORT_KEYS
+        assert cli.GC_MIN_AGE_HOURS * 3600 == tempdirs.DEFAULT_MIN_AGE
+
+    def test_lazy_console(self):
+        """Test the console is created on first use and can be patched"""
+        console = LazyConsole(width=40)
+        assert console._console is None
+
+        with patch.object(console, "print") as mock_print:
+            console.print("hello")
+        mock_print.assert_called_once_with("hello")
+
+        assert console.width == 40
+        assert console.get() is console.get()
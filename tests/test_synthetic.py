@@ -0,0 +1,109 @@
+"""Tests for DIGY synthetic repositories."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from click.testing import CliRunner
+
+from digy.cli import main
+from digy.synthetic import RepoSpec, checkout_repo, generate_repo, module_path
+
+
+def git(repo, *args):
+    """Output of a git command in a repository"""
+    return subprocess.run(
+        ["git", "-C", repo, *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+class TestSynthetic:
+    """Test generating repositories"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def path(self, name):
+        """Path inside the test directory"""
+        return os.path.join(self.temp_dir, name)
+
+    def test_generation_is_deterministic(self):
+        """Test the same spec gives the same commit and another seed does not"""
+        spec = RepoSpec(files=200, binaries=1, binary_size=4096, commits=3)
+        generate_repo(self.path("a.git"), spec)
+        generate_repo(self.path("b.git"), spec)
+        generate_repo(self.path("c.git"), RepoSpec(files=200, commits=3, seed=1))
+
+        head = git(self.path("a.git"), "rev-parse", "main")
+        assert head == git(self.path("b.git"), "rev-parse", "main")
+        assert head != git(self.path("c.git"), "rev-parse", "main")
+
+    def test_tree_and_history(self):
+        """Test file counts, depth, binaries and the commit history"""
+        spec = RepoSpec(
+            files=300,
+            depth=5,
+            fanout=3,
+            binaries=2,
+            binary_size=10000,
+            requirements=3,
+            commits=4,
+            changes=5,
+        )
+        repo = self.path("repo.git")
+        counts = generate_repo(repo, spec)
+
+        files = git(repo, "ls-tree", "-r", "--name-only", "main").split()
+        assert counts["files"] == len(files) == 300 + 2 + 3 + 3
+        assert module_path(299, spec) in files
+        assert module_path(299, spec).count("/") == 6
+        assert len(git(repo, "log", "--format=%H", "main").split()) == 4
+        changed = git(repo, "show", "--name-only", "--format=", "main")
+        assert len(changed.split()) == 5
+
+        size = git(repo, "cat-file", "-s", "main:assets/blob_1.bin")
+        assert int(size) == 10000
+
+    def test_checkout_runs(self):
+        """Test the working tree's modules import each other"""
+        spec = RepoSpec(files=50, depth=2)
+        generate_repo(self.path("repo.git"), spec)
+        work = checkout_repo(self.path("repo.git"), self.path("work"))
+
+        modules = [module_path(i, spec)[:-3].replace("/", ".") for i in range(50)]
+        result = subprocess.run(
+            [sys.executable, "-c", "import " + ", ".join(modules), "main.py"],
+            cwd=work,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+    def test_synth_repo_command(self):
+        """Test the CLI creates the repository and a working tree"""
+        result = CliRunner().invoke(
+            main,
+            [
+                "synth-repo",
+                self.path("cli.git"),
+                "--files",
+                "20",
+                "--requirements",
+                "1",
+                "--checkout",
+                self.path("cli"),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert os.path.exists(self.path("cli/requirements.txt"))
+        assert os.path.exists(
+            self.path("cli/wheels/digy_synth_pkg0-1.0-py3-none-any.whl")
+        )
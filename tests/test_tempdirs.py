@@ -0,0 +1,175 @@
+"""Tests for DIGY temporary directory ownership and garbage collection."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from digy.cli import main
+from digy.tempdirs import (
+    LOCK_PREFIX,
+    claim,
+    dir_size,
+    find_orphans,
+    lock_owners,
+    make_temp_dir,
+    release,
+    remove_orphans,
+)
+
+
+def dead_pid():
+    """PID of a process that has already exited"""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class TestTempDirs:
+    """Test lockfiles and orphan detection"""
+
+    def setup_method(self):
+        """Setup test environment with its own temp root"""
+        self.root = tempfile.mkdtemp()
+        self.patcher = patch("tempfile.gettempdir", return_value=self.root)
+        self.patcher.start()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.patcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_dir(self, name, owner=None, age=0.0):
+        """Create a directory with a file, an optional owner and an mtime age"""
+        path = os.path.join(self.root, name)
+        os.makedirs(path)
+        with open(os.path.join(path, "data.bin"), "wb") as f:
+            f.write(b"x" * 10000)
+        if owner is not None:
+            with open(os.path.join(path, f"{LOCK_PREFIX}{owner}"), "w") as f:
+                json.dump({"pid": owner, "started": None}, f)
+        if age:
+            stamp = time.time() - age
+            os.utime(path, (stamp, stamp))
+        return path
+
+    def test_make_temp_dir_claims(self):
+        """Test new directories are owned by the current process"""
+        path = make_temp_dir("digy_venv_")
+
+        assert os.path.dirname(path) == self.root
+        assert os.path.basename(path).startswith("digy_venv_")
+        assert lock_owners(path) == [os.getpid()]
+
+        release(path)
+        assert lock_owners(path) is None
+
+    def test_cleanup_releases_claims(self):
+        """Test deployer and loader cleanup drop their lockfiles"""
+        from digy.deployer import Deployer
+        from digy.loader import GitLoader
+
+        loader = GitLoader()
+        assert lock_owners(loader.base_path) == [os.getpid()]
+        loader.cleanup_all()
+        assert not os.path.exists(loader.base_path)
+
+        deployer = Deployer(self.make_dir("digy_repo"))
+        deployer.venv_path = make_temp_dir("digy_venv_")
+        with patch("digy.deployer.discard", return_value=False):
+            deployer.cleanup(force=True)
+        assert lock_owners(deployer.venv_path) is None
+
+    def test_reused_pid_is_not_an_owner(self):
+        """Test a lockfile whose start time does not match is stale"""
+        path = self.make_dir("digy_reused")
+        claim(path)
+        lock_file = os.path.join(path, f"{LOCK_PREFIX}{os.getpid()}")
+        with open(lock_file) as f:
+            lock = json.load(f)
+        lock["started"] -= 1000
+        with open(lock_file, "w") as f:
+            json.dump(lock, f)
+
+        assert lock_owners(path) == []
+
+    def test_find_orphans(self):
+        """Test orphans are found by owner liveness and age"""
+        live = self.make_dir("digy_live", owner=os.getpid())
+        dead = self.make_dir("digy_venv_dead", owner=dead_pid())
+        stale = self.make_dir("digy_zip_stale", age=48 * 3600)
+        fresh = self.make_dir("digy_fresh")
+        other = self.make_dir("not_digy", owner=dead_pid())
+
+        orphans = find_orphans(with_sizes=True)
+        paths = [o.path for o in orphans]
+
+        assert dead in paths
+        assert stale in paths
+        assert live not in paths
+        assert fresh not in paths
+        assert other not in paths
+        assert all(o.size >= 10000 for o in orphans)
+        assert dict((o.path, o.reason) for o in orphans)[dead] == "owner exited"
+
+        assert fresh in [o.path for o in find_orphans(min_age=0)]
+
+    def test_shared_dir_needs_all_owners_gone(self):
+        """Test a directory with one live owner is kept"""
+        path = self.make_dir("digy_ram", owner=dead_pid())
+        claim(path)
+
+        assert find_orphans() == []
+
+        release(path)
+        assert [o.path for o in find_orphans()] == [path]
+
+    def test_unreadable_dir_is_kept(self):
+        """Test a directory whose lockfiles cannot be read is not an orphan"""
+        path = self.make_dir("digy_unreadable", owner=dead_pid())
+
+        with patch("os.listdir", side_effect=PermissionError("denied")):
+            assert find_orphans() == []
+        with patch("builtins.open", side_effect=OSError("I/O error")):
+            assert find_orphans() == []
+        assert [o.path for o in find_orphans()] == [path]
+
+    def test_remove_orphans(self):
+        """Test orphans are removed and errors reported per directory"""
+        paths = [self.make_dir(f"digy_{i}", owner=dead_pid()) for i in range(3)]
+        orphans = find_orphans()
+
+        assert remove_orphans(orphans, max_workers=2) == [None, None, None]
+        assert not any(os.path.exists(p) for p in paths)
+
+    def test_dir_size(self):
+        """Test disk usage counts nested files"""
+        path = self.make_dir("digy_size")
+        os.makedirs(os.path.join(path, "sub"))
+        with open(os.path.join(path, "sub", "more.bin"), "wb") as f:
+            f.write(b"y" * 20000)
+
+        assert dir_size(path) >= 30000
+
+    def test_gc_command(self):
+        """Test digy gc reports and removes orphans"""
+        dead = self.make_dir("digy_venv_dead", owner=dead_pid())
+        live = self.make_dir("digy_live", owner=os.getpid())
+        runner = CliRunner()
+
+        result = runner.invoke(main, ["gc", "--dry-run"])
+        assert result.exit_code == 0
+        assert "reclaimable" in result.output
+        assert os.path.exists(dead)
+
+        result = runner.invoke(main, ["gc"])
+        assert result.exit_code == 0
+        assert "Reclaimed" in result.output
+        assert not os.path.exists(dead)
+        assert os.path.exists(live)
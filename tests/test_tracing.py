@@ -0,0 +1,117 @@
+"""Tests for DIGY phase tracing."""
+
+import contextvars
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from click.testing import CliRunner
+
+from digy import tracing
+from digy.cli import main
+from digy.tracing import build_waterfall, configure, read_spans, span
+
+
+class TestTracing:
+    """Test recording spans and rendering traces"""
+
+    def setup_method(self):
+        """Setup test environment with a trace file"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.temp_dir, "trace.jsonl")
+        configure(self.trace_file, enabled=True)
+
+    def teardown_method(self):
+        """Cleanup test environment and turn tracing off"""
+        configure(enabled=False)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_disabled_span_is_noop(self):
+        """Test nothing is recorded while tracing is off"""
+        configure(enabled=False)
+
+        with span("setup", repo="x") as s:
+            s.set_attribute("returncode", 0)
+
+        assert s is tracing.NOOP_SPAN
+        assert not os.path.exists(self.trace_file)
+
+    def test_spans_are_otlp_json(self):
+        """Test nested spans share the trace and point at their parent"""
+        with span("setup", repo="/tmp/repo"):
+            with span("pip", command="install -r requirements.txt") as s:
+                s.set_attribute("returncode", 0)
+
+        spans = list(read_spans(self.trace_file))
+        assert [s["name"] for s in spans] == ["pip", "setup"]
+        pip, setup = spans
+        assert pip["traceId"] == setup["traceId"] and len(pip["traceId"]) == 32
+        assert pip["parentSpanId"] == setup["spanId"]
+        assert setup["parentSpanId"] == ""
+        assert int(pip["endTimeUnixNano"]) >= int(pip["startTimeUnixNano"])
+        assert {"key": "returncode", "value": {"intValue": "0"}} in pip["attributes"]
+        assert pip["status"] == {"code": tracing.STATUS_CODE_OK}
+
+    def test_error_status(self):
+        """Test an exception marks the span as failed and propagates"""
+        try:
+            with span("clone"):
+                raise ValueError("no such branch")
+        except ValueError:
+            pass
+
+        (clone,) = read_spans(self.trace_file)
+        assert clone["status"]["code"] == tracing.STATUS_CODE_ERROR
+        assert "no such branch" in clone["status"]["message"]
+
+    def test_trace_to_keeps_session_tracer(self):
+        """Test scoped spans reach both files and the session tracer returns"""
+        session = tracing.get_tracer()
+        scoped_file = os.path.join(self.temp_dir, "scoped.jsonl")
+        with tracing.trace_to(scoped_file):
+            with span("clone"):
+                pass
+        with span("run"):
+            pass
+
+        assert tracing.get_tracer() is session
+        assert [s["name"] for s in read_spans(scoped_file)] == ["clone"]
+        assert [s["name"] for s in read_spans(self.trace_file)] == ["clone", "run"]
+
+    def test_threads_nest_under_copied_context(self):
+        """Test spans in worker threads keep the submitting span as parent"""
+        with span("run_many"):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self.run_job, name)
+                    for name in ("a.py", "b.py")
+                ]
+                [future.result() for future in futures]
+
+        rows = build_waterfall(list(read_spans(self.trace_file)))
+        assert [(r["name"], r["depth"]) for r in rows] == [
+            ("run_many", 0),
+            ("run", 1),
+            ("run", 1),
+        ]
+        assert {r["attributes"]["file"] for r in rows[1:]} == {"a.py", "b.py"}
+
+    def run_job(self, name):
+        """Record a run span"""
+        with span("run", file=name):
+            pass
+
+    def test_trace_show(self):
+        """Test the waterfall lists spans in order"""
+        with span("load", repo="."):
+            with span("parse_repo_url"):
+                pass
+        with span("run", file="main.py"):
+            pass
+
+        result = CliRunner().invoke(main, ["trace", "show", self.trace_file])
+
+        assert result.exit_code == 0, result.output
+        assert result.output.index("load") < result.output.index("parse_repo_url")
+        assert "main.py" in result.output
@@ -0,0 +1,82 @@
+"""Tests for DIGY background deletion."""
+
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from digy.trash import TRASH_NAME, discard, get_trash_dir, sweep
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+class TestTrash:
+    """Test moving directories to the trash and emptying it"""
+
+    def setup_method(self):
+        """Setup test environment with its own temp root"""
+        self.root = tempfile.mkdtemp()
+        self.trash = os.path.join(self.root, TRASH_NAME)
+        self.patcher = patch("tempfile.gettempdir", return_value=self.root)
+        self.patcher.start()
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.patcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_tree(self, name):
+        """Create a small directory tree"""
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.join(path, "lib", "pkg"))
+        with open(os.path.join(path, "lib", "pkg", "mod.py"), "w") as f:
+            f.write("x = 1\n")
+        return path
+
+    @pytest.mark.skipif(os.name != "posix", reason="Requires POSIX")
+    def test_discard_is_asynchronous(self):
+        """Test the directory is gone at once and the trash empties later"""
+        path = self.make_tree("digy_venv_test")
+
+        with patch.dict(os.environ, {"DIGY_ASYNC_DELETE": "true"}):
+            assert discard(path) is True
+
+        assert not os.path.exists(path)
+        assert get_trash_dir(path) == self.trash
+        assert wait_for(lambda: os.listdir(self.trash) == [])
+
+    def test_discard_synchronous_fallback(self):
+        """Test deletion without the background process"""
+        path = self.make_tree("digy_repo")
+
+        with patch.dict(os.environ, {"DIGY_ASYNC_DELETE": "false"}):
+            assert discard(path) is True
+
+        assert not os.path.exists(path)
+        assert not os.path.exists(self.trash)
+
+    @pytest.mark.skipif(os.name != "posix", reason="Requires POSIX")
+    def test_sweep_empties_leftover_trash(self):
+        """Test trash left by a crashed session is removed at start-up"""
+        os.makedirs(self.trash)
+        shutil.move(self.make_tree("leftover"), os.path.join(self.trash, "leftover.1"))
+
+        with patch.dict(os.environ, {"DIGY_ASYNC_DELETE": "true"}):
+            assert sweep() == 1
+
+        assert wait_for(lambda: os.listdir(self.trash) == [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,115 @@
+"""Tests for DIGY file watcher."""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from digy.deployer import Deployer
+from digy.watcher import InotifyError
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Poll a condition until it holds or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def write_file(root: str, rel_path: str, content: str = ""):
+    """Write a file below root, creating parent directories"""
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestIndexWatcher:
+    """Test incremental index updates while a session is open"""
+
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        write_file(self.temp_dir, "main.py")
+        write_file(self.temp_dir, "pkg/core.py")
+        self.deployer = Deployer(self.temp_dir)
+
+    def teardown_method(self):
+        """Cleanup test environment"""
+        self.deployer.stop_watching()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_inotify_applies_changes(self):
+        """Test created, removed and moved files reach the file lists"""
+        self.deployer.start_watching()
+        assert self.deployer.watcher.backend == "inotify"
+
+        write_file(self.temp_dir, "pkg/new.py")
+        write_file(self.temp_dir, "requirements.txt")
+        os.makedirs(os.path.join(self.temp_dir, "tools", "sub"))
+        write_file(self.temp_dir, "tools/sub/run.py")
+        os.remove(os.path.join(self.temp_dir, "main.py"))
+
+        expected = [
+            os.path.join("pkg", "core.py"),
+            os.path.join("pkg", "new.py"),
+            os.path.join("tools", "sub", "run.py"),
+        ]
+        assert wait_for(lambda: self.deployer.python_files == expected)
+        assert self.deployer.requirements_files == ["requirements.txt"]
+
+        os.rename(
+            os.path.join(self.temp_dir, "tools"), os.path.join(self.temp_dir, "bin")
+        )
+        assert wait_for(
+            lambda: os.path.join("bin", "sub", "run.py") in self.deployer.python_files
+        )
+        assert os.path.join("tools", "sub", "run.py") not in self.deployer.python_files
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_inotify_applies_edits(self):
+        """Test editing a file in place resets the import graph"""
+        self.deployer.start_watching()
+        core = os.path.join("pkg", "core.py")
+        assert self.deployer.get_import_graph().importers(core) == []
+
+        write_file(self.temp_dir, "main.py", "import pkg.core\n")
+
+        assert wait_for(lambda: self.deployer._graph is None)
+        graph = self.deployer.get_import_graph()
+        assert graph.importers(core) == ["main.py"]
+
+    def test_polling_fallback(self):
+        """Test the polling backend resyncs file lists"""
+        with patch("digy.watcher._Inotify", side_effect=InotifyError("unavailable")):
+            self.deployer.start_watching()
+        self.deployer.watcher.poll_interval = 0.05
+        assert self.deployer.watcher.backend == "polling"
+
+        write_file(self.temp_dir, "pkg/added.py")
+        os.utime(os.path.join(self.temp_dir, "pkg"), (0, 0))
+        assert wait_for(
+            lambda: os.path.join("pkg", "added.py") in self.deployer.python_files
+        )
+
+        self.deployer.get_import_graph()
+        write_file(self.temp_dir, "main.py", "import pkg.core\n")
+        assert wait_for(lambda: self.deployer._graph is None)
+
+    def test_watching_disabled(self):
+        """Test DIGY_WATCH=false skips the watcher"""
+        with patch.dict(os.environ, {"DIGY_WATCH": "false"}):
+            self.deployer.start_watching()
+        assert self.deployer.watcher is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
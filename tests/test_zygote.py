@@ -0,0 +1,112 @@
+"""Tests for DIGY zygote interpreter."""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+import pytest
+
+from digy.runner import stream_process
+from digy.zygote import Zygote
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="Requires fork")
+
+
+class TestZygote:
+    """Test forked script execution"""
+
+    def setup_method(self):
+        """Start a zygote with a preloaded module"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.zygote = Zygote(
+            sys.executable,
+            os.path.join(self.temp_dir, "zygote.sock"),
+            ["json", "digy_missing_module"],
+            cwd=self.temp_dir,
+            log_path=os.path.join(self.temp_dir, "zygote.log"),
+        )
+        self.zygote.start()
+
+    def teardown_method(self):
+        """Stop the zygote"""
+        self.zygote.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_script(self, source, args=(), **kwargs):
+        """Write a script and run it through the zygote"""
+        script = os.path.join(self.temp_dir, "script.py")
+        with open(script, "w") as f:
+            f.write(source)
+        return stream_process(
+            [sys.executable, script] + list(args),
+            cwd=self.temp_dir,
+            env={"DIGY_TEST": "1"},
+            tee=False,
+            launcher=self.zygote.spawn,
+            **kwargs,
+        )
+
+    def test_runs_script_with_argv_cwd_env(self):
+        """Test the child sees the script's argv, cwd, env and main name"""
+        result = self.run_script(
+            "import os, sys\n"
+            "print(sys.argv[1:], os.getcwd() == os.path.realpath(sys.argv[1]))\n"
+            "print(__name__, os.environ['DIGY_TEST'], 'json' in sys.modules)\n",
+            [self.temp_dir],
+        )
+
+        assert result.returncode == 0
+        assert result.stdout.splitlines() == [
+            f"[{self.temp_dir!r}] True",
+            "__main__ 1 True",
+        ]
+
+    def test_exit_code_and_traceback(self):
+        """Test exit codes and uncaught exceptions are reported"""
+        assert self.run_script("import sys; sys.exit(4)").returncode == 4
+
+        result = self.run_script("raise ValueError('boom')")
+        assert result.returncode == 1
+        assert "ValueError: boom" in result.stderr
+        assert result.resources.max_rss > 0
+
+    def test_stdin(self):
+        """Test children read the given descriptor, or /dev/null by default"""
+        code = "print(repr(input()))"
+        assert "EOFError" in self.run_script(code).stderr
+
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"2\n")
+        os.close(write_fd)
+        try:
+            result = self.run_script(code, stdin=read_fd)
+        finally:
+            os.close(read_fd)
+        assert result.stdout == "'2'\n"
+
+    def test_repeat_runs_and_timeout(self):
+        """Test the server keeps serving and children can be killed"""
+        for i in range(3):
+            assert self.run_script(f"print({i})").stdout == f"{i}\n"
+
+        result = self.run_script("import time; time.sleep(30)", timeout=0.5)
+        assert result.timed_out is True
+        assert self.zygote.is_alive()
+
+    def test_started_server_accepts_connections(self):
+        """Test start returns only once the socket is listening"""
+        for _ in range(5):
+            self.zygote.stop()
+            self.zygote.start()
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                conn.connect(self.zygote.socket_path)
+            finally:
+                conn.close()
+        assert sorted(os.listdir(self.temp_dir)) == ["zygote.log", "zygote.sock"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])